@@ -187,11 +187,13 @@ class PlayerPropsImporter {
               playerOutcomes.set(playerName, {});
             }
             
-            // Store the point value for this outcome
+            // Store the point value and American price for this outcome
             if (outcome.name === 'Over') {
               playerOutcomes.get(playerName).over_point = outcome.point;
+              playerOutcomes.get(playerName).over_price = outcome.price;
             } else if (outcome.name === 'Under') {
               playerOutcomes.get(playerName).under_point = outcome.point;
+              playerOutcomes.get(playerName).under_price = outcome.price;
             }
           });
           
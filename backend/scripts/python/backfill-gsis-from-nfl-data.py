@@ -3,31 +3,10 @@
 Backfill missing GSIS IDs in players table using data from nfl_data_py tables
 """
 
-import os
 import sys
-import psycopg2
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
-
-# Database connection configuration
-DB_CONFIG = {
-    'host': os.getenv('DB_HOST', 'localhost'),
-    'database': os.getenv('DB_NAME', 'ff_angles'),
-    'user': os.getenv('DB_USER', 'postgres'),
-    'password': os.getenv('DB_PASSWORD', 'password'),
-    'port': os.getenv('DB_PORT', '5432')
-}
-
-def get_db_connection():
-    """Create database connection"""
-    try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        return conn
-    except Exception as e:
-        print(f"Error connecting to database: {e}")
-        sys.exit(1)
+from db import get_db_connection
+from schema_catalog import load_schema_catalog, table_columns
 
 def backfill_gsis_ids():
     """Backfill GSIS IDs using player names from nfl_data_py tables"""
@@ -46,18 +25,12 @@ def backfill_gsis_ids():
     ]
     
     gsis_player_map = {}
+    catalog = load_schema_catalog(cursor)
     
     for table in nfl_data_tables:
         try:
             # Check if table exists and has the expected columns
-            cursor.execute(f"""
-                SELECT column_name 
-                FROM information_schema.columns 
-                WHERE table_name = '{table}'
-                AND column_name IN ('gsis_id', 'player_display_name', 'player_name')
-            """)
-            
-            available_columns = [row[0] for row in cursor.fetchall()]
+            available_columns = [col for col, _ in table_columns(catalog, table)]
             
             if 'gsis_id' not in available_columns:
                 print(f"  Skipping {table} - no gsis_id column")
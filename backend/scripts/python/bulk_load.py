@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+COPY-based bulk load helpers shared by the nightly stages
+
+Every helper takes an open psycopg2 cursor and leaves transaction control to
+the caller, so a stage can load several tables and commit once.
+"""
+
+import io
+import pandas as pd
+
+from change_log import change_key_columns, record_changes
+
+def _csv_buffer(data, columns):
+    """Serialize DataFrame columns to an in-memory CSV buffer for COPY"""
+    data = data[columns]
+
+    # Whole-number floats (ints upcast by NaN) must be written as "5", not "5.0",
+    # or COPY rejects them for integer columns
+    integral = [
+        col for col in columns
+        if pd.api.types.is_float_dtype(data[col]) and (data[col].dropna() % 1 == 0).all()
+    ]
+    if integral:
+        data = data.astype({col: 'Int64' for col in integral})
+
+    buffer = io.StringIO()
+    data.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    return buffer
+
+def copy_dataframe(cursor, data, table_name, columns=None, chunk_size=None):
+    """
+    Append DataFrame rows to a table with COPY FROM STDIN.
+
+    Missing values are written as empty CSV fields, which COPY loads as NULL.
+    With chunk_size the CSV is built and sent that many rows at a time, which
+    bounds the size of the text buffer for very wide frames.
+    Returns the number of rows copied.
+    """
+    if columns is None:
+        columns = list(data.columns)
+    if len(data) == 0:
+        return 0
+
+    copy_sql = f"COPY {table_name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    chunk_size = chunk_size or len(data)
+
+    for start in range(0, len(data), chunk_size):
+        cursor.copy_expert(copy_sql, _csv_buffer(data.iloc[start:start + chunk_size], columns))
+    return len(data)
+
+def create_staging_table(cursor, table_name, columns, staging_name=None):
+    """Create a temp table with the target's column types, dropped at commit"""
+    staging_name = staging_name or f"{table_name}_staging"
+    # Qualified so a leftover real table of the same name is never dropped
+    cursor.execute(f"DROP TABLE IF EXISTS pg_temp.{staging_name}")
+    cursor.execute(f"""
+        CREATE TEMP TABLE {staging_name} ON COMMIT DROP AS
+        SELECT {', '.join(columns)} FROM {table_name} WITH NO DATA
+    """)
+    return staging_name
+
+def diff_staged(cursor, staging_name, table_name, conflict_columns, compare_columns):
+    """
+    Compare a staged table with the live one in a single set-based query.
+
+    Returns a dict with the number of rows that would be inserted, changed
+    or left unchanged, plus the number of changed rows per compared column.
+    """
+    key_match = ' AND '.join(f"t.{col} = s.{col}" for col in conflict_columns)
+    missing = f"t.{conflict_columns[0]} IS NULL"
+    matched = f"t.{conflict_columns[0]} IS NOT NULL"
+    column_changed = {col: f"s.{col} IS DISTINCT FROM t.{col}" for col in compare_columns}
+    any_changed = ' OR '.join(column_changed.values()) or 'FALSE'
+
+    per_column = ''.join(
+        f",\n            COUNT(*) FILTER (WHERE {matched} AND {condition})"
+        for condition in column_changed.values()
+    )
+    cursor.execute(f"""
+        SELECT
+            COUNT(*) FILTER (WHERE {missing}),
+            COUNT(*) FILTER (WHERE {matched} AND ({any_changed})),
+            COUNT(*) FILTER (WHERE {matched} AND NOT ({any_changed})){per_column}
+        FROM {staging_name} s
+        LEFT JOIN {table_name} t ON {key_match}
+    """)
+    counts = cursor.fetchone()
+
+    return {
+        'table': table_name,
+        'inserted': counts[0],
+        'changed': counts[1],
+        'unchanged': counts[2],
+        'columns': {col: count for col, count in zip(compare_columns, counts[3:]) if count}
+    }
+
+def print_diff(diff):
+    """Print a dry-run diff summary for one table"""
+    print(f"  [DRY RUN] {diff['table']}: {diff['inserted']} to insert, "
+          f"{diff['changed']} to change, {diff['unchanged']} unchanged")
+    for col, count in sorted(diff['columns'].items(), key=lambda item: -item[1]):
+        print(f"    {col}: {count} rows change")
+
+def upsert_dataframe(cursor, data, table_name, conflict_columns, columns=None, update_columns=None,
+                     dry_run=False, changes=None, compare_columns=None):
+    """
+    Upsert a DataFrame through a COPY-loaded staging table.
+
+    One COPY plus one INSERT ... SELECT ... ON CONFLICT replaces a round trip
+    per row. Existing rows are only rewritten when one of compare_columns
+    (default update_columns) differs, so unchanged rows cost no write. Returns
+    the number of rows inserted or updated.
+
+    With a change set (see change_log.new_change_set) the player, game and
+    season/week keys of the inserted or updated rows are added to it.
+
+    With dry_run the rows are only staged and diffed against the table (see
+    diff_staged); nothing is written and the number of rows that would be
+    inserted or changed is returned.
+    """
+    if columns is None:
+        columns = list(data.columns)
+    if update_columns is None:
+        update_columns = [col for col in columns if col not in conflict_columns]
+    if compare_columns is None:
+        compare_columns = update_columns
+    if len(data) == 0:
+        return 0
+
+    staging = create_staging_table(cursor, table_name, columns)
+    copy_dataframe(cursor, data, staging, columns)
+
+    if dry_run:
+        diff = diff_staged(cursor, staging, table_name, conflict_columns, compare_columns)
+        print_diff(diff)
+        return diff['inserted'] + diff['changed']
+
+    column_list = ', '.join(columns)
+    if update_columns:
+        conflict_action = "DO UPDATE SET " + ', '.join(
+            f"{col} = EXCLUDED.{col}" for col in update_columns
+        )
+        if compare_columns:
+            conflict_action += " WHERE " + ' OR '.join(
+                f"t.{col} IS DISTINCT FROM EXCLUDED.{col}" for col in compare_columns
+            )
+    else:
+        conflict_action = "DO NOTHING"
+
+    keys = change_key_columns(table_name, columns) if changes is not None else {}
+    returning = "RETURNING " + ', '.join(f"t.{col}" for col in keys.values()) if keys else ''
+
+    cursor.execute(f"""
+        INSERT INTO {table_name} AS t ({column_list})
+        SELECT {column_list} FROM {staging}
+        ON CONFLICT ({', '.join(conflict_columns)}) {conflict_action}
+        {returning}
+    """)
+    if changes is not None:
+        rows = cursor.fetchall() if keys else [()] * cursor.rowcount
+        record_changes(changes, table_name, keys, rows)
+    return cursor.rowcount
+
+def finish_load(conn, dry_run=False):
+    """Commit a load, or roll back everything it staged when this is a dry run"""
+    if dry_run:
+        conn.rollback()
+    else:
+        conn.commit()
+
+def query_dataframe(cursor, query, params=None, dtype=None):
+    """
+    Run a SELECT and load the result with COPY TO STDOUT.
+
+    Much faster than fetchall() for large results since rows are never
+    materialized as Python tuples. dtype is passed through to read_csv.
+    """
+    if params is not None:
+        query = cursor.mogrify(query, params).decode()
+
+    buffer = io.StringIO()
+    cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)", buffer)
+    buffer.seek(0)
+    return pd.read_csv(buffer, dtype=dtype)
+
+def _update_isolating(cursor, sql, rows, fetch, errors):
+    """Run one UPDATE ... FROM (VALUES %s), bisecting the rows after a failure"""
+    import psycopg2.extras
+
+    cursor.execute("SAVEPOINT update_from_values")
+    try:
+        result = psycopg2.extras.execute_values(cursor, sql, rows, page_size=len(rows), fetch=fetch)
+        if not fetch:
+            result = cursor.rowcount
+        cursor.execute("RELEASE SAVEPOINT update_from_values")
+        return result
+    except Exception as e:
+        cursor.execute("ROLLBACK TO SAVEPOINT update_from_values")
+        cursor.execute("RELEASE SAVEPOINT update_from_values")
+        if len(rows) == 1:
+            errors.append((rows[0], str(e).strip()))
+            return [] if fetch else 0
+
+    middle = len(rows) // 2
+    return (_update_isolating(cursor, sql, rows[:middle], fetch, errors) +
+            _update_isolating(cursor, sql, rows[middle:], fetch, errors))
+
+def update_from_values(cursor, sql, rows, fetch=False):
+    """
+    Run an UPDATE ... FROM (VALUES %s) for all rows in a single statement.
+
+    The statement runs under a savepoint; when it fails, the rows are bisected
+    until the failing ones are isolated, so one bad row only costs its own
+    write. Returns (result, errors): result is the number of updated rows, or
+    the RETURNING rows with fetch, and errors lists (row, message) for every
+    row that failed.
+    """
+    errors = []
+    if not rows:
+        return ([] if fetch else 0), errors
+    return _update_isolating(cursor, sql, list(rows), fetch, errors), errors
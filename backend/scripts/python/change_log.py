@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Change sets published by the loaders for downstream cache invalidation
+
+A loader collects the player ids, game ids and (season, week) keys of the
+rows it actually inserted or changed (see upsert_dataframe's changes
+argument) and publishes them just before it commits. Each publish writes one
+row to data_change_log and sends a NOTIFY on CHANGE_CHANNEL carrying the log
+id, so listeners are only woken once the load commits and read the full key
+sets from the table. A rolled-back load publishes nothing.
+
+Consumers LISTEN ffangles_changes and refresh only what changed, or poll
+data_change_log by id after a restart.
+"""
+
+import json
+import pandas as pd
+
+CHANGE_CHANNEL = 'ffangles_changes'
+
+# pg_notify payloads are capped at 8000 bytes; key lists go in the table
+NOTIFY_SEASON_WEEKS = 50
+
+def create_change_log_table(cursor):
+    """Create the change log table if needed"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS data_change_log (
+            id BIGSERIAL PRIMARY KEY,
+            stage VARCHAR(50) NOT NULL,
+            tables TEXT[] NOT NULL,
+            player_ids INTEGER[] NOT NULL,
+            game_ids TEXT[] NOT NULL,
+            season_weeks JSONB NOT NULL,
+            row_count INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_data_change_log_created ON data_change_log(created_at);
+    """)
+
+def new_change_set():
+    """Empty change set for one stage"""
+    return {
+        'tables': set(),
+        'player_ids': set(),
+        'game_ids': set(),
+        'season_weeks': set(),
+        'rows': 0
+    }
+
+def change_key_columns(table_name, columns):
+    """
+    Columns identifying what a row of the table is about, by change key.
+
+    players is keyed by its own id; every other table by the player_id,
+    game_id, season and week columns it has.
+    """
+    keys = {}
+    if table_name == 'players':
+        keys['player_id'] = 'id'
+    elif 'player_id' in columns:
+        keys['player_id'] = 'player_id'
+    if 'game_id' in columns:
+        keys['game_id'] = 'game_id'
+    if 'season' in columns:
+        keys['season'] = 'season'
+        if 'week' in columns:
+            keys['week'] = 'week'
+    return keys
+
+def _key(value, cast):
+    """Normalize a key value, None for NULL/NaN"""
+    if pd.isna(value):
+        return None
+    return cast(value)
+
+def record_changes(changes, table_name, keys, rows):
+    """Add rows of key values (ordered like keys) to a change set"""
+    changes['tables'].add(table_name)
+    changes['rows'] += len(rows)
+    if not rows:
+        return
+
+    names = list(keys)
+    for row in rows:
+        values = dict(zip(names, row))
+        player_id = _key(values.get('player_id'), int)
+        if player_id is not None:
+            changes['player_ids'].add(player_id)
+        game_id = _key(values.get('game_id'), str)
+        if game_id is not None:
+            changes['game_ids'].add(game_id)
+        season = _key(values.get('season'), int)
+        if season is not None:
+            changes['season_weeks'].add((season, _key(values.get('week'), int)))
+
+def record_frame_changes(changes, table_name, data):
+    """Add every row of a DataFrame written without an upsert (delete + COPY)"""
+    keys = change_key_columns(table_name, list(data.columns))
+    rows = data[list(keys.values())].itertuples(index=False, name=None)
+    record_changes(changes, table_name, keys, list(rows))
+
+def has_changes(changes):
+    """Check whether a change set holds any changed rows"""
+    return changes['rows'] > 0
+
+def publish_changes(cursor, stage, changes):
+    """
+    Log a stage's change set and NOTIFY listeners, inside the load's transaction.
+
+    Nothing is published for an empty change set. The notification is only
+    delivered when the caller commits. Returns the change log id or None.
+    """
+    if not has_changes(changes):
+        return None
+
+    # (season, None) sorts before that season's weeks
+    season_weeks = sorted(changes['season_weeks'], key=lambda key: (key[0], key[1] or 0))
+
+    create_change_log_table(cursor)
+    cursor.execute("""
+        INSERT INTO data_change_log (stage, tables, player_ids, game_ids, season_weeks, row_count)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        RETURNING id
+    """, (
+        stage,
+        sorted(changes['tables']),
+        sorted(changes['player_ids']),
+        sorted(changes['game_ids']),
+        json.dumps(season_weeks),
+        changes['rows']
+    ))
+    log_id = cursor.fetchone()[0]
+
+    payload = {
+        'id': log_id,
+        'stage': stage,
+        'tables': sorted(changes['tables']),
+        'players': len(changes['player_ids']),
+        'games': len(changes['game_ids']),
+        'rows': changes['rows']
+    }
+    if len(season_weeks) <= NOTIFY_SEASON_WEEKS:
+        payload['season_weeks'] = season_weeks
+    cursor.execute("SELECT pg_notify(%s, %s)", (CHANGE_CHANNEL, json.dumps(payload)))
+
+    print(f"  Published changes for {stage}: {len(changes['player_ids'])} players, "
+          f"{len(changes['game_ids'])} games, {len(season_weeks)} season/weeks (log id {log_id})")
+    return log_id
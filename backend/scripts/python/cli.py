@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+FFAngles command line entry point
+
+One command for the data scripts:
+
+    ffangles nightly [--dry-run]
+    ffangles backfill [--rebuild-partitions] [--memory-budget MB]
+    ffangles ids
+    ffangles fks [--batch-size N] [--workers N]
+    ffangles debug [player_name_filter]
+    ffangles probe
+    ffangles <stage> [args]      (pbp, snaps, epa, ranks, dvp, props, ...)
+
+Each subcommand runs its script with the remaining arguments, so pandas,
+nfl_data_py and psycopg2 are only imported by the command that needs them
+and `ffangles --help` or `ffangles probe` start almost instantly.
+"""
+
+import os
+import sys
+import time
+import runpy
+import argparse
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Subcommand -> (script, help)
+COMMANDS = {
+    'nightly': ('nightly_update_all.py', "Nightly update of the current season"),
+    'backfill': ('import_historical_nfl_data.py', "Import historical seasons from nfl_data_py"),
+    'migrate': ('migrate-to-nfl-data-py.py', "Create the nfl_data_py tables and partitions"),
+    'seasonal': ('import-nfl-seasonal-stats-fixed.py', "Import seasonal advanced stats"),
+    'ngs': ('import-nfl-ngs-stats-fixed.py', "Import Next-Gen Stats"),
+    'weekly': ('import-nfl-weekly-stats.py', "Import weekly player stats"),
+    'teams-2025': ('update_players_teams_2025.py', "Update players and teams with 2025 data"),
+    'ids': ('import-player-id-mapping.py', "Import cross-platform player ID mappings"),
+    'sleeper': ('sleeper_sync.py', "Sync changed Sleeper player ids into players"),
+    'gsis-sleeper': ('populate-gsis-ids-from-sleeper.py', "Fill missing GSIS ids from Sleeper"),
+    'gsis-nfl': ('backfill-gsis-from-nfl-data.py', "Backfill missing GSIS ids from nfl_data_py tables"),
+    'fks': ('update-foreign-keys-to-new-players.py', "Remap player_id foreign keys to the players table"),
+    'pbp': ('import_pbp_plays.py', "Import nflverse play-by-play by season"),
+    'snaps': ('import_snap_counts.py', "Import snap counts from nflverse and Tank01 boxscores"),
+    'epa': ('epa_aggregates.py', "Update team and player EPA aggregates"),
+    'ranks': ('positional_ranks.py', "Compute positional ranks and percentiles"),
+    'dvp': ('defense_vs_position.py', "Update fantasy points allowed by defense and position"),
+    'similar': ('similar_players.py', "Build or query the similar players index"),
+    'simulate': ('matchup_simulator.py', "Simulate head-to-head fantasy matchups"),
+    'blend': ('projection_blender.py', "Blend source projections into a consensus"),
+    'backtest': ('projection_backtest.py', "Backtest projection sources against weekly actuals"),
+    'props': ('prop_hit_rates.py', "Compute over/under hit rates for player props"),
+    'consensus': ('odds_processing.py', "No-vig consensus odds for player props"),
+    'lines': ('line_movement.py', "Track line movement of game lines and player props"),
+    'odds': ('odds_scheduler.py', "Poll The Odds API for player props, closest kickoffs first"),
+    'parquet': ('export_parquet.py', "Export core tables to season-partitioned Parquet"),
+    'bundle': ('export_league_bundle.py', "Build the league bundle for player_stats.html"),
+    'debug': ('debug_player_data.py', "Check table structure and a player's data")
+}
+
+# Tables summarized by `ffangles probe`
+PROBE_TABLES = [
+    'teams', 'players', 'games', 'player_seasonal_stats', 'player_weekly_stats',
+    'player_ngs_passing', 'player_ngs_receiving', 'player_ngs_rushing',
+    'player_snap_counts', 'pbp_plays'
+]
+
+def run_script(script, script_args):
+    """Run a script as __main__ with its own argv"""
+    path = os.path.join(SCRIPT_DIR, script)
+    sys.argv = [path] + script_args
+    runpy.run_path(path, run_name='__main__')
+
+def probe():
+    """Check the database connection and print table sizes from the catalog"""
+    from db import DB_CONFIG, get_db_connection
+    from schema_catalog import estimated_rows, load_schema_catalog
+
+    started = time.time()
+    conn = get_db_connection()
+    connect_ms = (time.time() - started) * 1000
+    cursor = conn.cursor()
+
+    started = time.time()
+    cursor.execute("SELECT 1")
+    cursor.fetchone()
+    round_trip_ms = (time.time() - started) * 1000
+
+    cursor.execute("SELECT current_setting('server_version'), pg_size_pretty(pg_database_size(current_database()))")
+    version, size = cursor.fetchone()
+
+    print(f"Database: {DB_CONFIG['database']} on {DB_CONFIG['host']}:{DB_CONFIG['port']}")
+    print(f"  PostgreSQL {version}, {size}")
+    print(f"  Connect: {connect_ms:.0f} ms, round trip: {round_trip_ms:.1f} ms")
+
+    catalog = load_schema_catalog(cursor)
+    print(f"\nTables ({len(catalog)} total, row counts are planner estimates):")
+    for table in PROBE_TABLES:
+        if table in catalog:
+            print(f"  {table}: ~{estimated_rows(catalog, table):,} rows")
+        else:
+            print(f"  {table}: missing")
+
+    cursor.close()
+    conn.close()
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        prog='ffangles',
+        description="FFAngles data pipeline",
+        epilog="Arguments after the subcommand are passed to its script "
+               "(e.g. `ffangles nightly --help`)."
+    )
+    subparsers = parser.add_subparsers(dest='command', metavar='command')
+    for command, (script, help_text) in COMMANDS.items():
+        subparsers.add_parser(command, help=help_text, add_help=False)
+    subparsers.add_parser('probe', help="Check the database connection and table sizes")
+
+    args, script_args = parser.parse_known_args()
+
+    if args.command is None:
+        parser.print_help()
+        sys.exit(1)
+
+    if args.command == 'probe':
+        probe()
+    else:
+        run_script(COMMANDS[args.command][0], script_args)
+
+if __name__ == "__main__":
+    main()
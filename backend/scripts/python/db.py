@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Shared database configuration for the FFAngles Python scripts
+
+Loads .env once and provides the connection settings and helper every script
+uses. psycopg2 is only imported on the first connection, so importing this
+module keeps CLI startup fast.
+"""
+
+import os
+import sys
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Database connection configuration
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'localhost'),
+    'database': os.getenv('DB_NAME', 'ff_angles'),
+    'user': os.getenv('DB_USER', 'postgres'),
+    'password': os.getenv('DB_PASSWORD', 'password'),
+    'port': os.getenv('DB_PORT', '5432')
+}
+
+def get_db_connection():
+    """Create database connection"""
+    import psycopg2
+
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+        return conn
+    except Exception as e:
+        print(f"Error connecting to database: {e}")
+        sys.exit(1)
@@ -3,32 +3,12 @@
 Debug script to check player data structure and quality in the database.
 """
 
-import psycopg2
-import os
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-def connect_to_db():
-    """Connect to PostgreSQL database."""
-    try:
-        conn = psycopg2.connect(
-            host=os.getenv('DB_HOST', 'localhost'),
-            database=os.getenv('DB_NAME', 'ff_angles'),
-            user=os.getenv('DB_USER', 'postgres'),
-            password=os.getenv('DB_PASSWORD')
-        )
-        return conn
-    except Exception as e:
-        print(f"Error connecting to database: {e}")
-        return None
+from db import get_db_connection
+from schema_catalog import load_schema_catalog, table_columns
 
 def check_database_structure():
     """Check what tables and columns exist in the database."""
-    conn = connect_to_db()
-    if not conn:
-        return
+    conn = get_db_connection()
     
     cursor = conn.cursor()
     
@@ -36,28 +16,16 @@ def check_database_structure():
     print("=" * 50)
     
     try:
-        # Check what tables exist
-        cursor.execute("""
-            SELECT table_name 
-            FROM information_schema.tables 
-            WHERE table_schema = 'public'
-            ORDER BY table_name
-        """)
+        # One catalog query covers every table, column and row estimate below
+        catalog = load_schema_catalog(cursor)
         
-        tables = cursor.fetchall()
-        print(f"\n[TABLES] Found {len(tables)} tables:")
-        for (table_name,) in tables:
-            print(f"   - {table_name}")
+        print(f"\n[TABLES] Found {len(catalog)} tables:")
+        for table_name, info in catalog.items():
+            partitions = f", {info['partitions']} partitions" if info['partitions'] else ""
+            print(f"   - {table_name} (~{info['estimated_rows']:,} rows{partitions})")
         
         # Check columns in players table if it exists
-        cursor.execute("""
-            SELECT column_name, data_type 
-            FROM information_schema.columns 
-            WHERE table_name = 'players'
-            ORDER BY ordinal_position
-        """)
-        
-        player_columns = cursor.fetchall()
+        player_columns = table_columns(catalog, 'players')
         if player_columns:
             print(f"\n[PLAYERS] Players table columns:")
             for col_name, data_type in player_columns:
@@ -66,14 +34,7 @@ def check_database_structure():
             print(f"\n[PLAYERS] No 'players' table found")
         
         # Check columns in player_weekly_stats table if it exists
-        cursor.execute("""
-            SELECT column_name, data_type 
-            FROM information_schema.columns 
-            WHERE table_name = 'player_weekly_stats'
-            ORDER BY ordinal_position
-        """)
-        
-        weekly_columns = cursor.fetchall()
+        weekly_columns = table_columns(catalog, 'player_weekly_stats')
         if weekly_columns:
             print(f"\n[WEEKLY_STATS] Player weekly stats table columns:")
             for col_name, data_type in weekly_columns:
@@ -90,9 +51,7 @@ def check_database_structure():
 
 def check_player_data(player_name_filter="brown"):
     """Check data for players matching the filter using actual column names."""
-    conn = connect_to_db()
-    if not conn:
-        return
+    conn = get_db_connection()
     
     cursor = conn.cursor()
     
@@ -101,14 +60,7 @@ def check_player_data(player_name_filter="brown"):
     
     try:
         # First, find out what the actual column names are
-        cursor.execute("""
-            SELECT column_name 
-            FROM information_schema.columns 
-            WHERE table_name = 'players'
-            ORDER BY ordinal_position
-        """)
-        
-        columns = [row[0] for row in cursor.fetchall()]
+        columns = [col for col, _ in table_columns(load_schema_catalog(cursor), 'players')]
         print(f"\n[COLUMNS] Available columns in players table: {columns}")
         
         if not columns:
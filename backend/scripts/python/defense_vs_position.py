@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Maintain fantasy points allowed by each defense to each position
+
+defense_vs_position holds, per (season, week, defense, position), the totals
+the players of that position scored against the defense, built from
+player_weekly_stats.opponent_team and players.position with one groupby.
+Each week's stats are fingerprinted in the database, so only weeks whose
+underlying rows changed since the last run are re-aggregated.
+
+defense_vs_position_rolling holds the last-four-games (l4) and season-to-date
+(season) averages through every week the defense played, ranked within the
+position, so an opponent-strength lookup on a player card is a primary key
+read. It is rebuilt from the small weekly table for the affected seasons only.
+"""
+
+import sys
+import argparse
+import pandas as pd
+from datetime import datetime
+
+from bulk_load import copy_dataframe, query_dataframe
+from db import get_db_connection
+
+# Stats of player_weekly_stats summed per defense and position
+DVP_STATS = [
+    'fantasy_points', 'fantasy_points_ppr', 'completions', 'attempts', 'passing_yards',
+    'passing_tds', 'interceptions', 'carries', 'rushing_yards', 'rushing_tds',
+    'receptions', 'targets', 'receiving_yards', 'receiving_tds'
+]
+
+DVP_POSITIONS = ['QB', 'RB', 'WR', 'TE']
+
+DVP_WINDOW = 4  # games in the l4 window
+
+DVP_KEYS = ['season', 'week', 'defense_team', 'position']
+
+def create_dvp_tables(cursor):
+    """Create the defense-vs-position tables if they do not exist"""
+    stat_columns = ',\n            '.join(f"{stat} REAL" for stat in DVP_STATS)
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS defense_vs_position (
+            season SMALLINT NOT NULL,
+            week SMALLINT NOT NULL,
+            defense_team VARCHAR(3) NOT NULL,
+            position VARCHAR(5) NOT NULL,
+            players SMALLINT NOT NULL,
+            {stat_columns},
+            PRIMARY KEY (season, week, defense_team, position)
+        );
+
+        CREATE TABLE IF NOT EXISTS defense_vs_position_rolling (
+            season SMALLINT NOT NULL,
+            through_week SMALLINT NOT NULL,
+            defense_team VARCHAR(3) NOT NULL,
+            position VARCHAR(5) NOT NULL,
+            time_window VARCHAR(6) NOT NULL,
+            games SMALLINT NOT NULL,
+            {stat_columns},
+            ppr_rank SMALLINT NOT NULL,
+            PRIMARY KEY (season, defense_team, position, time_window, through_week)
+        );
+
+        CREATE TABLE IF NOT EXISTS dvp_week_state (
+            season SMALLINT NOT NULL,
+            week SMALLINT NOT NULL,
+            fingerprint CHAR(32) NOT NULL,
+            aggregated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (season, week)
+        );
+    """)
+
+def find_changed_weeks(cursor, seasons):
+    """
+    (season, week, fingerprint) for weeks whose stats differ from the last run.
+
+    The fingerprint is an md5 over the week's rows in a fixed order, computed
+    in the database so only one row per week comes back.
+    """
+    row_columns = ', '.join(['w.player_id', 'p.position', 'w.opponent_team'] +
+                            [f"w.{stat}" for stat in DVP_STATS])
+    cursor.execute(f"""
+        WITH weeks AS (
+            SELECT w.season, w.week,
+                   md5(string_agg(ROW({row_columns})::text, ',' ORDER BY w.player_id)) AS fingerprint
+            FROM player_weekly_stats w
+            JOIN players p ON p.id = w.player_id
+            WHERE w.season = ANY(%s)
+              AND w.season_type = 'REG'
+              AND p.position = ANY(%s)
+            GROUP BY w.season, w.week
+        )
+        SELECT weeks.season, weeks.week, weeks.fingerprint
+        FROM weeks
+        LEFT JOIN dvp_week_state s ON s.season = weeks.season AND s.week = weeks.week
+        WHERE s.fingerprint IS DISTINCT FROM weeks.fingerprint
+        ORDER BY weeks.season, weeks.week
+    """, (list(seasons), DVP_POSITIONS))
+    return cursor.fetchall()
+
+def load_week_stats(cursor, season, weeks):
+    """Load the regular season player rows of some weeks with position and opponent"""
+    stat_columns = ', '.join(f"w.{stat}" for stat in DVP_STATS)
+    return query_dataframe(cursor, f"""
+        SELECT w.season, w.week, w.opponent_team AS defense_team, p.position, {stat_columns}
+        FROM player_weekly_stats w
+        JOIN players p ON p.id = w.player_id
+        WHERE w.season = %s
+          AND w.week = ANY(%s)
+          AND w.season_type = 'REG'
+          AND w.opponent_team IS NOT NULL
+          AND p.position = ANY(%s)
+    """, (season, list(weeks), DVP_POSITIONS))
+
+def aggregate_weeks(weekly):
+    """Sum every stat per (season, week, defense, position) in one groupby"""
+    groups = weekly.groupby(DVP_KEYS, observed=True)
+    totals = groups[DVP_STATS].sum(min_count=1)
+    totals['players'] = groups.size()
+    return totals.reset_index()[DVP_KEYS + ['players'] + DVP_STATS]
+
+def build_rolling(dvp):
+    """
+    Build the l4 and season-to-date averages through every week a defense played.
+
+    Each window is ranked within (season, through_week, position) by PPR points
+    allowed, rank 1 being the defense that allows the most.
+    """
+    dvp = dvp.sort_values(['season', 'defense_team', 'position', 'week']).reset_index(drop=True)
+    keys = dvp[['season', 'week', 'defense_team', 'position']].rename(columns={'week': 'through_week'})
+    stats = dvp[DVP_STATS].astype('float64')
+    by_defense = stats.groupby([dvp['season'], dvp['defense_team'], dvp['position']])
+
+    windows = []
+    for window_name, rolling in (('l4', by_defense.rolling(DVP_WINDOW, min_periods=1)),
+                                 ('season', by_defense.expanding())):
+        values = rolling.mean().reset_index(level=[0, 1, 2], drop=True).sort_index()
+        games = rolling['fantasy_points_ppr'].count().reset_index(level=[0, 1, 2], drop=True).sort_index()
+        frame = pd.concat([keys, values], axis=1)
+        frame['time_window'] = window_name
+        frame['games'] = games.astype('int16')
+        windows.append(frame)
+
+    rolling = pd.concat(windows, ignore_index=True)
+    rolling['ppr_rank'] = rolling.groupby(
+        ['season', 'through_week', 'position', 'time_window']
+    )['fantasy_points_ppr'].rank(method='min', ascending=False).fillna(0).astype('int16')
+    return rolling
+
+def update_defense_vs_position(seasons):
+    """Re-aggregate changed weeks and rebuild the rolling tables of their seasons"""
+    print(f"Updating defense vs position for seasons: {seasons}")
+
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        create_dvp_tables(cursor)
+
+        changed = find_changed_weeks(cursor, seasons)
+        print(f"  Found {len(changed)} weeks with changed stats")
+
+        if not changed:
+            conn.commit()
+            cursor.close()
+            conn.close()
+            return True
+
+        weeks_by_season = {}
+        for season, week, _ in changed:
+            weeks_by_season.setdefault(season, []).append(week)
+
+        week_rows = 0
+        for season, weeks in weeks_by_season.items():
+            dvp = aggregate_weeks(load_week_stats(cursor, season, weeks))
+            cursor.execute(
+                "DELETE FROM defense_vs_position WHERE season = %s AND week = ANY(%s)",
+                (season, weeks)
+            )
+            copy_dataframe(cursor, dvp, 'defense_vs_position', DVP_KEYS + ['players'] + DVP_STATS)
+            week_rows += len(dvp)
+
+        # Later weeks' windows include the changed weeks, so whole seasons are rebuilt
+        affected_seasons = list(weeks_by_season)
+        dvp = query_dataframe(cursor, f"""
+            SELECT {', '.join(DVP_KEYS + DVP_STATS)}
+            FROM defense_vs_position
+            WHERE season = ANY(%s)
+        """, (affected_seasons,))
+        rolling = build_rolling(dvp)
+        cursor.execute(
+            "DELETE FROM defense_vs_position_rolling WHERE season = ANY(%s)", (affected_seasons,)
+        )
+        copy_dataframe(cursor, rolling, 'defense_vs_position_rolling', [
+            'season', 'through_week', 'defense_team', 'position', 'time_window', 'games'
+        ] + DVP_STATS + ['ppr_rank'])
+
+        # Remember which version of each week was aggregated
+        cursor.executemany("""
+            INSERT INTO dvp_week_state (season, week, fingerprint, aggregated_at)
+            VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
+            ON CONFLICT (season, week) DO UPDATE SET
+                fingerprint = EXCLUDED.fingerprint,
+                aggregated_at = EXCLUDED.aggregated_at
+        """, changed)
+
+        conn.commit()
+        print(f"  Updated {week_rows} defense-week rows and {len(rolling)} rolling rows "
+              f"for {len(affected_seasons)} seasons")
+
+        cursor.close()
+        conn.close()
+        return True
+
+    except Exception as e:
+        print(f"  Error updating defense vs position: {e}")
+        return False
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Update fantasy points allowed by defense and position")
+    parser.add_argument('--seasons', type=int, nargs='+', default=[2025],
+                        help="Seasons to check for changed weeks (default: 2025)")
+    args = parser.parse_args()
+
+    print("FFAngles Defense vs Position")
+    print("=" * 40)
+    print(f"Started at: {datetime.now()}")
+
+    if update_defense_vs_position(args.seasons):
+        print("\nDefense vs position updated successfully!")
+    else:
+        print("\nDefense vs position update failed!")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
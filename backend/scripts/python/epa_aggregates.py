@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Maintain team and player EPA aggregates from play-by-play
+
+Replaces the one-off team_epa_calculated.json. Only games whose play-by-play
+fingerprint changed since the last run (see import_pbp_plays) are
+re-aggregated; season-to-date rows are then rebuilt from the small per-game
+tables for the affected teams and players, so pbp_plays is never rescanned.
+"""
+
+import sys
+import argparse
+from datetime import datetime
+
+from db import get_db_connection
+
+def create_epa_tables(cursor):
+    """Create the EPA aggregate tables if they do not exist"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS team_epa_weekly (
+            season SMALLINT NOT NULL,
+            week SMALLINT NOT NULL,
+            game_id VARCHAR(20) NOT NULL,
+            team VARCHAR(3) NOT NULL,
+            side VARCHAR(7) NOT NULL,
+            play_count INTEGER NOT NULL,
+            total_epa REAL,
+            avg_epa REAL,
+            success_rate REAL,
+            PRIMARY KEY (game_id, team, side)
+        );
+        CREATE INDEX IF NOT EXISTS idx_team_epa_weekly_team
+            ON team_epa_weekly(season, team, side, week);
+
+        CREATE TABLE IF NOT EXISTS team_epa_season (
+            season SMALLINT NOT NULL,
+            team VARCHAR(3) NOT NULL,
+            side VARCHAR(7) NOT NULL,
+            through_week SMALLINT NOT NULL,
+            games INTEGER NOT NULL,
+            play_count INTEGER NOT NULL,
+            total_epa REAL,
+            avg_epa REAL,
+            success_rate REAL,
+            PRIMARY KEY (season, team, side)
+        );
+
+        CREATE TABLE IF NOT EXISTS player_epa_weekly (
+            season SMALLINT NOT NULL,
+            week SMALLINT NOT NULL,
+            game_id VARCHAR(20) NOT NULL,
+            gsis_id VARCHAR(12) NOT NULL,
+            role VARCHAR(7) NOT NULL,
+            team VARCHAR(3),
+            play_count INTEGER NOT NULL,
+            total_epa REAL,
+            avg_epa REAL,
+            success_rate REAL,
+            PRIMARY KEY (game_id, gsis_id, role)
+        );
+        CREATE INDEX IF NOT EXISTS idx_player_epa_weekly_player
+            ON player_epa_weekly(gsis_id, season, week);
+
+        CREATE TABLE IF NOT EXISTS player_epa_season (
+            season SMALLINT NOT NULL,
+            gsis_id VARCHAR(12) NOT NULL,
+            role VARCHAR(7) NOT NULL,
+            through_week SMALLINT NOT NULL,
+            games INTEGER NOT NULL,
+            play_count INTEGER NOT NULL,
+            total_epa REAL,
+            avg_epa REAL,
+            success_rate REAL,
+            PRIMARY KEY (season, gsis_id, role)
+        );
+
+        CREATE TABLE IF NOT EXISTS epa_game_state (
+            game_id VARCHAR(20) PRIMARY KEY,
+            fingerprint VARCHAR(16) NOT NULL,
+            aggregated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+
+def find_changed_games(cursor, seasons):
+    """Games whose play-by-play fingerprint differs from the last aggregation"""
+    cursor.execute("""
+        SELECT f.game_id
+        FROM pbp_game_fingerprints f
+        LEFT JOIN epa_game_state s ON s.game_id = f.game_id
+        WHERE f.season = ANY(%s)
+          AND s.fingerprint IS DISTINCT FROM f.fingerprint
+    """, (list(seasons),))
+    return [row[0] for row in cursor.fetchall()]
+
+def aggregate_team_games(cursor, game_ids):
+    """Rebuild offense and defense rows for the changed games"""
+    cursor.execute("DELETE FROM team_epa_weekly WHERE game_id = ANY(%s)", (game_ids,))
+    cursor.execute("""
+        INSERT INTO team_epa_weekly (
+            season, week, game_id, team, side, play_count, total_epa, avg_epa, success_rate
+        )
+        SELECT season, week, game_id, team, side,
+               COUNT(*), SUM(epa), AVG(epa), AVG(success::int)
+        FROM (
+            SELECT season, week, game_id, posteam AS team, 'offense' AS side, epa, success
+            FROM pbp_plays
+            WHERE game_id = ANY(%(game_ids)s) AND (pass OR rush) AND epa IS NOT NULL
+            UNION ALL
+            SELECT season, week, game_id, defteam AS team, 'defense' AS side, epa, success
+            FROM pbp_plays
+            WHERE game_id = ANY(%(game_ids)s) AND (pass OR rush) AND epa IS NOT NULL
+        ) plays
+        GROUP BY season, week, game_id, team, side
+    """, {'game_ids': game_ids})
+    return cursor.rowcount
+
+def aggregate_player_games(cursor, game_ids):
+    """Rebuild passer, rusher and receiver rows for the changed games"""
+    cursor.execute("DELETE FROM player_epa_weekly WHERE game_id = ANY(%s)", (game_ids,))
+    cursor.execute("""
+        INSERT INTO player_epa_weekly (
+            season, week, game_id, gsis_id, role, team, play_count, total_epa, avg_epa, success_rate
+        )
+        SELECT season, week, game_id, gsis_id, role, MAX(team),
+               COUNT(*), SUM(epa), AVG(epa), AVG(success::int)
+        FROM (
+            SELECT season, week, game_id, passer_player_id AS gsis_id, 'pass' AS role,
+                   posteam AS team, qb_epa AS epa, success
+            FROM pbp_plays
+            WHERE game_id = ANY(%(game_ids)s) AND passer_player_id IS NOT NULL AND qb_epa IS NOT NULL
+            UNION ALL
+            SELECT season, week, game_id, rusher_player_id, 'rush', posteam, epa, success
+            FROM pbp_plays
+            WHERE game_id = ANY(%(game_ids)s) AND rusher_player_id IS NOT NULL AND epa IS NOT NULL
+            UNION ALL
+            SELECT season, week, game_id, receiver_player_id, 'receive', posteam, epa, success
+            FROM pbp_plays
+            WHERE game_id = ANY(%(game_ids)s) AND receiver_player_id IS NOT NULL AND epa IS NOT NULL
+        ) plays
+        GROUP BY season, week, game_id, gsis_id, role
+    """, {'game_ids': game_ids})
+    return cursor.rowcount
+
+# Weekly table, season table and the column identifying the entity + split
+SEASON_TO_DATE_TABLES = [
+    ('team_epa_weekly', 'team_epa_season', ['team', 'side']),
+    ('player_epa_weekly', 'player_epa_season', ['gsis_id', 'role'])
+]
+
+def affected_keys_table(weekly_table):
+    """Temp table holding the (season, keys) a run touches in one weekly table"""
+    return f"{weekly_table}_affected"
+
+def collect_affected_keys(cursor, game_ids):
+    """
+    Remember the teams and players the changed games had before they are rebuilt.
+
+    An entity can drop out of a game on rebuild (plays re-credited to someone
+    else); its season-to-date row still has to be recomputed without it.
+    """
+    for weekly_table, _, keys in SEASON_TO_DATE_TABLES:
+        cursor.execute(f"""
+            CREATE TEMP TABLE {affected_keys_table(weekly_table)} ON COMMIT DROP AS
+            SELECT DISTINCT season, {', '.join(keys)} FROM {weekly_table} WHERE game_id = ANY(%s)
+        """, (game_ids,))
+
+def refresh_season_to_date(cursor, game_ids):
+    """Rebuild season-to-date rows for teams and players in the changed games, before and after"""
+    for weekly_table, season_table, keys in SEASON_TO_DATE_TABLES:
+        key_list = ', '.join(keys)
+        key_match = ' AND '.join(f"t.{key} = a.{key}" for key in keys)
+        affected = f"""
+            SELECT season, {key_list} FROM {affected_keys_table(weekly_table)}
+            UNION
+            SELECT season, {key_list} FROM {weekly_table} WHERE game_id = ANY(%(game_ids)s)
+        """
+
+        cursor.execute(f"""
+            DELETE FROM {season_table} t
+            USING ({affected}) a
+            WHERE t.season = a.season AND {key_match}
+        """, {'game_ids': game_ids})
+
+        cursor.execute(f"""
+            INSERT INTO {season_table} (
+                season, {key_list}, through_week, games, play_count, total_epa, avg_epa, success_rate
+            )
+            SELECT t.season, {', '.join(f"t.{key}" for key in keys)}, MAX(t.week), COUNT(*),
+                   SUM(t.play_count), SUM(t.total_epa),
+                   SUM(t.total_epa) / NULLIF(SUM(t.play_count), 0),
+                   SUM(t.success_rate * t.play_count) / NULLIF(SUM(t.play_count), 0)
+            FROM {weekly_table} t
+            JOIN ({affected}) a ON t.season = a.season AND {key_match}
+            GROUP BY t.season, {', '.join(f"t.{key}" for key in keys)}
+        """, {'game_ids': game_ids})
+
+def update_epa_aggregates(seasons):
+    """Re-aggregate EPA for games whose plays changed in the given seasons"""
+    print(f"Updating EPA aggregates for seasons: {seasons}")
+
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        create_epa_tables(cursor)
+
+        game_ids = find_changed_games(cursor, seasons)
+        print(f"  Found {len(game_ids)} games with changed plays")
+
+        if not game_ids:
+            conn.commit()
+            cursor.close()
+            conn.close()
+            return True
+
+        collect_affected_keys(cursor, game_ids)
+        team_rows = aggregate_team_games(cursor, game_ids)
+        player_rows = aggregate_player_games(cursor, game_ids)
+        refresh_season_to_date(cursor, game_ids)
+
+        # Remember which play-by-play version each game was aggregated from
+        cursor.execute("""
+            INSERT INTO epa_game_state (game_id, fingerprint, aggregated_at)
+            SELECT game_id, fingerprint, CURRENT_TIMESTAMP
+            FROM pbp_game_fingerprints
+            WHERE game_id = ANY(%s)
+            ON CONFLICT (game_id) DO UPDATE SET
+                fingerprint = EXCLUDED.fingerprint,
+                aggregated_at = EXCLUDED.aggregated_at
+        """, (game_ids,))
+
+        conn.commit()
+        print(f"  Updated {team_rows} team-game and {player_rows} player-game EPA rows")
+
+        cursor.close()
+        conn.close()
+        return True
+
+    except Exception as e:
+        print(f"  Error updating EPA aggregates: {e}")
+        return False
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Update team and player EPA aggregates")
+    parser.add_argument('--seasons', type=int, nargs='+', default=[2025],
+                        help="Seasons to check for changed games (default: 2025)")
+    args = parser.parse_args()
+
+    print("FFAngles EPA Aggregates")
+    print("=" * 40)
+    print(f"Started at: {datetime.now()}")
+
+    if update_epa_aggregates(args.seasons):
+        print("\nEPA aggregates updated successfully!")
+    else:
+        print("\nEPA aggregate update failed!")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
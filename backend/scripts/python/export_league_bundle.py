@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Build the precompressed league data bundle read by player_stats.html
+
+Roster players (e.g. web/public/my_team.json) are matched to the players
+table and their game logs are pulled from player_weekly_stats and games. The
+bundle is column-oriented JSON (every key is written once, not once per game)
+saved as content-hashed .json, .json.gz and .json.br files, plus a small
+league_bundle.manifest.json naming the current files. The bundle is only
+rebuilt when the roster or the players' rows in the database change.
+"""
+
+import os
+import re
+import sys
+import json
+import gzip
+import hashlib
+import argparse
+import pandas as pd
+from datetime import datetime
+
+from bulk_load import query_dataframe
+from db import get_db_connection
+
+# brotli is optional; without it only the .json and .json.gz files are written
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..')
+
+DEFAULT_ROSTER = os.path.join(REPO_ROOT, 'web', 'public', 'my_team.json')
+
+BUNDLE_PREFIX = 'league_bundle'
+MANIFEST_NAME = f"{BUNDLE_PREFIX}.manifest.json"
+
+# player_weekly_stats column -> game log column shown by player_stats.html
+STAT_COLUMNS = {
+    'completions': 'PASS CMPS',
+    'attempts': 'PASS ATTS',
+    'passing_yards': 'PASS YDS',
+    'passing_tds': 'PASS TDS',
+    'interceptions': 'INTS',
+    'carries': 'Rush ATTS',
+    'rushing_yards': 'Rush YDS',
+    'rushing_tds': 'RUSH TD',
+    'targets': 'TGTS',
+    'receptions': 'REC',
+    'receiving_yards': 'REC YDS',
+    'receiving_tds': 'REC TDS',
+    'fantasy_points_ppr': 'FPTS (PPR)'
+}
+
+PASSING = ['PASS CMPS', 'PASS ATTS', 'PASS YDS', 'PASS TDS', 'INTS']
+RUSHING = ['Rush ATTS', 'Rush YDS', 'RUSH TD']
+RECEIVING = ['TGTS', 'REC', 'REC YDS', 'REC TDS']
+
+# Stat columns kept for each position; the rest are left null
+POSITION_COLUMNS = {
+    'QB': PASSING + RUSHING,
+    'RB': RUSHING + RECEIVING,
+    'WR': RECEIVING + RUSHING,
+    'TE': RECEIVING
+}
+
+# games.game_type -> week label used by the viewer
+PLAYOFF_LABELS = {'WC': 'WC', 'DIV': 'DR', 'CON': 'CC', 'SB': 'SB'}
+
+NAME_SUFFIXES = re.compile(r'\b(jr|sr|ii|iii|iv|v)\b')
+
+def name_key(name):
+    """Normalize a player name for matching ("Tyrone Tracy Jr." -> "tyronetracy")"""
+    name = NAME_SUFFIXES.sub('', str(name).lower().replace('.', ''))
+    return re.sub(r'[^a-z]', '', name)
+
+def load_roster(path):
+    """Read the roster file and return (roster info, players frame, file hash)"""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    roster = json.loads(raw)
+
+    players = pd.DataFrame([
+        {'name': p['name'], 'slug': p.get('slug'), 'position': p['position'], 'team': p.get('team')}
+        for p in roster['players']
+    ])
+    players['name_key'] = players['name'].map(name_key)
+    return roster, players, hashlib.sha256(raw).hexdigest()
+
+def match_players(cursor, roster_players):
+    """Attach players.id to each roster entry by name and position (team breaks ties)"""
+    players = query_dataframe(cursor, """
+        SELECT id AS player_id, player_name, position, team AS db_team FROM players
+    """)
+    players['name_key'] = players['player_name'].map(name_key)
+
+    matched = roster_players.rename_axis('roster_index').reset_index().merge(
+        players, on=['name_key', 'position'], how='left'
+    )
+    matched['team_match'] = matched['team'] == matched['db_team']
+    matched = (matched.sort_values(['roster_index', 'team_match'], ascending=[True, False])
+                      .drop_duplicates('roster_index')
+                      .set_index('roster_index')
+                      .rename_axis(None))
+
+    unmatched = matched[matched['player_id'].isna()]['name'].tolist()
+    if unmatched:
+        print(f"  No database match for: {', '.join(unmatched)}")
+    return matched
+
+def latest_season(cursor, player_ids):
+    """Most recent season with weekly stats for any roster player"""
+    cursor.execute("SELECT MAX(season) FROM player_weekly_stats WHERE player_id = ANY(%s)", (player_ids,))
+    return cursor.fetchone()[0]
+
+def source_fingerprint(cursor, player_ids, season):
+    """Hash of every database row the bundle is built from"""
+    cursor.execute("""
+        SELECT md5(COALESCE(string_agg(row_text, '|' ORDER BY row_text), ''))
+        FROM (
+            SELECT w::text AS row_text FROM player_weekly_stats w
+            WHERE w.player_id = ANY(%(ids)s) AND w.season = %(season)s
+            UNION ALL
+            SELECT p::text FROM players p WHERE p.id = ANY(%(ids)s)
+            UNION ALL
+            SELECT concat_ws(',', game_id, home_score, away_score) FROM games WHERE season = %(season)s
+        ) rows
+    """, {'ids': player_ids, 'season': season})
+    return cursor.fetchone()[0]
+
+def load_game_logs(cursor, player_ids, season):
+    """Weekly stats joined to the matching game, most recent week first"""
+    stat_list = ', '.join(f"w.{col}" for col in STAT_COLUMNS)
+    return query_dataframe(cursor, f"""
+        SELECT w.player_id, w.week, w.recent_team, w.opponent_team, {stat_list},
+               g.game_type, g.home_team, g.home_score, g.away_score
+        FROM player_weekly_stats w
+        LEFT JOIN games g
+          ON g.season = w.season AND g.week = w.week
+         AND ((g.home_team = w.recent_team AND g.away_team = w.opponent_team)
+           OR (g.away_team = w.recent_team AND g.home_team = w.opponent_team))
+        WHERE w.player_id = ANY(%s) AND w.season = %s
+        ORDER BY w.player_id, w.week DESC
+    """, (player_ids, season))
+
+def format_game_logs(logs, positions):
+    """Derive the viewer's Week, Matchup and Score columns and keep position stats"""
+    is_home = logs['home_team'] == logs['recent_team']
+    team_score = logs['home_score'].where(is_home, logs['away_score'])
+    opp_score = logs['away_score'].where(is_home, logs['home_score'])
+
+    result = pd.Series('T', index=logs.index)
+    result = result.mask(team_score > opp_score, 'W').mask(team_score < opp_score, 'L')
+    high = pd.concat([team_score, opp_score], axis=1).max(axis=1)
+    low = pd.concat([team_score, opp_score], axis=1).min(axis=1)
+
+    formatted = pd.DataFrame({
+        'player': logs['player_index'],
+        'Week': logs['game_type'].map(PLAYOFF_LABELS).fillna(logs['week']),
+        'Matchup': logs['opponent_team'].where(is_home, '@' + logs['opponent_team']),
+        'Score': (result + ' ' + high.astype('Int64').astype(str) + '-' + low.astype('Int64').astype(str))
+                 .where(team_score.notna())
+    })
+
+    stats = logs[list(STAT_COLUMNS)].rename(columns=STAT_COLUMNS)
+    stats['FPTS (PPR)'] = stats['FPTS (PPR)'].round(1)
+    for col in stats.columns.drop('FPTS (PPR)'):
+        stats[col] = stats[col].round().astype('Int64')
+
+    # Null out stats that do not apply to the player's position
+    for position, columns in POSITION_COLUMNS.items():
+        other = [col for col in stats.columns if col not in columns and col != 'FPTS (PPR)']
+        stats.loc[positions == position, other] = pd.NA
+
+    return pd.concat([formatted, stats], axis=1)
+
+def to_columns(frame):
+    """Column-oriented dict with JSON-ready values (nulls as None)"""
+    frame = frame.astype(object).where(frame.notna(), None)
+    return {col: [value.item() if hasattr(value, 'item') else value for value in frame[col]]
+            for col in frame.columns}
+
+def build_bundle(roster, matched, logs, season):
+    """Assemble the column-oriented bundle"""
+    players = matched[['name', 'slug', 'position', 'team']]
+    return {
+        'format': 'columnar-v1',
+        'league_name': roster.get('league_name'),
+        'season': int(season),
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'players': to_columns(players),
+        'games': to_columns(logs)
+    }
+
+def write_bundle(bundle, output_dir):
+    """Write the hashed bundle files and return their names"""
+    payload = json.dumps(bundle, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    content_hash = hashlib.sha256(payload).hexdigest()[:12]
+    base = f"{BUNDLE_PREFIX}.{content_hash}.json"
+
+    files = {'json': base, 'gzip': f"{base}.gz"}
+    with open(os.path.join(output_dir, base), 'wb') as f:
+        f.write(payload)
+    with open(os.path.join(output_dir, files['gzip']), 'wb') as f:
+        f.write(gzip.compress(payload, compresslevel=9, mtime=0))
+    if brotli is not None:
+        files['brotli'] = f"{base}.br"
+        with open(os.path.join(output_dir, files['brotli']), 'wb') as f:
+            f.write(brotli.compress(payload, quality=11))
+    else:
+        print("  brotli not installed, skipping .br variant")
+
+    sizes = {kind: os.path.getsize(os.path.join(output_dir, name)) for kind, name in files.items()}
+    print("  Wrote " + ', '.join(f"{files[kind]} ({size:,} bytes)" for kind, size in sizes.items()))
+    return content_hash, files
+
+def read_manifest(output_dir):
+    """Previous manifest, or {} on first run"""
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def remove_old_files(output_dir, previous, current_files):
+    """Delete the previous bundle's files once the manifest points at the new ones"""
+    for name in previous.get('files', {}).values():
+        path = os.path.join(output_dir, name)
+        if name not in current_files.values() and os.path.exists(path):
+            os.remove(path)
+
+def export_league_bundle(roster_path=DEFAULT_ROSTER, output_dir=REPO_ROOT, season=None, force=False):
+    """Rebuild the league bundle if its roster or database rows changed"""
+    print(f"Building league bundle from {roster_path}")
+
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        roster, roster_players, roster_hash = load_roster(roster_path)
+        matched = match_players(cursor, roster_players)
+        player_ids = [int(pid) for pid in matched['player_id'].dropna()]
+        season = season or latest_season(cursor, player_ids)
+
+        fingerprint = f"{roster_hash[:16]}-{source_fingerprint(cursor, player_ids, season)}"
+        previous = read_manifest(output_dir)
+        if not force and previous.get('source_fingerprint') == fingerprint:
+            print("  Bundle is up to date")
+            cursor.close()
+            conn.close()
+            return True
+
+        logs = load_game_logs(cursor, player_ids, season)
+        cursor.close()
+        conn.close()
+
+        # Game rows reference players by their position in the players columns
+        index_by_id = {pid: index for index, pid in matched['player_id'].items() if pd.notna(pid)}
+        logs['player_index'] = logs['player_id'].map(index_by_id)
+        positions = logs['player_index'].map(matched['position'])
+        logs = format_game_logs(logs, positions)
+        print(f"  {len(matched)} players, {len(logs)} games for {season}")
+
+        content_hash, files = write_bundle(build_bundle(roster, matched, logs, season), output_dir)
+
+        manifest = {
+            'hash': content_hash,
+            'files': files,
+            'season': int(season),
+            'source_fingerprint': fingerprint,
+            'generated_at': datetime.now().isoformat(timespec='seconds')
+        }
+        with open(os.path.join(output_dir, MANIFEST_NAME), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        remove_old_files(output_dir, previous, files)
+        return True
+
+    except Exception as e:
+        print(f"  Error building league bundle: {e}")
+        return False
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Build the precompressed league bundle for player_stats.html")
+    parser.add_argument('--roster', default=DEFAULT_ROSTER,
+                        help="Roster JSON with a players list (default: web/public/my_team.json)")
+    parser.add_argument('--output-dir', default=REPO_ROOT,
+                        help="Directory served next to player_stats.html (default: repo root)")
+    parser.add_argument('--season', type=int,
+                        help="Season to export (default: latest season with stats)")
+    parser.add_argument('--force', action='store_true',
+                        help="Rebuild even if nothing changed")
+    args = parser.parse_args()
+
+    print("FFAngles League Bundle Export")
+    print("=" * 40)
+    print(f"Started at: {datetime.now()}")
+
+    if export_league_bundle(args.roster, args.output_dir, args.season, args.force):
+        print("\nLeague bundle is ready!")
+    else:
+        print("\nLeague bundle export failed!")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
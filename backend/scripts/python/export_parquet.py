@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Export the core tables to season-partitioned Parquet files for analytics
+
+Each table is streamed out with COPY TO, given dtypes that match its Postgres
+column types and written as one Parquet file per season
+(e.g. parquet/player_weekly_stats/season_2024.parquet). A per-table manifest
+records a fingerprint of every season, so later runs only rewrite seasons
+whose rows changed. Seasons are only fingerprinted when the write counters
+in pg_stat_user_tables (per season partition where the table is
+partitioned) moved since the last export. Load a full history with:
+
+    pd.read_parquet('backend/data/parquet/player_weekly_stats')
+"""
+
+import os
+import sys
+import json
+import argparse
+import pandas as pd
+from datetime import datetime
+
+from bulk_load import query_dataframe
+from db import get_db_connection
+from season_partitions import is_partitioned
+
+PARQUET_DIR = os.getenv(
+    'PARQUET_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'data', 'parquet')
+)
+
+# Table -> season column (None writes the table as a single file)
+EXPORT_TABLES = {
+    'players': None,
+    'games': 'season',
+    'player_seasonal_stats': 'season',
+    'player_weekly_stats': 'season',
+    'player_ngs_passing': 'season',
+    'player_ngs_receiving': 'season',
+    'player_ngs_rushing': 'season'
+}
+
+# Postgres type -> pandas dtype; anything unlisted is kept as a string
+PG_DTYPES = {
+    'smallint': 'Int16',
+    'integer': 'Int32',
+    'bigint': 'Int64',
+    'real': 'float32',
+    'double precision': 'float64',
+    'numeric': 'float64',
+    'boolean': 'boolean',
+    'date': 'datetime64[ns]',
+    'timestamp without time zone': 'datetime64[ns]',
+    'timestamp with time zone': 'datetime64[ns, UTC]'
+}
+
+MANIFEST_NAME = '_manifest.json'
+
+def column_dtypes(cursor, table_name):
+    """Map each column of a table to the pandas dtype it should be exported as"""
+    cursor.execute("""
+        SELECT column_name, data_type
+        FROM information_schema.columns
+        WHERE table_schema = 'public' AND table_name = %s
+        ORDER BY ordinal_position
+    """, (table_name,))
+    return {name: PG_DTYPES.get(data_type, 'string') for name, data_type in cursor.fetchall()}
+
+def apply_dtypes(data, dtypes):
+    """Cast a COPY-loaded frame to the exported dtypes"""
+    for col, dtype in dtypes.items():
+        if col not in data.columns:
+            continue
+        if dtype == 'boolean':
+            # COPY writes booleans as t/f
+            data[col] = data[col].map({'t': True, 'f': False}).astype('boolean')
+        elif dtype.startswith('datetime64'):
+            data[col] = pd.to_datetime(data[col], utc=dtype.endswith('UTC]'))
+        else:
+            data[col] = data[col].astype(dtype)
+    return data
+
+def write_counters(cursor, table_name, season_column):
+    """
+    Cheap change markers from pg_stat_user_tables, no table scan.
+
+    A partitioned table gets one marker per season partition, keyed by
+    season; any other table one marker under None that covers every season.
+    The marker includes the relation id, so a swapped-in partition always
+    looks changed. Statistics are flushed shortly after commit, so a change
+    that lands just before an export is picked up by the next one.
+    """
+    counters = "relid || ':' || n_tup_ins || ':' || n_tup_upd || ':' || n_tup_del"
+    if season_column and is_partitioned(cursor, table_name):
+        cursor.execute(f"""
+            SELECT s.relname, {counters}
+            FROM pg_stat_user_tables s
+            JOIN pg_inherits i ON i.inhrelid = s.relid
+            WHERE i.inhparent = %s::regclass
+        """, (table_name,))
+        prefix = f"{table_name}_"
+        return {
+            relname[len(prefix):]: marker for relname, marker in cursor.fetchall()
+            if relname.startswith(prefix) and relname[len(prefix):].isdigit()
+        }
+
+    cursor.execute(f"SELECT {counters} FROM pg_stat_user_tables WHERE relid = %s::regclass", (table_name,))
+    row = cursor.fetchone()
+    return {None: row[0] if row else None}
+
+def partition_fingerprints(cursor, table_name, season_column, seasons=None):
+    """
+    Fingerprint the seasons of a table (all of them, or only seasons) in one scan.
+
+    The fingerprint is the row count plus the sum of per-row md5 prefixes,
+    so it changes whenever any row is added, removed or edited.
+    """
+    row_hash = "('x' || substr(md5(t::text), 1, 16))::bit(64)::bigint"
+    if season_column:
+        cursor.execute(f"""
+            SELECT {season_column}, COUNT(*), SUM({row_hash})
+            FROM {table_name} t
+            WHERE {season_column} IS NOT NULL
+              AND (%(seasons)s::int[] IS NULL OR {season_column} = ANY(%(seasons)s))
+            GROUP BY {season_column}
+        """, {'seasons': [int(season) for season in seasons] if seasons is not None else None})
+    else:
+        cursor.execute(f"SELECT 'all', COUNT(*), SUM({row_hash}) FROM {table_name} t")
+
+    return {
+        str(partition): f"{count}-{total}"
+        for partition, count, total in cursor.fetchall() if count
+    }
+
+def current_fingerprints(cursor, table_name, season_column, manifest, counters):
+    """
+    Fingerprints of every partition, reusing the manifest's where the write
+    counters show nothing changed
+    """
+    previous = manifest.get('partitions', {})
+    previous_counters = manifest.get('counters', {})
+
+    if None in counters:
+        if counters[None] is not None and previous_counters.get('all') == counters[None]:
+            return dict(previous)
+        return partition_fingerprints(cursor, table_name, season_column)
+
+    stale = [season for season, marker in counters.items() if previous_counters.get(season) != marker]
+    current = {season: fingerprint for season, fingerprint in previous.items()
+               if season in counters and season not in stale}
+    if stale:
+        current.update(partition_fingerprints(cursor, table_name, season_column, stale))
+    return current
+
+def partition_path(table_dir, table_name, partition):
+    """File a table partition is written to"""
+    if partition == 'all':
+        return os.path.join(table_dir, f"{table_name}.parquet")
+    return os.path.join(table_dir, f"season_{partition}.parquet")
+
+def load_manifest(table_dir):
+    """Fingerprints and write counters recorded by the previous export, if any"""
+    path = os.path.join(table_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save_manifest(table_dir, table_name, fingerprints, counters):
+    """Record the fingerprints of the partitions now on disk and the counters they match"""
+    manifest = {
+        'table': table_name,
+        'exported_at': datetime.now().isoformat(),
+        'partitions': fingerprints,
+        'counters': {('all' if key is None else key): marker for key, marker in counters.items()}
+    }
+    with open(os.path.join(table_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+def export_partition(cursor, table_name, season_column, partition, dtypes, path):
+    """Stream one partition out with COPY TO and write it as Parquet"""
+    # Text and boolean columns are read verbatim so ids like "00123" keep their form
+    raw = {col: str for col, dtype in dtypes.items() if dtype in ('string', 'boolean')}
+    if partition == 'all':
+        data = query_dataframe(cursor, f"SELECT * FROM {table_name}", dtype=raw)
+    else:
+        data = query_dataframe(
+            cursor, f"SELECT * FROM {table_name} WHERE {season_column} = %s",
+            (int(partition),), dtype=raw
+        )
+    data = apply_dtypes(data, dtypes)
+
+    # Write a hidden temp file and rename, so readers never see a partial file
+    temp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.tmp")
+    data.to_parquet(temp_path, index=False, engine='pyarrow', compression='zstd')
+    os.replace(temp_path, path)
+    return len(data)
+
+def export_table(cursor, table_name, season_column, output_dir=PARQUET_DIR, force=False):
+    """Export the changed partitions of one table; returns the number rewritten"""
+    table_dir = os.path.join(output_dir, table_name)
+    os.makedirs(table_dir, exist_ok=True)
+
+    manifest = {} if force else load_manifest(table_dir)
+    previous = manifest.get('partitions', {})
+    counters = write_counters(cursor, table_name, season_column)
+    current = current_fingerprints(cursor, table_name, season_column, manifest, counters)
+    dtypes = column_dtypes(cursor, table_name)
+
+    changed = [partition for partition, fingerprint in current.items()
+               if previous.get(partition) != fingerprint]
+
+    for partition in sorted(changed):
+        path = partition_path(table_dir, table_name, partition)
+        row_count = export_partition(cursor, table_name, season_column, partition, dtypes, path)
+        print(f"  {table_name} [{partition}]: wrote {row_count} rows")
+
+    # Partitions that no longer have rows in the database
+    for partition in set(previous) - set(current):
+        path = partition_path(table_dir, table_name, partition)
+        if os.path.exists(path):
+            os.remove(path)
+            print(f"  {table_name} [{partition}]: removed")
+
+    save_manifest(table_dir, table_name, current, counters)
+    print(f"  {table_name}: {len(changed)}/{len(current)} partitions rewritten")
+    return len(changed)
+
+def export_parquet(tables=None, force=False):
+    """Export each table's changed partitions to Parquet"""
+    tables = tables or list(EXPORT_TABLES)
+    print(f"Exporting Parquet to {os.path.abspath(PARQUET_DIR)}")
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    success_count = 0
+
+    for table_name in tables:
+        try:
+            export_table(cursor, table_name, EXPORT_TABLES[table_name], force=force)
+            success_count += 1
+
+        except Exception as e:
+            print(f"  [ERROR] Failed to export {table_name}: {e}")
+            conn.rollback()
+
+    cursor.close()
+    conn.close()
+
+    print(f"Parquet export completed: {success_count}/{len(tables)} tables")
+    return success_count == len(tables)
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Export core tables to season-partitioned Parquet")
+    parser.add_argument('--tables', nargs='+', choices=list(EXPORT_TABLES),
+                        help="Tables to export (default: all)")
+    parser.add_argument('--force', action='store_true',
+                        help="Rewrite every partition, ignoring the manifests")
+    args = parser.parse_args()
+
+    print("FFAngles Parquet Export")
+    print("=" * 40)
+    print(f"Started at: {datetime.now()}")
+
+    if export_parquet(args.tables, args.force):
+        print("\nParquet export completed successfully!")
+    else:
+        print("\nSome tables failed to export. Check the logs above.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
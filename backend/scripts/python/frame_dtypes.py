@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+DataFrame dtype downcasting for the large nfl_data_py imports
+"""
+
+import pandas as pd
+
+# Low-cardinality text columns of the nfl_data_py stats frames
+STAT_CATEGORICAL_COLUMNS = [
+    'recent_team', 'opponent_team', 'team_abbr',
+    'position', 'player_position', 'season_type'
+]
+
+# Whole-number columns nfl_data_py delivers as floats
+STAT_COUNT_COLUMNS = [
+    'season', 'week', 'games', 'completions', 'attempts', 'passing_tds',
+    'interceptions', 'sacks', 'sack_fumbles', 'sack_fumbles_lost',
+    'passing_2pt_conversions', 'carries', 'rushing_tds', 'rushing_fumbles',
+    'rushing_fumbles_lost', 'rushing_2pt_conversions', 'receptions', 'targets',
+    'receiving_tds', 'receiving_fumbles', 'receiving_fumbles_lost',
+    'receiving_2pt_conversions', 'special_teams_tds', 'pass_touchdowns',
+    'rec_touchdowns', 'rush_attempts', 'rush_touchdowns', 'player_jersey_number'
+]
+
+# Peak memory of preparing and loading a stats frame, as a multiple of the
+# downcast frame (prepared copy, player id merge, validation masks, COPY buffer)
+LOAD_WORKING_SET = 4
+
+def downcast_frame(data, categorical_columns=(), count_columns=(), floats=True):
+    """
+    Shrink a DataFrame in place to the smallest dtypes that hold its values.
+
+    Floats become float32 (unless floats=False), integers and whole-number
+    count columns the smallest int type, and the listed low-cardinality text
+    columns become categoricals. Returns the frame.
+    """
+    for col in data.columns:
+        series = data[col]
+        if col in categorical_columns:
+            data[col] = series.astype('category')
+        elif pd.api.types.is_bool_dtype(series):
+            continue
+        elif pd.api.types.is_float_dtype(series):
+            if col in count_columns and (series.dropna() % 1 == 0).all():
+                data[col] = pd.to_numeric(series.astype('Int64'), downcast='integer')
+            elif floats:
+                data[col] = pd.to_numeric(series, downcast='float')
+        elif pd.api.types.is_integer_dtype(series):
+            data[col] = pd.to_numeric(series, downcast='integer')
+    return data
+
+def frame_memory_mb(data):
+    """Deep memory usage of a DataFrame in megabytes"""
+    return data.memory_usage(deep=True).sum() / (1024 * 1024)
+
+def budgeted_season_chunks(seasons, fetch_seasons, budget_mb=None, working_set=LOAD_WORKING_SET):
+    """
+    Fetch seasons in chunks that fit a memory budget, yielding (seasons, frame).
+
+    The first season is fetched alone to measure its footprint; each later
+    chunk holds as many seasons as fit in budget_mb once the working copies
+    made while loading are counted. Without a budget every season is fetched
+    in a single chunk.
+    """
+    seasons = list(seasons)
+    if not budget_mb:
+        yield seasons, fetch_seasons(seasons)
+        return
+
+    chunk_size = 1
+    season_mb = 0
+    position = 0
+
+    while position < len(seasons):
+        chunk = seasons[position:position + chunk_size]
+        data = fetch_seasons(chunk)
+
+        # Later seasons have more players, so size by the largest seen so far
+        season_mb = max(season_mb, frame_memory_mb(data) * working_set / len(chunk))
+        print(f"  Seasons {chunk[0]}-{chunk[-1]}: {frame_memory_mb(data):.1f} MB in memory "
+              f"(budget {budget_mb} MB)")
+
+        yield chunk, data
+        del data
+
+        position += len(chunk)
+        chunk_size = max(1, int(budget_mb // max(season_mb, 1)))
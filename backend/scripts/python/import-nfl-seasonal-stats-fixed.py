@@ -3,35 +3,12 @@
 Import NFL seasonal player statistics from nfl_data_py with proper foreign key relationships
 """
 
-import os
 import sys
-import psycopg2
-import psycopg2.extras
 import nfl_data_py as nfl
 import pandas as pd
 from datetime import datetime
-from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
-
-# Database connection configuration
-DB_CONFIG = {
-    'host': os.getenv('DB_HOST', 'localhost'),
-    'database': os.getenv('DB_NAME', 'ff_angles'),
-    'user': os.getenv('DB_USER', 'postgres'),
-    'password': os.getenv('DB_PASSWORD', 'password'),
-    'port': os.getenv('DB_PORT', '5432')
-}
-
-def get_db_connection():
-    """Create database connection"""
-    try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        return conn
-    except Exception as e:
-        print(f"Error connecting to database: {e}")
-        sys.exit(1)
+from db import get_db_connection
 
 def import_seasonal_stats(years=[2024], season_type='REG'):
     """Import seasonal player statistics with proper foreign key relationships"""
@@ -3,33 +3,11 @@
 Import NFL weekly player stats from nfl_data_py for trends analysis
 """
 
-import os
 import sys
-import psycopg2
 import nfl_data_py as nfl
 import pandas as pd
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
-
-# Database connection configuration
-DB_CONFIG = {
-    'host': os.getenv('DB_HOST', 'localhost'),
-    'database': os.getenv('DB_NAME', 'ff_angles'),
-    'user': os.getenv('DB_USER', 'postgres'),
-    'password': os.getenv('DB_PASSWORD', 'password'),
-    'port': os.getenv('DB_PORT', '5432')
-}
-
-def get_db_connection():
-    """Create database connection"""
-    try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        return conn
-    except Exception as e:
-        print(f"Error connecting to database: {e}")
-        sys.exit(1)
+from db import get_db_connection
 
 def import_weekly_stats(years=[2024]):
     """Import weekly player stats from nfl_data_py"""
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Import play-by-play data from nfl_data_py one season at a time
+
+Each season is downloaded with only the configured PBP_COLUMNS, downcast to
+compact dtypes, COPY-loaded into a staging table and swapped in as that
+season's pbp_plays partition. Only one season is ever held in memory, so peak
+memory stays flat no matter how many seasons are requested.
+"""
+
+import sys
+import gc
+import argparse
+import nfl_data_py as nfl
+import pandas as pd
+from datetime import datetime
+
+from bulk_load import copy_dataframe, upsert_dataframe
+from change_log import new_change_set, publish_changes
+from db import get_db_connection
+from frame_dtypes import downcast_frame, frame_memory_mb
+from season_partitions import create_staging_partition, swap_season_partition
+
+# Columns kept from the ~380 in nflverse play-by-play
+PBP_COLUMNS = [
+    'play_id', 'game_id', 'season', 'week', 'season_type', 'game_date',
+    'home_team', 'away_team', 'posteam', 'defteam',
+    'qtr', 'down', 'ydstogo', 'yardline_100', 'game_seconds_remaining',
+    'play_type', 'yards_gained', 'shotgun', 'no_huddle',
+    'qb_dropback', 'qb_scramble', 'pass', 'rush', 'complete_pass',
+    'incomplete_pass', 'interception', 'sack', 'touchdown', 'pass_touchdown',
+    'rush_touchdown', 'fumble_lost', 'first_down', 'penalty',
+    'air_yards', 'yards_after_catch', 'epa', 'qb_epa', 'wpa', 'success',
+    'cpoe', 'xpass', 'pass_oe',
+    'passer_player_id', 'rusher_player_id', 'receiver_player_id'
+]
+
+# Low-cardinality text columns stored as categoricals while in memory
+PBP_CATEGORICAL_COLUMNS = [
+    'game_id', 'season_type', 'home_team', 'away_team', 'posteam', 'defteam',
+    'play_type', 'passer_player_id', 'rusher_player_id', 'receiver_player_id'
+]
+
+COPY_CHUNK_ROWS = 10000
+
+# updated_at always moves, so it does not make a game count as changed
+FINGERPRINT_COMPARE_COLUMNS = ['season', 'week', 'play_count', 'fingerprint']
+
+def create_pbp_table(cursor):
+    """Create the season-partitioned play-by-play table if needed"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS pbp_plays (
+            play_id INTEGER NOT NULL,
+            game_id VARCHAR(20) NOT NULL,
+            season SMALLINT NOT NULL,
+            week SMALLINT,
+            season_type VARCHAR(4),
+            game_date DATE,
+            home_team VARCHAR(3),
+            away_team VARCHAR(3),
+            posteam VARCHAR(3),
+            defteam VARCHAR(3),
+            qtr SMALLINT,
+            down SMALLINT,
+            ydstogo SMALLINT,
+            yardline_100 SMALLINT,
+            game_seconds_remaining SMALLINT,
+            play_type VARCHAR(12),
+            yards_gained SMALLINT,
+            shotgun BOOLEAN,
+            no_huddle BOOLEAN,
+            qb_dropback BOOLEAN,
+            qb_scramble BOOLEAN,
+            pass BOOLEAN,
+            rush BOOLEAN,
+            complete_pass BOOLEAN,
+            incomplete_pass BOOLEAN,
+            interception BOOLEAN,
+            sack BOOLEAN,
+            touchdown BOOLEAN,
+            pass_touchdown BOOLEAN,
+            rush_touchdown BOOLEAN,
+            fumble_lost BOOLEAN,
+            first_down BOOLEAN,
+            penalty BOOLEAN,
+            air_yards SMALLINT,
+            yards_after_catch SMALLINT,
+            epa REAL,
+            qb_epa REAL,
+            wpa REAL,
+            success BOOLEAN,
+            cpoe REAL,
+            xpass REAL,
+            pass_oe REAL,
+            passer_player_id VARCHAR(12),
+            rusher_player_id VARCHAR(12),
+            receiver_player_id VARCHAR(12),
+            PRIMARY KEY (season, game_id, play_id)
+        ) PARTITION BY LIST (season);
+
+        CREATE INDEX IF NOT EXISTS idx_pbp_plays_game ON pbp_plays(game_id);
+        CREATE INDEX IF NOT EXISTS idx_pbp_plays_posteam ON pbp_plays(season, week, posteam);
+
+        CREATE TABLE IF NOT EXISTS pbp_game_fingerprints (
+            game_id VARCHAR(20) PRIMARY KEY,
+            season SMALLINT NOT NULL,
+            week SMALLINT,
+            play_count INTEGER NOT NULL,
+            fingerprint VARCHAR(16) NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+
+def fetch_pbp_season(season, columns=PBP_COLUMNS):
+    """Download a single season of play-by-play with only the wanted columns"""
+    pbp = nfl.import_pbp_data(
+        [season],
+        columns=list(columns),
+        include_participation=False,
+        downcast=True
+    )
+    pbp = pbp.drop(columns=[col for col in pbp.columns if col not in columns])
+    return downcast_frame(pbp, PBP_CATEGORICAL_COLUMNS)
+
+def game_fingerprints(pbp):
+    """
+    Hash every game's plays so downstream stages can tell which games changed.
+
+    The fingerprint is the wrapped sum of per-row hashes, so it does not
+    depend on row order.
+    """
+    row_hashes = pd.util.hash_pandas_object(pbp, index=False)
+    game_ids = pbp['game_id'].astype(str)
+
+    fingerprints = row_hashes.groupby(game_ids).sum()
+    games = pbp.groupby(game_ids, observed=True).agg(
+        season=('season', 'first'),
+        week=('week', 'first'),
+        play_count=('play_id', 'size')
+    )
+    games['fingerprint'] = fingerprints.map(lambda value: format(int(value), '016x'))
+    games['updated_at'] = pd.Timestamp.now()
+    return games.rename_axis('game_id').reset_index()
+
+def load_pbp_season(cursor, season, pbp, changes=None):
+    """Load one season into a staging table and swap it in as the partition"""
+    staging = create_staging_partition(cursor, 'pbp_plays', season)
+    copy_dataframe(cursor, pbp, staging, list(pbp.columns), chunk_size=COPY_CHUNK_ROWS)
+    partition = swap_season_partition(cursor, 'pbp_plays', season)
+
+    # Only games whose fingerprint moved count as changed
+    upsert_dataframe(
+        cursor, game_fingerprints(pbp), 'pbp_game_fingerprints', ['game_id'],
+        changes=changes, compare_columns=FINGERPRINT_COMPARE_COLUMNS
+    )
+    return partition
+
+def import_pbp_seasons(seasons):
+    """Import play-by-play for each season, committing season by season"""
+    print(f"Importing play-by-play data for seasons: {seasons}")
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    create_pbp_table(cursor)
+    conn.commit()
+
+    success_count = 0
+
+    for season in seasons:
+        try:
+            print(f"\n  Fetching {season} play-by-play...")
+            pbp = fetch_pbp_season(season)
+            print(f"  Retrieved {len(pbp)} plays x {len(pbp.columns)} columns "
+                  f"({frame_memory_mb(pbp):.1f} MB in memory)")
+
+            if len(pbp) == 0:
+                print(f"  No play-by-play data for {season}")
+                success_count += 1
+                continue
+
+            changes = new_change_set()
+            partition = load_pbp_season(cursor, season, pbp, changes)
+            publish_changes(cursor, 'pbp', changes)
+            conn.commit()
+            print(f"  [SUCCESS] Loaded {len(pbp)} plays into {partition}")
+            success_count += 1
+
+        except Exception as e:
+            print(f"  [ERROR] Failed to import {season} play-by-play: {e}")
+            conn.rollback()
+
+        finally:
+            # Release the season before fetching the next one
+            pbp = None
+            gc.collect()
+
+    cursor.close()
+    conn.close()
+
+    print(f"\nPlay-by-play import completed: {success_count}/{len(seasons)} seasons")
+    return success_count == len(seasons)
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Import nflverse play-by-play by season")
+    parser.add_argument('--seasons', type=int, nargs='+', default=[2025],
+                        help="Seasons to import (default: 2025)")
+    args = parser.parse_args()
+
+    print("FFAngles Play-by-Play Import")
+    print("=" * 40)
+    print(f"Started at: {datetime.now()}")
+
+    if import_pbp_seasons(args.seasons):
+        print("\nPlay-by-play imported successfully!")
+    else:
+        print("\nSome seasons failed. Check the logs above.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Import per-game snap counts from nfl_data_py and the Tank01 boxscores
+
+nflverse snap counts (keyed by PFR id) are the primary source; Tank01
+boxscore snapCounts (keyed by ESPN id) fill in players and games nflverse has
+not published yet. Both are mapped to players.id and games.game_id, merged per
+(player, game) and bulk-loaded week by week into player_snap_counts with the
+offensive snap share already computed.
+"""
+
+import os
+import re
+import sys
+import glob
+import json
+import argparse
+import nfl_data_py as nfl
+import pandas as pd
+from datetime import datetime
+
+from bulk_load import copy_dataframe, query_dataframe
+from change_log import new_change_set, publish_changes, record_frame_changes
+from db import get_db_connection
+
+# Tank01 boxscore JSON files (boxscore-YYYYMMDD-AWAY-HOME.json)
+BOXSCORE_DIR = os.getenv(
+    'BOXSCORE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'data')
+)
+
+# Tank01 abbreviations that differ from nflverse
+TANK01_TEAM_ALIASES = {'WSH': 'WAS', 'LAR': 'LA'}
+
+# Tank01 snapCounts field -> player_snap_counts column
+TANK01_SNAP_FIELDS = {
+    'offSnap': 'offense_snaps',
+    'offSnapPct': 'offense_pct',
+    'defSnap': 'defense_snaps',
+    'defSnapPct': 'defense_pct',
+    'stSnap': 'st_snaps',
+    'stSnapPct': 'st_pct'
+}
+
+SNAP_COLUMNS = [
+    'player_id', 'game_id', 'season', 'week', 'team',
+    'offense_snaps', 'offense_pct', 'defense_snaps', 'defense_pct',
+    'st_snaps', 'st_pct', 'team_offense_snaps', 'snap_share', 'source'
+]
+
+def create_snap_table(cursor):
+    """Create the snap count table if it does not exist"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS player_snap_counts (
+            player_id INTEGER NOT NULL,
+            game_id VARCHAR(50) NOT NULL,
+            season SMALLINT NOT NULL,
+            week SMALLINT NOT NULL,
+            team VARCHAR(5),
+            offense_snaps SMALLINT,
+            offense_pct REAL,
+            defense_snaps SMALLINT,
+            defense_pct REAL,
+            st_snaps SMALLINT,
+            st_pct REAL,
+            team_offense_snaps SMALLINT,
+            snap_share REAL,
+            source VARCHAR(10) NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (game_id, player_id)
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_player_snap_counts_week
+            ON player_snap_counts(season, week);
+        CREATE INDEX IF NOT EXISTS idx_player_snap_counts_player
+            ON player_snap_counts(player_id, season, week);
+        CREATE INDEX IF NOT EXISTS idx_player_snap_counts_share
+            ON player_snap_counts(season, week, snap_share);
+    """)
+
+def season_for_date(game_date):
+    """NFL season a game date belongs to (January/February games count for the prior year)"""
+    return game_date.year if game_date.month >= 3 else game_date.year - 1
+
+def fetch_nflverse_snaps(season):
+    """nflverse snap counts for one season, keyed by PFR id and game_id"""
+    snaps = nfl.import_snap_counts([season])
+    snaps = snaps[[
+        'game_id', 'season', 'week', 'pfr_player_id', 'team',
+        'offense_snaps', 'offense_pct', 'defense_snaps', 'defense_pct',
+        'st_snaps', 'st_pct'
+    ]].copy()
+    snaps['source'] = 'nflverse'
+    return snaps
+
+def fetch_tank01_snaps(season, boxscore_dir=BOXSCORE_DIR):
+    """Tank01 boxscore snap counts for one season, keyed by ESPN id and game date/teams"""
+    rows = []
+    pattern = re.compile(r'boxscore-(\d{8})-([A-Z]+)-([A-Z]+)\.json$')
+
+    for path in sorted(glob.glob(os.path.join(boxscore_dir, 'boxscore-*.json'))):
+        match = pattern.search(os.path.basename(path))
+        if not match:
+            continue
+        game_date = datetime.strptime(match.group(1), '%Y%m%d').date()
+        if season_for_date(game_date) != season:
+            continue
+
+        with open(path) as f:
+            boxscore = json.load(f)
+
+        for player in boxscore.get('playerStats', {}).values():
+            snap_counts = player.get('snapCounts')
+            if not snap_counts:
+                continue
+            row = {
+                'espn_id': str(player.get('playerID')),
+                'gameday': game_date,
+                'away_team': match.group(2),
+                'home_team': match.group(3),
+                'team': player.get('teamAbv')
+            }
+            for field, column in TANK01_SNAP_FIELDS.items():
+                row[column] = snap_counts.get(field)
+            rows.append(row)
+
+    snaps = pd.DataFrame(rows)
+    if len(snaps) == 0:
+        return snaps
+
+    for column in ('away_team', 'home_team', 'team'):
+        snaps[column] = snaps[column].replace(TANK01_TEAM_ALIASES)
+    for column in TANK01_SNAP_FIELDS.values():
+        snaps[column] = pd.to_numeric(snaps[column], errors='coerce')
+    snaps['gameday'] = pd.to_datetime(snaps['gameday'])
+    snaps['source'] = 'tank01'
+    return snaps
+
+def load_id_maps(cursor, season):
+    """Player and game lookup frames for mapping both sources"""
+    players = query_dataframe(cursor, """
+        SELECT id AS player_id, pfr_id, espn_id FROM players
+    """)
+    players['pfr_id'] = players['pfr_id'].astype('string')
+    players['espn_id'] = players['espn_id'].astype('string')
+
+    games = query_dataframe(cursor, """
+        SELECT game_id, season, week, gameday, away_team, home_team
+        FROM games WHERE season = %s
+    """, (season,))
+    games['gameday'] = pd.to_datetime(games['gameday'])
+    return players, games
+
+def map_snaps(nflverse, tank01, players, games):
+    """Attach players.id to both sources and game_id/week to the Tank01 rows"""
+    mapped = []
+
+    if len(nflverse) > 0:
+        pfr_ids = players.dropna(subset=['pfr_id'])[['player_id', 'pfr_id']]
+        nflverse = nflverse.astype({'pfr_player_id': 'string'}).merge(
+            pfr_ids, left_on='pfr_player_id', right_on='pfr_id', how='inner'
+        )
+        mapped.append(nflverse.drop(columns=['pfr_player_id', 'pfr_id']))
+
+    if len(tank01) > 0:
+        espn_ids = players.dropna(subset=['espn_id'])[['player_id', 'espn_id']]
+        tank01 = tank01.astype({'espn_id': 'string'}).merge(espn_ids, on='espn_id', how='inner')
+        tank01 = tank01.merge(games, on=['gameday', 'away_team', 'home_team'], how='inner')
+        mapped.append(tank01.drop(columns=['espn_id', 'gameday', 'away_team', 'home_team']))
+
+    if not mapped:
+        return pd.DataFrame(columns=SNAP_COLUMNS)
+    return pd.concat(mapped, ignore_index=True)
+
+def merge_sources(snaps):
+    """
+    Collapse both sources to one row per (player, game).
+
+    Rows are ordered nflverse first, so groupby().first() keeps every nflverse
+    value and only takes Tank01 values for fields nflverse left empty.
+    """
+    snaps = snaps.assign(source_order=(snaps['source'] != 'nflverse').astype(int))
+    snaps = snaps.sort_values('source_order', kind='stable').drop(columns=['source_order'])
+    return snaps.groupby(['game_id', 'player_id'], as_index=False, sort=False).first()
+
+def add_snap_share(snaps):
+    """Derive each team's offensive snaps per game and every player's share of them"""
+    # snaps / pct recovers the team total; the median across players smooths rounding
+    implied_total = snaps['offense_snaps'] / snaps['offense_pct'].where(snaps['offense_pct'] > 0)
+    team_totals = implied_total.groupby([snaps['game_id'], snaps['team']]).transform('median')
+    fallback = snaps.groupby(['game_id', 'team'])['offense_snaps'].transform('max')
+
+    snaps['team_offense_snaps'] = team_totals.fillna(fallback).round()
+    snaps['snap_share'] = (
+        snaps['offense_snaps'] / snaps['team_offense_snaps'].where(snaps['team_offense_snaps'] > 0)
+    ).clip(upper=1).round(4)
+    return snaps
+
+def weeks_to_load(cursor, season, snaps, full_refresh=False):
+    """Weeks that are new or may still be changing since the last run"""
+    available = sorted(int(week) for week in snaps['week'].dropna().unique())
+    if full_refresh:
+        return available
+
+    cursor.execute("""
+        SELECT week, COUNT(*) FROM player_snap_counts WHERE season = %s GROUP BY week
+    """, (season,))
+    stored = dict(cursor.fetchall())
+    latest = max(stored) if stored else None
+    incoming = snaps.groupby('week').size()
+
+    # Reload missing weeks, the latest stored week and any week whose row count moved
+    return [
+        week for week in available
+        if week not in stored or week >= latest or stored[week] != incoming.get(week, 0)
+    ]
+
+def import_season_snaps(cursor, season, full_refresh=False, changes=None):
+    """Fetch, merge and load one season; returns the number of rows stored"""
+    print(f"\n  Fetching {season} snap counts...")
+    try:
+        nflverse = fetch_nflverse_snaps(season)
+    except Exception as e:
+        print(f"  nflverse snap counts unavailable for {season}: {e}")
+        nflverse = pd.DataFrame()
+    tank01 = fetch_tank01_snaps(season)
+    print(f"  Retrieved {len(nflverse)} nflverse and {len(tank01)} Tank01 rows")
+
+    players, games = load_id_maps(cursor, season)
+    snaps = map_snaps(nflverse, tank01, players, games)
+    if len(snaps) == 0:
+        print(f"  No snap counts mapped for {season}")
+        return 0
+
+    snaps = add_snap_share(merge_sources(snaps))
+    snaps = snaps[snaps['season'] == season]
+
+    weeks = weeks_to_load(cursor, season, snaps, full_refresh)
+    if not weeks:
+        print(f"  Snap counts for {season} are up to date")
+        return 0
+
+    snaps = snaps[snaps['week'].isin(weeks)]
+    cursor.execute(
+        "DELETE FROM player_snap_counts WHERE season = %s AND week = ANY(%s)",
+        (season, weeks)
+    )
+    copy_dataframe(cursor, snaps, 'player_snap_counts', SNAP_COLUMNS)
+    if changes is not None:
+        record_frame_changes(changes, 'player_snap_counts', snaps)
+    print(f"  Loaded {len(snaps)} player-games for weeks {weeks}")
+    return len(snaps)
+
+def import_snap_counts(seasons, full_refresh=False):
+    """Import snap counts for each season, committing season by season"""
+    print(f"Importing snap counts for seasons: {seasons}")
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    create_snap_table(cursor)
+    conn.commit()
+
+    success_count = 0
+
+    for season in seasons:
+        try:
+            changes = new_change_set()
+            import_season_snaps(cursor, season, full_refresh, changes)
+            publish_changes(cursor, 'snap_counts', changes)
+            conn.commit()
+            success_count += 1
+
+        except Exception as e:
+            print(f"  [ERROR] Failed to import {season} snap counts: {e}")
+            conn.rollback()
+
+    cursor.close()
+    conn.close()
+
+    print(f"\nSnap count import completed: {success_count}/{len(seasons)} seasons")
+    return success_count == len(seasons)
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Import snap counts from nflverse and Tank01 boxscores")
+    parser.add_argument('--seasons', type=int, nargs='+', default=[2025],
+                        help="Seasons to import (default: 2025)")
+    parser.add_argument('--full-refresh', action='store_true',
+                        help="Reload every week instead of only new or changed weeks")
+    args = parser.parse_args()
+
+    print("FFAngles Snap Count Import")
+    print("=" * 40)
+    print(f"Started at: {datetime.now()}")
+
+    if import_snap_counts(args.seasons, args.full_refresh):
+        print("\nSnap counts imported successfully!")
+    else:
+        print("\nSome seasons failed. Check the logs above.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
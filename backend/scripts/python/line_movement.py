@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Append-only line history and line-movement alerts for game lines and props
+
+The loaders overwrite lines in place (update_games refreshes spread_line,
+total_line and the moneylines each night; import-player-props.js upserts one
+row per bookmaker), so every observed line is also streamed through
+process_snapshots here:
+
+- line_history gets a row only when a market's line or price differs from
+  its previous observation, so repeated polls of an unchanged line cost
+  nothing;
+- line_movement_alerts flags a 'step' when a single change moves at least
+  the market's threshold and a 'drift' when the move from the opening line
+  first reaches it;
+- line_summary keeps the open, current and (once the game kicks off) closing
+  line plus the low, high and number of moves per market, updated from each
+  batch, so summaries never rescan the history.
+
+A market is (game_id, player_id, market, bookmaker); game lines use
+player_id 0 and bookmaker 'nflverse'. Observations at or after kickoff are
+live lines and are ignored. Each batch is published to the change log.
+"""
+
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+from bulk_load import copy_dataframe, query_dataframe, upsert_dataframe
+from change_log import new_change_set, publish_changes, record_frame_changes
+from db import get_db_connection
+from odds_processing import american_to_decimal, implied_probability, load_stored_prices
+from prop_hit_rates import PROPS_TABLE, props_table_exists
+
+LINE_KEYS = ['game_id', 'player_id', 'market', 'bookmaker']
+
+GAME_LINE_SOURCE = 'nflverse'
+
+# Game line market -> (games line column, games price column)
+GAME_LINE_MARKETS = {
+    'spread': ('spread_line', 'home_spread_odds'),
+    'total': ('total_line', 'over_odds'),
+    'moneyline': ('home_moneyline', 'away_moneyline')
+}
+
+# Markets whose line is itself American odds; their moves are measured in implied probability
+PRICE_MARKETS = {'moneyline'}
+
+# Smallest move flagged per market, in points (implied probability for PRICE_MARKETS)
+MOVE_THRESHOLDS = {
+    'spread': 1.0,
+    'total': 1.0,
+    'moneyline': 0.03,
+    'player_pass_yds': 10.0,
+    'player_rush_yds': 5.0,
+    'player_reception_yds': 5.0
+}
+DEFAULT_THRESHOLD = 5.0
+
+# Kickoff of a games row; gametime is US Eastern
+KICKOFF_SQL = "((g.gameday + COALESCE(g.gametime, TIME '13:00')) AT TIME ZONE 'America/New_York')"
+
+SUMMARY_COLUMNS = LINE_KEYS + [
+    'open_line', 'open_price', 'opened_at', 'current_line', 'current_price', 'current_at',
+    'low_line', 'high_line', 'moves'
+]
+
+ALERT_COLUMNS = LINE_KEYS + ['alert', 'open_line', 'from_line', 'to_line', 'move', 'observed_at']
+
+def create_line_tables(cursor):
+    """Create the line history, summary, alert and stream state tables if they do not exist"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS line_history (
+            id BIGSERIAL PRIMARY KEY,
+            game_id VARCHAR(50) NOT NULL,
+            player_id INTEGER NOT NULL,
+            market VARCHAR(40) NOT NULL,
+            bookmaker VARCHAR(40) NOT NULL,
+            line REAL NOT NULL,
+            price REAL,
+            observed_at TIMESTAMPTZ NOT NULL,
+            recorded_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_line_history_market
+            ON line_history(game_id, player_id, market, bookmaker, observed_at);
+
+        CREATE TABLE IF NOT EXISTS line_summary (
+            game_id VARCHAR(50) NOT NULL,
+            player_id INTEGER NOT NULL,
+            market VARCHAR(40) NOT NULL,
+            bookmaker VARCHAR(40) NOT NULL,
+            open_line REAL NOT NULL,
+            open_price REAL,
+            opened_at TIMESTAMPTZ NOT NULL,
+            current_line REAL NOT NULL,
+            current_price REAL,
+            current_at TIMESTAMPTZ NOT NULL,
+            close_line REAL,
+            close_price REAL,
+            closed_at TIMESTAMPTZ,
+            low_line REAL NOT NULL,
+            high_line REAL NOT NULL,
+            moves INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (game_id, player_id, market, bookmaker)
+        );
+
+        CREATE TABLE IF NOT EXISTS line_movement_alerts (
+            id BIGSERIAL PRIMARY KEY,
+            game_id VARCHAR(50) NOT NULL,
+            player_id INTEGER NOT NULL,
+            market VARCHAR(40) NOT NULL,
+            bookmaker VARCHAR(40) NOT NULL,
+            alert VARCHAR(10) NOT NULL,
+            open_line REAL NOT NULL,
+            from_line REAL NOT NULL,
+            to_line REAL NOT NULL,
+            move REAL NOT NULL,
+            observed_at TIMESTAMPTZ NOT NULL,
+            created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_line_movement_alerts_created
+            ON line_movement_alerts(created_at);
+
+        CREATE TABLE IF NOT EXISTS line_stream_state (
+            stream VARCHAR(40) PRIMARY KEY,
+            watermark TIMESTAMP NOT NULL
+        );
+    """)
+
+def load_kickoffs(cursor, game_ids):
+    """Kickoff time (UTC) of each game"""
+    kickoffs = query_dataframe(cursor, f"""
+        SELECT g.game_id, {KICKOFF_SQL} AS kickoff
+        FROM games g
+        WHERE g.game_id = ANY(%s)
+    """, (list(game_ids),), dtype={'game_id': str})
+    kickoffs['kickoff'] = pd.to_datetime(kickoffs['kickoff'], utc=True)
+    return kickoffs
+
+def load_summaries(cursor, game_ids):
+    """Current line_summary rows of the games, by primary key"""
+    summary = query_dataframe(cursor, f"""
+        SELECT {', '.join(SUMMARY_COLUMNS)}
+        FROM line_summary
+        WHERE game_id = ANY(%s)
+    """, (list(game_ids),), dtype={'game_id': str, 'market': str, 'bookmaker': str})
+    for col in ('opened_at', 'current_at'):
+        summary[col] = pd.to_datetime(summary[col], utc=True)
+    return summary
+
+def same_value(a, b):
+    """Elementwise equality that treats two missing values as equal"""
+    return (a == b) | (a.isna() & b.isna())
+
+def line_level(market, line):
+    """Line on the scale its moves are measured on (implied probability for PRICE_MARKETS)"""
+    probability = implied_probability(american_to_decimal(line))
+    return np.where(market.isin(PRICE_MARKETS), probability, line)
+
+def detect_moves(snapshots, summary):
+    """
+    Changed observations, alerts and updated summaries for a batch of snapshots.
+
+    snapshots has LINE_KEYS, line, price and a UTC observed_at; summary is
+    the stored line_summary of the markets (see load_summaries). Returns
+    (history rows, alerts, summary rows to upsert). Observations no newer
+    than a market's current line are dropped as already seen.
+    """
+    snaps = snapshots.merge(summary, on=LINE_KEYS, how='left').sort_values(LINE_KEYS + ['observed_at'])
+    snaps = snaps[snaps['current_at'].isna() | (snaps['observed_at'] > snaps['current_at'])].copy()
+
+    # An observation is a change when it differs from the one before it (or the stored current line)
+    by = snaps.groupby(LINE_KEYS, sort=False)
+    snaps['from_line'] = by['line'].shift().fillna(snaps['current_line'])
+    from_price = by['price'].shift().where(by.cumcount() > 0, snaps['current_price'])
+    changed = ~(same_value(snaps['line'], snaps['from_line']) & same_value(snaps['price'], from_price))
+    history = snaps[changed].copy()
+
+    # Markets seen for the first time open at their first observation
+    first = history.groupby(LINE_KEYS, sort=False)
+    new_market = history['current_at'].isna()
+    for col, source in (('open_line', 'line'), ('open_price', 'price'), ('opened_at', 'observed_at')):
+        history[col] = history[col].where(~new_market, first[source].transform('first'))
+
+    threshold = history['market'].map(MOVE_THRESHOLDS).fillna(DEFAULT_THRESHOLD).to_numpy()
+    level = line_level(history['market'], history['line'])
+    from_level = line_level(history['market'], history['from_line'])
+    open_level = line_level(history['market'], history['open_line'])
+    with np.errstate(invalid='ignore'):
+        step = np.abs(level - from_level) >= threshold
+        drift = (np.abs(from_level - open_level) < threshold) & (np.abs(level - open_level) >= threshold)
+    history['alert'] = np.where(step, 'step', np.where(drift, 'drift', None))
+    history['move'] = history['line'] - history['from_line']
+    alerts = history[history['alert'].notna()].rename(columns={'line': 'to_line'})[ALERT_COLUMNS]
+
+    # Fold the batch into each market's summary
+    batch = history.groupby(LINE_KEYS, sort=False).agg(
+        open_line=('open_line', 'first'), open_price=('open_price', 'first'),
+        opened_at=('opened_at', 'first'),
+        current_line=('line', 'last'), current_price=('price', 'last'), current_at=('observed_at', 'last'),
+        batch_low=('line', 'min'), batch_high=('line', 'max'),
+        low_line=('low_line', 'first'), high_line=('high_line', 'first'),
+        moves=('moves', 'first'), batch_moves=('from_line', 'count')
+    )
+    batch['low_line'] = batch[['low_line', 'batch_low']].min(axis=1)
+    batch['high_line'] = batch[['high_line', 'batch_high']].max(axis=1)
+    batch['moves'] = (batch['moves'].fillna(0) + batch['batch_moves']).astype(int)
+    updated = batch.reset_index()[SUMMARY_COLUMNS]
+
+    return history[LINE_KEYS + ['line', 'price', 'observed_at']], alerts, updated
+
+def process_snapshots(cursor, snapshots, stage):
+    """
+    Stream a batch of observed lines into the history, alerts and summaries.
+
+    snapshots has LINE_KEYS, line, price and observed_at. Lines of unknown
+    games and lines observed after kickoff are skipped. The batch is
+    published to the change log as stage. Returns the alerts frame.
+    """
+    create_line_tables(cursor)
+    snapshots = snapshots.dropna(subset=['line']).copy()
+    snapshots['observed_at'] = pd.to_datetime(snapshots['observed_at'], utc=True)
+    if len(snapshots) == 0:
+        return pd.DataFrame(columns=ALERT_COLUMNS)
+
+    game_ids = snapshots['game_id'].unique().tolist()
+    snapshots = snapshots.merge(load_kickoffs(cursor, game_ids), on='game_id')
+    snapshots = snapshots[snapshots['observed_at'] < snapshots['kickoff']].drop(columns='kickoff')
+
+    history, alerts, summary = detect_moves(snapshots, load_summaries(cursor, game_ids))
+
+    copy_dataframe(cursor, history, 'line_history')
+    copy_dataframe(cursor, alerts, 'line_movement_alerts')
+    upsert_dataframe(cursor, summary, 'line_summary', LINE_KEYS, SUMMARY_COLUMNS)
+
+    # Game lines carry player_id 0, which is not a player
+    changes = new_change_set()
+    record_frame_changes(changes, 'line_history', history.assign(
+        player_id=history['player_id'].where(history['player_id'] > 0)))
+    publish_changes(cursor, stage, changes)
+
+    print(f"  {len(snapshots)} observed lines -> {len(history)} changes, {len(alerts)} alerts")
+    return alerts
+
+def game_line_snapshots(games, observed_at=None):
+    """Long (LINE_KEYS, line, price, observed_at) frame of the games table's betting lines"""
+    observed_at = observed_at or pd.Timestamp.now(tz='UTC')
+    frames = [pd.DataFrame({
+        'game_id': games['game_id'].astype(str), 'player_id': 0, 'market': market,
+        'bookmaker': GAME_LINE_SOURCE, 'line': pd.to_numeric(games[line], errors='coerce'),
+        'price': pd.to_numeric(games[price], errors='coerce'), 'observed_at': observed_at
+    }) for market, (line, price) in GAME_LINE_MARKETS.items()]
+    return pd.concat(frames, ignore_index=True)
+
+def record_game_lines(cursor, games):
+    """Stream the lines of a freshly loaded games frame (called by update_games)"""
+    return process_snapshots(cursor, game_line_snapshots(games), 'game_lines')
+
+def prop_line_snapshots(prices):
+    """Long (LINE_KEYS, line, price, observed_at) frame of stored prop prices (over side)"""
+    return pd.DataFrame({
+        'game_id': prices['game_id'].astype(str), 'player_id': prices['player_id'],
+        'market': prices['market'], 'bookmaker': prices['bookmaker'],
+        'line': prices['over_point'].fillna(prices['under_point']), 'price': prices['over_price'],
+        'observed_at': prices['last_update'].fillna(prices['imported_at'])
+    })
+
+def close_lines(cursor):
+    """Freeze the current line as the closing line of every market whose game has kicked off"""
+    cursor.execute(f"""
+        UPDATE line_summary s
+        SET close_line = s.current_line, close_price = s.current_price, closed_at = s.current_at
+        FROM games g
+        WHERE g.game_id = s.game_id
+          AND s.closed_at IS NULL
+          AND {KICKOFF_SQL} <= CURRENT_TIMESTAMP
+    """)
+    return cursor.rowcount
+
+def track_line_movement():
+    """Stream props imported since the last run and close the lines of started games"""
+    print("Tracking line movement...")
+
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        create_line_tables(cursor)
+
+        if props_table_exists(cursor):
+            cursor.execute("SELECT watermark FROM line_stream_state WHERE stream = %s", (PROPS_TABLE,))
+            row = cursor.fetchone()
+            prices = load_stored_prices(cursor, since=row[0] if row else None)
+            print(f"  {len(prices)} prop prices imported since {row[0] if row else 'the start'}")
+
+            if len(prices) > 0:
+                process_snapshots(cursor, prop_line_snapshots(prices), 'prop_lines')
+                cursor.execute("""
+                    INSERT INTO line_stream_state (stream, watermark) VALUES (%s, %s)
+                    ON CONFLICT (stream) DO UPDATE SET watermark = EXCLUDED.watermark
+                """, (PROPS_TABLE, prices['imported_at'].max()))
+        else:
+            print(f"  {PROPS_TABLE} does not exist yet, no props to track")
+
+        closed = close_lines(cursor)
+        conn.commit()
+        print(f"  Closed {closed} markets at kickoff")
+
+        cursor.close()
+        conn.close()
+        return True
+
+    except Exception as e:
+        print(f"  Error tracking line movement: {e}")
+        return False
+
+def game_summary(cursor, game_id):
+    """Open, current and closing lines of every market of a game, from line_summary only"""
+    return query_dataframe(cursor, """
+        SELECT player_id, market, bookmaker, open_line, current_line, close_line,
+               current_line - open_line AS move, low_line, high_line, moves, current_at
+        FROM line_summary
+        WHERE game_id = %s
+        ORDER BY player_id, market, bookmaker
+    """, (game_id,))
+
+def recent_alerts(cursor, limit=20):
+    """Most recent line movement alerts"""
+    return query_dataframe(cursor, """
+        SELECT game_id, player_id, market, bookmaker, alert, open_line, from_line, to_line, observed_at
+        FROM line_movement_alerts
+        ORDER BY id DESC
+        LIMIT %s
+    """, (limit,))
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Track line movement of game lines and player props")
+    parser.add_argument('--game', help="Print the line summary of a game_id instead of tracking")
+    parser.add_argument('--alerts', type=int, metavar='N', help="Print the N most recent alerts instead of tracking")
+    args = parser.parse_args()
+
+    print("FFAngles Line Movement")
+    print("=" * 40)
+    print(f"Started at: {datetime.now()}")
+
+    if args.game or args.alerts:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        create_line_tables(cursor)
+        result = game_summary(cursor, args.game) if args.game else recent_alerts(cursor, args.alerts)
+        cursor.close()
+        conn.close()
+        print(result.to_string(index=False) if len(result) else "\nNo lines recorded yet")
+        return
+
+    if track_line_movement():
+        print("\nLine movement tracked successfully!")
+    else:
+        print("\nLine movement tracking failed!")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo win probabilities for head-to-head fantasy matchups
+
+Each player's weekly PPR points are modelled as a lognormal distribution
+(never negative, right-skewed like real scoring). Its mean is the player's
+projection for the week (see projections.py), or the average of their recent
+games when nothing projects them; its spread is the variance of their recent
+games, shrunk toward a position-free prior when the history is short.
+
+All players of a league are drawn together as one (players x trials) NumPy
+matrix and team totals come from a single membership-matrix product, so
+every matchup of a league is simulated in one call; 100,000 trials for a
+full league take a fraction of a second. Several league files are spread
+over a process pool.
+
+A league file lists lineups by players.id:
+
+    {"league_name": "...", "season": 2025, "week": 7,
+     "matchups": [{"teams": [{"name": "A", "players": [12, 34]},
+                             {"name": "B", "players": [56, 78]}]}]}
+"""
+
+import json
+import argparse
+import numpy as np
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+from db import get_db_connection
+from projections import create_projections_table, load_projected_points
+
+TRIALS = 100000
+
+TRIAL_CHUNK = 25000  # trials drawn at a time, bounds the draw matrix's memory
+
+HISTORY_GAMES = 16  # recent regular season games behind each distribution
+
+HISTORY_SEASONS = 3  # how far back the recent games may reach
+
+# Variance prior: a player with no history gets sd = PRIOR_CV * mean, and
+# PRIOR_GAMES games' worth of weight pulls short histories toward it
+PRIOR_CV = 0.5
+PRIOR_GAMES = 4
+
+MIN_MEAN = 0.1  # lognormal needs a positive mean
+
+def load_player_history(cursor, player_ids, season, week):
+    """{player_id: (mean, variance, games)} over each player's recent games before the week"""
+    cursor.execute("""
+        SELECT player_id, AVG(points), COALESCE(VAR_SAMP(points), 0), COUNT(*)
+        FROM (
+            SELECT player_id, fantasy_points_ppr AS points,
+                   ROW_NUMBER() OVER (PARTITION BY player_id ORDER BY season DESC, week DESC) AS recent
+            FROM player_weekly_stats
+            WHERE player_id = ANY(%(ids)s)
+              AND season_type = 'REG'
+              AND season > %(season)s - %(seasons)s
+              AND (season < %(season)s OR week < %(week)s)
+              AND fantasy_points_ppr IS NOT NULL
+        ) games
+        WHERE recent <= %(games)s
+        GROUP BY player_id
+    """, {'ids': list(player_ids), 'season': season, 'week': week,
+          'seasons': HISTORY_SEASONS, 'games': HISTORY_GAMES})
+    return {row[0]: (float(row[1]), float(row[2]), int(row[3])) for row in cursor.fetchall()}
+
+def build_distributions(player_ids, history, projected):
+    """
+    Lognormal (log_mean, log_sd) float32 arrays for the players, in player_ids order.
+
+    history maps player_id -> (mean, variance, games) and projected maps
+    player_id -> projected points; players with neither get a near-zero mean.
+    """
+    means = np.empty(len(player_ids))
+    variances = np.empty(len(player_ids))
+    for i, player_id in enumerate(player_ids):
+        hist_mean, hist_var, games = history.get(player_id, (0.0, 0.0, 0))
+        mean = projected.get(player_id, hist_mean)
+        mean = max(mean, MIN_MEAN)
+        prior_var = (PRIOR_CV * mean) ** 2
+        means[i] = mean
+        variances[i] = (games * hist_var + PRIOR_GAMES * prior_var) / (games + PRIOR_GAMES)
+
+    # Lognormal parameters with the same mean and variance
+    log_var = np.log1p(variances / means ** 2)
+    log_mean = np.log(means) - log_var / 2
+    return log_mean.astype('float32'), np.sqrt(log_var).astype('float32')
+
+def load_distributions(player_ids, season, week):
+    """Look up history and projections for the players and build their distributions"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    create_projections_table(cursor)
+    conn.commit()
+    history = load_player_history(cursor, player_ids, season, week)
+    projections = load_projected_points(cursor, season, week, player_ids).dropna(subset=['projected'])
+    projected = dict(zip(projections['player_id'], projections['projected']))
+
+    cursor.close()
+    conn.close()
+    print(f"  {len(player_ids)} players: {len(projected)} projected, "
+          f"{len(history)} with recent games")
+    return build_distributions(player_ids, history, projected)
+
+def lineup_matrix(lineups, player_ids):
+    """(lineups x players) 0/1 membership matrix"""
+    column = {player_id: i for i, player_id in enumerate(player_ids)}
+    matrix = np.zeros((len(lineups), len(player_ids)), dtype='float32')
+    for row, lineup in enumerate(lineups):
+        matrix[row, [column[player_id] for player_id in lineup]] = 1.0
+    return matrix
+
+def expected_points(log_mean, log_sd):
+    """Mean of each player's lognormal distribution"""
+    return np.exp(log_mean + log_sd ** 2 / 2)
+
+def simulate_totals(log_mean, log_sd, membership, trials=TRIALS, seed=None):
+    """
+    Yield (lineups x chunk) simulated totals, TRIAL_CHUNK trials at a time.
+
+    Every lineup sees the same draws for a shared player, so lineups that
+    differ by one player are compared on common random numbers. Draws are
+    float32 standard normals transformed in place.
+    """
+    rng = np.random.default_rng(seed)
+    for start in range(0, trials, TRIAL_CHUNK):
+        size = min(TRIAL_CHUNK, trials - start)
+        draws = rng.standard_normal((len(log_mean), size), dtype=np.float32)
+        draws *= log_sd[:, None]
+        draws += log_mean[:, None]
+        np.exp(draws, out=draws)
+        yield membership @ draws
+
+def win_probabilities(pairs, totals_chunks, trials):
+    """P(first lineup beats second) for (first, second) row pairs; ties count half"""
+    first = np.array([a for a, b in pairs])
+    second = np.array([b for a, b in pairs])
+    wins = np.zeros(len(pairs))
+    for totals in totals_chunks:
+        margin = totals[first] - totals[second]
+        wins += (margin > 0).sum(axis=1) + 0.5 * (margin == 0).sum(axis=1)
+    return wins / trials
+
+def simulate_matchups(matchups, log_mean, log_sd, player_ids, trials=TRIALS, seed=None):
+    """
+    Win probabilities for every matchup of a league in one batched simulation.
+
+    matchups is a list of ((name, lineup), (name, lineup)); log_mean and
+    log_sd are aligned with player_ids. Returns one dict per matchup with each
+    team's name, mean total and win probability.
+    """
+    lineups = [lineup for matchup in matchups for name, lineup in matchup]
+    membership = lineup_matrix(lineups, player_ids)
+    pairs = [(2 * i, 2 * i + 1) for i in range(len(matchups))]
+
+    means = membership @ expected_points(log_mean, log_sd)
+    totals = simulate_totals(log_mean, log_sd, membership, trials, seed)
+    probabilities = win_probabilities(pairs, totals, trials)
+
+    return [
+        {
+            'teams': [
+                {'name': team_a, 'mean_points': round(float(means[a]), 2),
+                 'win_probability': round(float(probability), 4)},
+                {'name': team_b, 'mean_points': round(float(means[b]), 2),
+                 'win_probability': round(1 - float(probability), 4)}
+            ]
+        }
+        for ((team_a, _), (team_b, _)), (a, b), probability in zip(matchups, pairs, probabilities)
+    ]
+
+def compare_lineups(options, opponent, log_mean, log_sd, player_ids, trials=TRIALS, seed=None):
+    """
+    Win probability of each candidate lineup against the same opponent.
+
+    For start/sit decisions: all options share draws, so the differences
+    between them are not simulation noise.
+    """
+    membership = lineup_matrix(list(options) + [opponent], player_ids)
+    pairs = [(i, len(options)) for i in range(len(options))]
+    totals = simulate_totals(log_mean, log_sd, membership, trials, seed)
+    return win_probabilities(pairs, totals, trials)
+
+def read_league(path):
+    """Load a league file and return (league, matchups as ((name, lineup), (name, lineup)))"""
+    with open(path) as f:
+        league = json.load(f)
+    matchups = [
+        tuple((team['name'], [int(pid) for pid in team['players']]) for team in matchup['teams'])
+        for matchup in league['matchups']
+    ]
+    return league, matchups
+
+def league_player_ids(matchups):
+    """Sorted distinct players.id of every lineup"""
+    return sorted({pid for matchup in matchups for name, lineup in matchup for pid in lineup})
+
+def simulate_league(path, trials=TRIALS, seed=None):
+    """Simulate every matchup of one league file"""
+    league, matchups = read_league(path)
+    player_ids = league_player_ids(matchups)
+    log_mean, log_sd = load_distributions(player_ids, league['season'], league['week'])
+    return {
+        'league_name': league.get('league_name'),
+        'season': league['season'],
+        'week': league['week'],
+        'trials': trials,
+        'matchups': simulate_matchups(matchups, log_mean, log_sd, player_ids, trials, seed)
+    }
+
+def simulate_leagues(paths, trials=TRIALS, workers=None, seed=None):
+    """Simulate several league files, one process per league"""
+    if len(paths) == 1:
+        return [simulate_league(paths[0], trials, seed)]
+
+    seeds = np.random.SeedSequence(seed).spawn(len(paths))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(simulate_league, paths, [trials] * len(paths), seeds))
+
+def print_league(result):
+    """Print one league's win probabilities"""
+    print(f"\n{result['league_name'] or 'League'} - {result['season']} week {result['week']} "
+          f"({result['trials']:,} trials)")
+    for matchup in result['matchups']:
+        team_a, team_b = matchup['teams']
+        print(f"  {team_a['name']} ({team_a['mean_points']:.1f}) {team_a['win_probability']:.1%}"
+              f" vs {team_b['name']} ({team_b['mean_points']:.1f}) {team_b['win_probability']:.1%}")
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Simulate head-to-head fantasy matchups")
+    parser.add_argument('leagues', nargs='+', help="League JSON files with weekly matchups")
+    parser.add_argument('--trials', type=int, default=TRIALS,
+                        help=f"Simulated weeks per matchup (default: {TRIALS:,})")
+    parser.add_argument('--workers', type=int, help="Processes for several leagues (default: CPU count)")
+    parser.add_argument('--seed', type=int, help="Random seed for reproducible results")
+    parser.add_argument('--output', help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    print("FFAngles Matchup Simulator")
+    print("=" * 40)
+    print(f"Started at: {datetime.now()}")
+
+    started = datetime.now()
+    results = simulate_leagues(args.leagues, args.trials, args.workers, args.seed)
+    for result in results:
+        print_league(result)
+    print(f"\nSimulated {len(results)} leagues in {(datetime.now() - started).total_seconds():.2f}s")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -3,33 +3,15 @@
 Complete migration from Tank01 to nfl_data_py for all core data
 """
 
-import os
 import sys
-import psycopg2
+import argparse
 import nfl_data_py as nfl
 import pandas as pd
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
-
-# Database connection configuration
-DB_CONFIG = {
-    'host': os.getenv('DB_HOST', 'localhost'),
-    'database': os.getenv('DB_NAME', 'ff_angles'),
-    'user': os.getenv('DB_USER', 'postgres'),
-    'password': os.getenv('DB_PASSWORD', 'password'),
-    'port': os.getenv('DB_PORT', '5432')
-}
-
-def get_db_connection():
-    """Create database connection"""
-    try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        return conn
-    except Exception as e:
-        print(f"Error connecting to database: {e}")
-        sys.exit(1)
+from db import get_db_connection
+from season_partitions import (
+    PARTITIONED_TABLES, STATS_CONFLICT_KEY, ensure_season_partition, is_partitioned
+)
 
 def create_new_tables():
     """Create new tables for nfl_data_py data"""
@@ -203,6 +185,93 @@ def create_new_tables():
     conn.close()
     print("[SUCCESS] New tables created successfully")
 
+def partition_stats_tables(seasons):
+    """Convert the weekly and NGS stats tables to tables partitioned by season"""
+    print("Partitioning stats tables by season...")
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    for table_name in PARTITIONED_TABLES:
+        if is_partitioned(cursor, table_name):
+            print(f"  [SKIP] {table_name} is already partitioned")
+            for season in seasons:
+                ensure_season_partition(cursor, table_name, season)
+            continue
+
+        heap_table = f"{table_name}_heap"
+        print(f"  Moving {table_name} to {heap_table}")
+
+        # Keep the old heap table as a backup, like the '_old' tables above
+        cursor.execute(f"ALTER TABLE {table_name} RENAME TO {heap_table}")
+        cursor.execute(f"""
+            CREATE TABLE {table_name} (
+                LIKE {heap_table} INCLUDING DEFAULTS
+            ) PARTITION BY LIST (season)
+        """)
+
+        # The serial sequence must follow the new table so the backup can be dropped
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", (heap_table,))
+        id_sequence = cursor.fetchone()[0]
+        if id_sequence:
+            cursor.execute(f"ALTER SEQUENCE {id_sequence} OWNED BY {table_name}.id")
+
+        # Unique keys on a partitioned table must include the partition column;
+        # without a surrogate id the natural key is the primary key
+        cursor.execute("""
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = %s AND column_name = 'id'
+        """, (heap_table,))
+        if cursor.fetchone():
+            cursor.execute(f"ALTER TABLE {table_name} ADD PRIMARY KEY (id, season)")
+            cursor.execute(f"""
+                ALTER TABLE {table_name}
+                ADD CONSTRAINT {table_name}_natural_key UNIQUE ({', '.join(STATS_CONFLICT_KEY)})
+            """)
+        else:
+            cursor.execute(f"ALTER TABLE {table_name} ADD PRIMARY KEY ({', '.join(STATS_CONFLICT_KEY)})")
+
+        # LIKE does not copy foreign keys; they are re-added per partition below
+        cursor.execute("""
+            SELECT conname, pg_get_constraintdef(oid)
+            FROM pg_constraint
+            WHERE conrelid = %s::regclass AND contype = 'f'
+        """, (heap_table,))
+        foreign_keys = cursor.fetchall()
+
+        cursor.execute(f"CREATE INDEX idx_{table_name}_player ON {table_name}(player_id)")
+        cursor.execute(f"CREATE INDEX idx_{table_name}_season_week ON {table_name}(season, week)")
+
+        cursor.execute(f"SELECT DISTINCT season FROM {heap_table}")
+        existing_seasons = {row[0] for row in cursor.fetchall()}
+
+        for season in sorted(existing_seasons | set(seasons)):
+            partition = ensure_season_partition(cursor, table_name, season)
+            cursor.execute(f"""
+                INSERT INTO {partition}
+                SELECT * FROM {heap_table} WHERE season = %s
+            """, (season,))
+            print(f"    {partition}: {cursor.rowcount} rows")
+
+            # NOT VALID, as PostgreSQL cannot add one to the partitioned parent
+            for constraint, definition in foreign_keys:
+                cursor.execute(f"""
+                    ALTER TABLE {partition}
+                    ADD CONSTRAINT {constraint.replace(table_name, partition, 1)}
+                    {definition.removesuffix(' NOT VALID')} NOT VALID
+                """)
+
+        cursor.execute(f"ANALYZE {table_name}")
+        print(f"  [SUCCESS] {table_name} partitioned into {len(existing_seasons | set(seasons))} seasons")
+        if foreign_keys:
+            print(f"  [NOTE] {len(foreign_keys)} foreign keys copied to the partitions NOT VALID; run "
+                  f"update-foreign-keys-to-new-players.py to validate them and cover new partitions")
+
+    conn.commit()
+    cursor.close()
+    conn.close()
+    print("[SUCCESS] Stats tables partitioned by season")
+
 def import_teams():
     """Import teams from nfl_data_py"""
     print("Importing teams from nfl_data_py...")
@@ -463,8 +532,24 @@ def import_games():
 
 def main():
     """Main migration function"""
+    parser = argparse.ArgumentParser(description="FFAngles migration to nfl_data_py")
+    parser.add_argument('--partition-stats', action='store_true',
+                        help="Partition player_weekly_stats and the NGS tables by season")
+    parser.add_argument('--seasons', type=int, nargs='+', default=list(range(2016, 2026)),
+                        help="Seasons to pre-create partitions for")
+    args = parser.parse_args()
+
     print("FFAngles Migration to nfl_data_py")
     print("=" * 40)
+
+    if args.partition_stats:
+        try:
+            partition_stats_tables(args.seasons)
+        except Exception as e:
+            print(f"\n[ERROR] Partitioning failed: {e}")
+            sys.exit(1)
+        return
+
     print("This will create new tables with nfl_data_py data")
     print("Old tables will be preserved with '_old' suffix")
     print()
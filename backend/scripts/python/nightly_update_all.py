@@ -27,36 +27,62 @@ TODO for 2025 Season:
    - Useful for waiver wire and lineup decisions
 """
 
-import os
 import sys
-import psycopg2
+import argparse
 import nfl_data_py as nfl
 import pandas as pd
 from datetime import datetime, date
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+from bulk_load import finish_load, upsert_dataframe
+from change_log import new_change_set, publish_changes
+from db import get_db_connection
+from season_partitions import season_targets
+from table_loaders import (
+    GAME_COLUMNS, GAME_LINE_COLUMNS, GAME_SCORE_COLUMNS, NGS_TABLES,
+    prepare_games_frame, prepare_stat_frame, select_columns, upsert_stat_frame
+)
+from validation import validate_frame
+from positional_ranks import update_positional_ranks
+from defense_vs_position import update_defense_vs_position
+from import_pbp_plays import import_pbp_seasons
+from epa_aggregates import update_epa_aggregates
+from import_snap_counts import import_snap_counts
+from export_parquet import export_parquet
+from similar_players import build_similarity_index
+from projection_blender import blend_projections
+from prop_hit_rates import update_prop_hit_rates
+from odds_processing import update_prop_consensus
+from line_movement import record_game_lines, track_line_movement
 
-# Database connection configuration
-DB_CONFIG = {
-    'host': os.getenv('DB_HOST', 'localhost'),
-    'database': os.getenv('DB_NAME', 'ff_angles'),
-    'user': os.getenv('DB_USER', 'postgres'),
-    'password': os.getenv('DB_PASSWORD', 'password'),
-    'port': os.getenv('DB_PORT', '5432')
+TEAM_COLUMNS = [
+    'team_abbr', 'team_name', 'team_id', 'team_nick', 'team_conf', 'team_division',
+    'team_color', 'team_color2', 'team_color3', 'team_color4', 'team_logo_wikipedia',
+    'team_logo_espn', 'team_wordmark', 'team_conference_logo', 'team_league_logo',
+    'team_logo_squared'
+]
+
+# nfl_data_py players column -> players table column
+PLAYER_COLUMN_MAP = {
+    'gsis_id': 'gsis_id', 'display_name': 'player_name', 'first_name': 'first_name',
+    'last_name': 'last_name', 'football_name': 'football_name', 'position': 'position',
+    'team_abbr': 'team', 'jersey_number': 'jersey_number', 'height': 'height',
+    'weight': 'weight', 'birth_date': 'birth_date', 'college_name': 'college',
+    'years_of_experience': 'years_exp', 'entry_year': 'entry_year',
+    'rookie_year': 'rookie_year', 'draft_club': 'draft_club', 'draft_number': 'draft_number',
+    'status': 'status', 'esb_id': 'esb_id', 'gsis_it_id': 'gsis_it_id', 'smart_id': 'smart_id',
+    'headshot': 'headshot_url', 'status_description_abbr': 'status_description_abbr',
+    'espn_id': 'espn_id', 'yahoo_id': 'yahoo_id', 'sleeper_id': 'sleeper_id',
+    'fantasy_data_id': 'fantasy_data_id', 'rotowire_id': 'rotowire_id',
+    'pff_id': 'pff_id', 'pfr_id': 'pfr_id'
 }
 
-def get_db_connection():
-    """Create database connection"""
-    try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        return conn
-    except Exception as e:
-        print(f"Error connecting to database: {e}")
-        sys.exit(1)
+# Columns stored as whole numbers; anything non-numeric becomes NULL
+PLAYER_INTEGER_COLUMNS = [
+    'jersey_number', 'weight', 'years_exp', 'entry_year', 'rookie_year', 'draft_number',
+    'espn_id', 'yahoo_id', 'sleeper_id', 'fantasy_data_id', 'rotowire_id', 'pff_id'
+]
 
-def update_teams():
+def update_teams(dry_run=False):
     """Update teams table with current data"""
     print("Updating teams table...")
     
@@ -70,6 +96,8 @@ def update_teams():
         teams_data = teams_data[~teams_data['team_abbr'].isin(excluded_teams)]
         print(f"Filtered out old team abbreviations: {len(teams_data)} teams")
         
+        teams_data = validate_frame(select_columns(teams_data, TEAM_COLUMNS, 'teams'), 'teams')
+        
         if len(teams_data) == 0:
             print("No team data found")
             return True
@@ -83,50 +111,15 @@ def update_teams():
         print(f"Current teams in database: {current_count}")
         
         # Upsert teams
-        upsert_sql = """
-        INSERT INTO teams (
-            team_abbr, team_name, team_id, team_nick, team_conf, team_division,
-            team_color, team_color2, team_color3, team_color4, team_logo_wikipedia,
-            team_logo_espn, team_wordmark, team_conference_logo, team_league_logo,
-            team_logo_squared
-        ) VALUES (
-            %(team_abbr)s, %(team_name)s, %(team_id)s, %(team_nick)s, %(team_conf)s, %(team_division)s,
-            %(team_color)s, %(team_color2)s, %(team_color3)s, %(team_color4)s, %(team_logo_wikipedia)s,
-            %(team_logo_espn)s, %(team_wordmark)s, %(team_conference_logo)s, %(team_league_logo)s,
-            %(team_logo_squared)s
+        changes = new_change_set()
+        updated_count = upsert_dataframe(
+            cursor, teams_data, 'teams', ['team_abbr'], TEAM_COLUMNS, dry_run=dry_run,
+            changes=changes
         )
-        ON CONFLICT (team_abbr) 
-        DO UPDATE SET
-            team_name = EXCLUDED.team_name,
-            team_id = EXCLUDED.team_id,
-            team_nick = EXCLUDED.team_nick,
-            team_conf = EXCLUDED.team_conf,
-            team_division = EXCLUDED.team_division,
-            team_color = EXCLUDED.team_color,
-            team_color2 = EXCLUDED.team_color2,
-            team_color3 = EXCLUDED.team_color3,
-            team_color4 = EXCLUDED.team_color4,
-            team_logo_wikipedia = EXCLUDED.team_logo_wikipedia,
-            team_logo_espn = EXCLUDED.team_logo_espn,
-            team_wordmark = EXCLUDED.team_wordmark,
-            team_conference_logo = EXCLUDED.team_conference_logo,
-            team_league_logo = EXCLUDED.team_league_logo,
-            team_logo_squared = EXCLUDED.team_logo_squared
-        """
-        
-        updated_count = 0
-        
-        for index, row in teams_data.iterrows():
-            try:
-                row_data = {col: None if pd.isna(row.get(col)) else row.get(col) for col in teams_data.columns}
-                cursor.execute(upsert_sql, row_data)
-                updated_count += 1
-            except Exception as e:
-                print(f"Error upserting team {index}: {e}")
-                continue
-        
-        conn.commit()
-        print(f"Updated/inserted {updated_count} teams")
+        
+        publish_changes(cursor, 'teams', changes)
+        finish_load(conn, dry_run)
+        print(f"{'Would update/insert' if dry_run else 'Updated/inserted'} {updated_count} teams")
         
         cursor.close()
         conn.close()
@@ -136,7 +129,7 @@ def update_teams():
         print(f"Error updating teams: {e}")
         return False
 
-def update_players():
+def update_players(dry_run=False):
     """Update players table with current data and cross-platform IDs"""
     print("Updating players table...")
     
@@ -187,6 +180,15 @@ def update_players():
             players_data.loc[missing_gsis, 'gsis_id'] = placeholder_ids
             print(f"Generated placeholder GSIS IDs for {missing_count} players")
         
+        # Rename to table columns and normalize numeric types
+        players_data = select_columns(players_data, list(PLAYER_COLUMN_MAP), 'players')
+        players_data = players_data.rename(columns=PLAYER_COLUMN_MAP)
+        for col in PLAYER_INTEGER_COLUMNS:
+            players_data[col] = pd.to_numeric(players_data[col], errors='coerce').round().astype('Int64')
+        players_data['height'] = pd.to_numeric(players_data['height'], errors='coerce')
+        
+        players_data = validate_frame(players_data, 'players')
+        
         if len(players_data) == 0:
             print("No player data found")
             return True
@@ -200,88 +202,15 @@ def update_players():
         print(f"Current players in database: {current_count}")
         
         # Upsert players with cross-platform IDs
-        upsert_sql = """
-        INSERT INTO players (
-            gsis_id, player_name, first_name, last_name, football_name, position,
-            team, jersey_number, height, weight, birth_date, college, years_exp,
-            entry_year, rookie_year, draft_club, draft_number, status,
-            esb_id, gsis_it_id, smart_id, headshot_url, status_description_abbr,
-            espn_id, yahoo_id, sleeper_id, fantasy_data_id, rotowire_id, pff_id, pfr_id
-        ) VALUES (
-            %(gsis_id)s, %(display_name)s, %(first_name)s, %(last_name)s, %(football_name)s, %(position)s,
-            %(team_abbr)s, %(jersey_number)s, %(height)s, %(weight)s, %(birth_date)s, %(college_name)s, %(years_of_experience)s,
-            %(entry_year)s, %(rookie_year)s, %(draft_club)s, %(draft_number)s, %(status)s,
-            %(esb_id)s, %(gsis_it_id)s, %(smart_id)s, %(headshot)s, %(status_description_abbr)s,
-            %(espn_id)s, %(yahoo_id)s, %(sleeper_id)s, %(fantasy_data_id)s, %(rotowire_id)s, %(pff_id)s, %(pfr_id)s
+        changes = new_change_set()
+        updated_count = upsert_dataframe(
+            cursor, players_data, 'players', ['gsis_id'], list(PLAYER_COLUMN_MAP.values()),
+            dry_run=dry_run, changes=changes
         )
-        ON CONFLICT (gsis_id) 
-        DO UPDATE SET
-            player_name = EXCLUDED.player_name,
-            first_name = EXCLUDED.first_name,
-            last_name = EXCLUDED.last_name,
-            football_name = EXCLUDED.football_name,
-            position = EXCLUDED.position,
-            team = EXCLUDED.team,
-            jersey_number = EXCLUDED.jersey_number,
-            height = EXCLUDED.height,
-            weight = EXCLUDED.weight,
-            birth_date = EXCLUDED.birth_date,
-            college = EXCLUDED.college,
-            years_exp = EXCLUDED.years_exp,
-            entry_year = EXCLUDED.entry_year,
-            rookie_year = EXCLUDED.rookie_year,
-            draft_club = EXCLUDED.draft_club,
-            draft_number = EXCLUDED.draft_number,
-            status = EXCLUDED.status,
-            esb_id = EXCLUDED.esb_id,
-            gsis_it_id = EXCLUDED.gsis_it_id,
-            smart_id = EXCLUDED.smart_id,
-            headshot_url = EXCLUDED.headshot_url,
-            status_description_abbr = EXCLUDED.status_description_abbr,
-            espn_id = EXCLUDED.espn_id,
-            yahoo_id = EXCLUDED.yahoo_id,
-            sleeper_id = EXCLUDED.sleeper_id,
-            fantasy_data_id = EXCLUDED.fantasy_data_id,
-            rotowire_id = EXCLUDED.rotowire_id,
-            pff_id = EXCLUDED.pff_id,
-            pfr_id = EXCLUDED.pfr_id
-        """
-        
-        updated_count = 0
-        
-        for index, row in players_data.iterrows():
-            try:
-                # Handle data types
-                row_data = {}
-                for col in players_data.columns:
-                    value = row.get(col)
-                    if pd.isna(value):
-                        row_data[col] = None
-                    elif col in ['jersey_number', 'weight', 'years_of_experience', 'entry_year', 'rookie_year', 'draft_number', 'espn_id', 'yahoo_id', 'sleeper_id', 'fantasy_data_id', 'rotowire_id', 'pff_id', 'pfr_id']:
-                        try:
-                            row_data[col] = int(value) if value is not None else None
-                        except (ValueError, TypeError):
-                            row_data[col] = None
-                    elif col in ['height']:
-                        try:
-                            row_data[col] = float(value) if value is not None else None
-                        except (ValueError, TypeError):
-                            row_data[col] = None
-                    else:
-                        row_data[col] = value
-                
-                cursor.execute(upsert_sql, row_data)
-                updated_count += 1
-                
-                if index % 100 == 0:
-                    print(f"  Processed {index} players...")
-                    
-            except Exception as e:
-                print(f"Error upserting player {index}: {e}")
-                continue
-        
-        conn.commit()
-        print(f"Updated/inserted {updated_count} players")
+        
+        publish_changes(cursor, 'players', changes)
+        finish_load(conn, dry_run)
+        print(f"{'Would update/insert' if dry_run else 'Updated/inserted'} {updated_count} players")
         
         cursor.close()
         conn.close()
@@ -291,7 +220,7 @@ def update_players():
         print(f"Error updating players: {e}")
         return False
 
-def update_games(current_season=2025):
+def update_games(current_season=2025, dry_run=False):
     """Update games table with current season data"""
     print(f"Updating games table for {current_season} season...")
     
@@ -300,7 +229,9 @@ def update_games(current_season=2025):
         schedules = nfl.import_schedules([current_season])
         print(f"Retrieved {len(schedules)} games")
         
-        if len(schedules) == 0:
+        games_data = validate_frame(prepare_games_frame(schedules), 'games')
+        
+        if len(games_data) == 0:
             print("No games data found")
             return True
         
@@ -312,79 +243,21 @@ def update_games(current_season=2025):
         current_count = cursor.fetchone()[0]
         print(f"Current games in database for {current_season}: {current_count}")
         
-        # Insert games data
-        insert_sql = """
-        INSERT INTO games (
-            game_id, season, game_type, week, gameday, weekday, gametime,
-            away_team, home_team, away_score, home_score, location, result,
-            total, overtime, old_game_id, gsis, nfl_detail_id, pfr, pff,
-            espn, ftn, away_rest, home_rest, away_moneyline, home_moneyline,
-            spread_line, away_spread_odds, home_spread_odds, total_line,
-            under_odds, over_odds, div_game, roof, surface, temp, wind,
-            away_qb_id, home_qb_id, away_qb_name, home_qb_name, away_coach,
-            home_coach, referee, stadium_id, stadium
-        ) VALUES (
-            %(game_id)s, %(season)s, %(game_type)s, %(week)s, %(gameday)s, %(weekday)s, %(gametime)s,
-            %(away_team)s, %(home_team)s, %(away_score)s, %(home_score)s, %(location)s, %(result)s,
-            %(total)s, %(overtime)s, %(old_game_id)s, %(gsis)s, %(nfl_detail_id)s, %(pfr)s, %(pff)s,
-            %(espn)s, %(ftn)s, %(away_rest)s, %(home_rest)s, %(away_moneyline)s, %(home_moneyline)s,
-            %(spread_line)s, %(away_spread_odds)s, %(home_spread_odds)s, %(total_line)s,
-            %(under_odds)s, %(over_odds)s, %(div_game)s, %(roof)s, %(surface)s, %(temp)s, %(wind)s,
-            %(away_qb_id)s, %(home_qb_id)s, %(away_qb_name)s, %(home_qb_name)s, %(away_coach)s,
-            %(home_coach)s, %(referee)s, %(stadium_id)s, %(stadium)s
+        # Existing games only pick up new scores and betting lines
+        changes = new_change_set()
+        inserted_count = upsert_dataframe(
+            cursor, games_data, 'games', ['game_id'], GAME_COLUMNS,
+            update_columns=GAME_SCORE_COLUMNS + GAME_LINE_COLUMNS,
+            dry_run=dry_run, changes=changes
         )
-        ON CONFLICT (game_id) 
-        DO UPDATE SET
-            away_score = EXCLUDED.away_score,
-            home_score = EXCLUDED.home_score,
-            result = EXCLUDED.result,
-            total = EXCLUDED.total,
-            overtime = EXCLUDED.overtime,
-            away_moneyline = EXCLUDED.away_moneyline,
-            home_moneyline = EXCLUDED.home_moneyline,
-            spread_line = EXCLUDED.spread_line,
-            away_spread_odds = EXCLUDED.away_spread_odds,
-            home_spread_odds = EXCLUDED.home_spread_odds,
-            total_line = EXCLUDED.total_line,
-            under_odds = EXCLUDED.under_odds,
-            over_odds = EXCLUDED.over_odds
-        """
         
-        inserted_count = 0
+        publish_changes(cursor, 'games', changes)
         
-        for index, row in schedules.iterrows():
-            try:
-                # Handle data types
-                row_data = {}
-                for col in schedules.columns:
-                    value = row.get(col)
-                    if pd.isna(value):
-                        row_data[col] = None
-                    elif col in ['gsis', 'nfl_detail_id', 'pff', 'espn', 'ftn', 'old_game_id']:
-                        # Handle bigint columns
-                        if isinstance(value, str) and not value.isdigit():
-                            row_data[col] = None
-                        else:
-                            try:
-                                row_data[col] = int(float(value)) if value is not None else None
-                            except (ValueError, TypeError):
-                                row_data[col] = None
-                    else:
-                        row_data[col] = value
-                
-                cursor.execute(insert_sql, row_data)
-                inserted_count += 1
-                
-                if index % 100 == 0:
-                    print(f"  Processed {index} games...")
-                    
-            except Exception as e:
-                print(f"Error inserting game {index}: {e}")
-                conn.rollback()
-                continue
-        
-        conn.commit()
-        print(f"Imported {inserted_count} games")
+        # The upsert overwrites the lines in place; line_history keeps every change
+        if not dry_run:
+            record_game_lines(cursor, games_data)
+        finish_load(conn, dry_run)
+        print(f"{'Would import' if dry_run else 'Imported'} {inserted_count} games")
         
         cursor.close()
         conn.close()
@@ -394,34 +267,34 @@ def update_games(current_season=2025):
         print(f"Error updating games: {e}")
         return False
 
-def update_player_stats(current_season=2025):
+def update_player_stats(current_season=2025, dry_run=False):
     """Update all player statistics tables"""
     print(f"Updating player statistics for {current_season} season...")
     
     success_count = 0
     
     # Update seasonal stats
-    if update_seasonal_stats(current_season):
+    if update_seasonal_stats(current_season, dry_run):
         success_count += 1
     
     # Update weekly stats
-    if update_weekly_stats(current_season):
+    if update_weekly_stats(current_season, dry_run):
         success_count += 1
     
     # Update NGS stats
-    if update_ngs_stats(current_season, 'passing'):
+    if update_ngs_stats(current_season, 'passing', dry_run):
         success_count += 1
     
-    if update_ngs_stats(current_season, 'receiving'):
+    if update_ngs_stats(current_season, 'receiving', dry_run):
         success_count += 1
     
-    if update_ngs_stats(current_season, 'rushing'):
+    if update_ngs_stats(current_season, 'rushing', dry_run):
         success_count += 1
     
     print(f"Player stats update completed: {success_count}/5 successful")
     return success_count >= 4  # Allow 1 failure
 
-def update_seasonal_stats(current_season):
+def update_seasonal_stats(current_season, dry_run=False):
     """Update seasonal player statistics"""
     print(f"  Updating seasonal stats for {current_season}...")
     
@@ -435,124 +308,17 @@ def update_seasonal_stats(current_season):
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # Use existing seasonal stats insert logic
-        insert_sql = """
-        INSERT INTO player_seasonal_stats (
-            gsis_id, player_id, season, season_type, games, completions, attempts, 
-            passing_yards, passing_tds, interceptions, sacks, sack_yards,
-            sack_fumbles, sack_fumbles_lost, passing_air_yards, passing_yards_after_catch,
-            passing_first_downs, passing_epa, passing_2pt_conversions, pacr, dakota,
-            carries, rushing_yards, rushing_tds, rushing_fumbles, rushing_fumbles_lost,
-            rushing_first_downs, rushing_epa, rushing_2pt_conversions,
-            receptions, targets, receiving_yards, receiving_tds, receiving_fumbles,
-            receiving_fumbles_lost, receiving_air_yards, receiving_yards_after_catch,
-            receiving_first_downs, receiving_epa, receiving_2pt_conversions,
-            racr, target_share, air_yards_share, wopr_x, wopr_y,
-            tgt_sh, ay_sh, yac_sh, ry_sh, rtd_sh, rfd_sh, rtdfd_sh,
-            dom, w8dom, yptmpa, ppr_sh, special_teams_tds, fantasy_points, fantasy_points_ppr
-        ) VALUES (
-            %(player_id)s, 
-            (SELECT id FROM players WHERE gsis_id = %(player_id)s LIMIT 1),
-            %(season)s, %(season_type)s, %(games)s, %(completions)s, %(attempts)s,
-            %(passing_yards)s, %(passing_tds)s, %(interceptions)s, %(sacks)s, %(sack_yards)s,
-            %(sack_fumbles)s, %(sack_fumbles_lost)s, %(passing_air_yards)s, %(passing_yards_after_catch)s,
-            %(passing_first_downs)s, %(passing_epa)s, %(passing_2pt_conversions)s, %(pacr)s, %(dakota)s,
-            %(carries)s, %(rushing_yards)s, %(rushing_tds)s, %(rushing_fumbles)s, %(rushing_fumbles_lost)s,
-            %(rushing_first_downs)s, %(rushing_epa)s, %(rushing_2pt_conversions)s,
-            %(receptions)s, %(targets)s, %(receiving_yards)s, %(receiving_tds)s, %(receiving_fumbles)s,
-            %(receiving_fumbles_lost)s, %(receiving_air_yards)s, %(receiving_yards_after_catch)s,
-            %(receiving_first_downs)s, %(receiving_epa)s, %(receiving_2pt_conversions)s,
-            %(racr)s, %(target_share)s, %(air_yards_share)s, %(wopr_x)s, %(wopr_y)s,
-            %(tgt_sh)s, %(ay_sh)s, %(yac_sh)s, %(ry_sh)s, %(rtd_sh)s, %(rfd_sh)s, %(rtdfd_sh)s,
-            %(dom)s, %(w8dom)s, %(yptmpa)s, %(ppr_sh)s, %(special_teams_tds)s, %(fantasy_points)s, %(fantasy_points_ppr)s
-        )
-        ON CONFLICT (gsis_id, season, season_type) 
-        DO UPDATE SET
-            player_id = (SELECT id FROM players WHERE gsis_id = EXCLUDED.gsis_id LIMIT 1),
-            games = EXCLUDED.games,
-            completions = EXCLUDED.completions,
-            attempts = EXCLUDED.attempts,
-            passing_yards = EXCLUDED.passing_yards,
-            passing_tds = EXCLUDED.passing_tds,
-            interceptions = EXCLUDED.interceptions,
-            sacks = EXCLUDED.sacks,
-            sack_yards = EXCLUDED.sack_yards,
-            sack_fumbles = EXCLUDED.sack_fumbles,
-            sack_fumbles_lost = EXCLUDED.sack_fumbles_lost,
-            passing_air_yards = EXCLUDED.passing_air_yards,
-            passing_yards_after_catch = EXCLUDED.passing_yards_after_catch,
-            passing_first_downs = EXCLUDED.passing_first_downs,
-            passing_epa = EXCLUDED.passing_epa,
-            passing_2pt_conversions = EXCLUDED.passing_2pt_conversions,
-            pacr = EXCLUDED.pacr,
-            dakota = EXCLUDED.dakota,
-            carries = EXCLUDED.carries,
-            rushing_yards = EXCLUDED.rushing_yards,
-            rushing_tds = EXCLUDED.rushing_tds,
-            rushing_fumbles = EXCLUDED.rushing_fumbles,
-            rushing_fumbles_lost = EXCLUDED.rushing_fumbles_lost,
-            rushing_first_downs = EXCLUDED.rushing_first_downs,
-            rushing_epa = EXCLUDED.rushing_epa,
-            rushing_2pt_conversions = EXCLUDED.rushing_2pt_conversions,
-            receptions = EXCLUDED.receptions,
-            targets = EXCLUDED.targets,
-            receiving_yards = EXCLUDED.receiving_yards,
-            receiving_tds = EXCLUDED.receiving_tds,
-            receiving_fumbles = EXCLUDED.receiving_fumbles,
-            receiving_fumbles_lost = EXCLUDED.receiving_fumbles_lost,
-            receiving_air_yards = EXCLUDED.receiving_air_yards,
-            receiving_yards_after_catch = EXCLUDED.receiving_yards_after_catch,
-            receiving_first_downs = EXCLUDED.receiving_first_downs,
-            receiving_epa = EXCLUDED.receiving_epa,
-            receiving_2pt_conversions = EXCLUDED.receiving_2pt_conversions,
-            racr = EXCLUDED.racr,
-            target_share = EXCLUDED.target_share,
-            air_yards_share = EXCLUDED.air_yards_share,
-            wopr_x = EXCLUDED.wopr_x,
-            wopr_y = EXCLUDED.wopr_y,
-            tgt_sh = EXCLUDED.tgt_sh,
-            ay_sh = EXCLUDED.ay_sh,
-            yac_sh = EXCLUDED.yac_sh,
-            ry_sh = EXCLUDED.ry_sh,
-            rtd_sh = EXCLUDED.rtd_sh,
-            rfd_sh = EXCLUDED.rfd_sh,
-            rtdfd_sh = EXCLUDED.rtdfd_sh,
-            dom = EXCLUDED.dom,
-            w8dom = EXCLUDED.w8dom,
-            yptmpa = EXCLUDED.yptmpa,
-            ppr_sh = EXCLUDED.ppr_sh,
-            special_teams_tds = EXCLUDED.special_teams_tds,
-            fantasy_points = EXCLUDED.fantasy_points,
-            fantasy_points_ppr = EXCLUDED.fantasy_points_ppr
-        """
+        seasonal_data = prepare_stat_frame(cursor, seasonal_data, 'player_seasonal_stats')
+        seasonal_data = validate_frame(seasonal_data, 'player_seasonal_stats')
         
-        inserted_count = 0
+        changes = new_change_set()
+        inserted_count = upsert_stat_frame(
+            cursor, seasonal_data, 'player_seasonal_stats', 'player_seasonal_stats', dry_run, changes
+        )
         
-        for index, row in seasonal_data.iterrows():
-            try:
-                # Handle data types
-                row_data = {}
-                for col in seasonal_data.columns:
-                    value = row.get(col)
-                    if pd.isna(value):
-                        row_data[col] = None
-                    elif col == 'games':
-                        try:
-                            row_data[col] = int(value) if value is not None else None
-                        except (ValueError, TypeError):
-                            row_data[col] = None
-                    else:
-                        row_data[col] = value
-                
-                cursor.execute(insert_sql, row_data)
-                inserted_count += 1
-                
-            except Exception as e:
-                print(f"    Error inserting seasonal row {index}: {e}")
-                continue
-        
-        conn.commit()
-        print(f"  Imported {inserted_count} seasonal stat records")
+        publish_changes(cursor, 'seasonal_stats', changes)
+        finish_load(conn, dry_run)
+        print(f"  {'Would import' if dry_run else 'Imported'} {inserted_count} seasonal stat records")
         
         cursor.close()
         conn.close()
@@ -562,7 +328,7 @@ def update_seasonal_stats(current_season):
         print(f"  Error updating seasonal stats: {e}")
         return False
 
-def update_weekly_stats(current_season):
+def update_weekly_stats(current_season, dry_run=False):
     """Update weekly player statistics"""
     print(f"  Updating weekly stats for {current_season}...")
     
@@ -576,83 +342,21 @@ def update_weekly_stats(current_season):
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # Use existing weekly stats insert logic
-        insert_sql = """
-        INSERT INTO player_weekly_stats (
-            gsis_id, player_id, season, season_type, week, opponent_team, recent_team,
-            completions, attempts, passing_yards, passing_tds, interceptions, 
-            sacks, sack_yards, carries, rushing_yards, rushing_tds, 
-            rushing_fumbles, rushing_fumbles_lost, receptions, targets, 
-            receiving_yards, receiving_tds, receiving_fumbles, receiving_fumbles_lost,
-            passing_epa, rushing_epa, receiving_epa, racr, target_share, 
-            air_yards_share, wopr, fantasy_points, fantasy_points_ppr
-        ) VALUES (
-            %(player_id)s, 
-            (SELECT id FROM players WHERE gsis_id = %(player_id)s LIMIT 1),
-            %(season)s, %(season_type)s, %(week)s, %(opponent_team)s, %(recent_team)s,
-            %(completions)s, %(attempts)s, %(passing_yards)s, %(passing_tds)s, %(interceptions)s,
-            %(sacks)s, %(sack_yards)s, %(carries)s, %(rushing_yards)s, %(rushing_tds)s,
-            %(rushing_fumbles)s, %(rushing_fumbles_lost)s, %(receptions)s, %(targets)s,
-            %(receiving_yards)s, %(receiving_tds)s, %(receiving_fumbles)s, %(receiving_fumbles_lost)s,
-            %(passing_epa)s, %(rushing_epa)s, %(receiving_epa)s, %(racr)s, %(target_share)s,
-            %(air_yards_share)s, %(wopr)s, %(fantasy_points)s, %(fantasy_points_ppr)s
-        )
-        ON CONFLICT (gsis_id, season, season_type, week) 
-        DO UPDATE SET
-            player_id = (SELECT id FROM players WHERE gsis_id = EXCLUDED.gsis_id LIMIT 1),
-            opponent_team = EXCLUDED.opponent_team,
-            recent_team = EXCLUDED.recent_team,
-            completions = EXCLUDED.completions,
-            attempts = EXCLUDED.attempts,
-            passing_yards = EXCLUDED.passing_yards,
-            passing_tds = EXCLUDED.passing_tds,
-            interceptions = EXCLUDED.interceptions,
-            sacks = EXCLUDED.sacks,
-            sack_yards = EXCLUDED.sack_yards,
-            carries = EXCLUDED.carries,
-            rushing_yards = EXCLUDED.rushing_yards,
-            rushing_tds = EXCLUDED.rushing_tds,
-            rushing_fumbles = EXCLUDED.rushing_fumbles,
-            rushing_fumbles_lost = EXCLUDED.rushing_fumbles_lost,
-            receptions = EXCLUDED.receptions,
-            targets = EXCLUDED.targets,
-            receiving_yards = EXCLUDED.receiving_yards,
-            receiving_tds = EXCLUDED.receiving_tds,
-            receiving_fumbles = EXCLUDED.receiving_fumbles,
-            receiving_fumbles_lost = EXCLUDED.receiving_fumbles_lost,
-            passing_epa = EXCLUDED.passing_epa,
-            rushing_epa = EXCLUDED.rushing_epa,
-            receiving_epa = EXCLUDED.receiving_epa,
-            racr = EXCLUDED.racr,
-            target_share = EXCLUDED.target_share,
-            air_yards_share = EXCLUDED.air_yards_share,
-            wopr = EXCLUDED.wopr,
-            fantasy_points = EXCLUDED.fantasy_points,
-            fantasy_points_ppr = EXCLUDED.fantasy_points_ppr
-        """
+        weekly_data = prepare_stat_frame(cursor, weekly_data, 'player_weekly_stats')
+        weekly_data = validate_frame(weekly_data, 'player_weekly_stats')
         
         inserted_count = 0
+        changes = new_change_set()
         
-        for index, row in weekly_data.iterrows():
-            try:
-                # Handle data types
-                row_data = {}
-                for col in weekly_data.columns:
-                    value = row.get(col)
-                    if pd.isna(value):
-                        row_data[col] = None
-                    else:
-                        row_data[col] = value
-                
-                cursor.execute(insert_sql, row_data)
-                inserted_count += 1
-                
-            except Exception as e:
-                print(f"    Error inserting weekly row {index}: {e}")
-                continue
-        
-        conn.commit()
-        print(f"  Imported {inserted_count} weekly stat records")
+        # Write each season straight into its partition
+        for table_name, season, season_data in season_targets(cursor, 'player_weekly_stats', weekly_data):
+            inserted_count += upsert_stat_frame(
+                cursor, season_data, table_name, 'player_weekly_stats', dry_run, changes
+            )
+        
+        publish_changes(cursor, 'weekly_stats', changes)
+        finish_load(conn, dry_run)
+        print(f"  {'Would import' if dry_run else 'Imported'} {inserted_count} weekly stat records")
         
         cursor.close()
         conn.close()
@@ -662,7 +366,7 @@ def update_weekly_stats(current_season):
         print(f"  Error updating weekly stats: {e}")
         return False
 
-def update_ngs_stats(current_season, stat_type):
+def update_ngs_stats(current_season, stat_type, dry_run=False):
     """Update NGS statistics for specified stat type"""
     print(f"  Updating NGS {stat_type} stats for {current_season}...")
     
@@ -676,161 +380,22 @@ def update_ngs_stats(current_season, stat_type):
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # Use existing NGS insert logic based on stat type
-        if stat_type == 'passing':
-            table_name = 'player_ngs_passing'
-            insert_sql = f"""
-            INSERT INTO {table_name} (
-                gsis_id, player_id, season, season_type, week, player_display_name, 
-                player_position, team_abbr, attempts, pass_yards, pass_touchdowns, 
-                interceptions, passer_rating, completions, completion_percentage, 
-                expected_completion_percentage, completion_percentage_above_expectation, 
-                avg_time_to_throw, avg_completed_air_yards, avg_intended_air_yards, 
-                avg_air_yards_differential, aggressiveness, max_completed_air_distance, 
-                avg_air_yards_to_sticks, avg_air_distance, max_air_distance,
-                player_gsis_id, player_first_name, player_last_name, player_jersey_number, player_short_name
-            ) VALUES (
-                %(player_gsis_id)s, 
-                (SELECT id FROM players WHERE gsis_id = %(player_gsis_id)s LIMIT 1),
-                %(season)s, %(season_type)s, %(week)s, %(player_display_name)s,
-                %(player_position)s, %(team_abbr)s, %(attempts)s, %(pass_yards)s, %(pass_touchdowns)s,
-                %(interceptions)s, %(passer_rating)s, %(completions)s, %(completion_percentage)s,
-                %(expected_completion_percentage)s, %(completion_percentage_above_expectation)s,
-                %(avg_time_to_throw)s, %(avg_completed_air_yards)s, %(avg_intended_air_yards)s,
-                %(avg_air_yards_differential)s, %(aggressiveness)s, %(max_completed_air_distance)s,
-                %(avg_air_yards_to_sticks)s, %(avg_air_distance)s, %(max_air_distance)s,
-                %(player_gsis_id)s, %(player_first_name)s, %(player_last_name)s, %(player_jersey_number)s, %(player_short_name)s
-            )
-            ON CONFLICT (gsis_id, season, season_type, week) 
-            DO UPDATE SET
-                player_id = (SELECT id FROM players WHERE gsis_id = EXCLUDED.gsis_id LIMIT 1),
-                player_display_name = EXCLUDED.player_display_name,
-                player_position = EXCLUDED.player_position,
-                team_abbr = EXCLUDED.team_abbr,
-                attempts = EXCLUDED.attempts,
-                pass_yards = EXCLUDED.pass_yards,
-                pass_touchdowns = EXCLUDED.pass_touchdowns,
-                interceptions = EXCLUDED.interceptions,
-                passer_rating = EXCLUDED.passer_rating,
-                completions = EXCLUDED.completions,
-                completion_percentage = EXCLUDED.completion_percentage,
-                expected_completion_percentage = EXCLUDED.expected_completion_percentage,
-                completion_percentage_above_expectation = EXCLUDED.completion_percentage_above_expectation,
-                avg_time_to_throw = EXCLUDED.avg_time_to_throw,
-                avg_completed_air_yards = EXCLUDED.avg_completed_air_yards,
-                avg_intended_air_yards = EXCLUDED.avg_intended_air_yards,
-                avg_air_yards_differential = EXCLUDED.avg_air_yards_differential,
-                aggressiveness = EXCLUDED.aggressiveness,
-                max_completed_air_distance = EXCLUDED.max_completed_air_distance,
-                avg_air_yards_to_sticks = EXCLUDED.avg_air_yards_to_sticks,
-                avg_air_distance = EXCLUDED.avg_air_distance,
-                max_air_distance = EXCLUDED.max_air_distance,
-                player_gsis_id = EXCLUDED.player_gsis_id,
-                player_first_name = EXCLUDED.player_first_name,
-                player_last_name = EXCLUDED.player_last_name,
-                player_jersey_number = EXCLUDED.player_jersey_number,
-                player_short_name = EXCLUDED.player_short_name
-            """
-        elif stat_type == 'receiving':
-            table_name = 'player_ngs_receiving'
-            insert_sql = f"""
-            INSERT INTO {table_name} (
-                gsis_id, player_id, season, season_type, week, player_display_name, 
-                player_position, team_abbr, targets, receptions, yards, rec_touchdowns, 
-                avg_cushion, avg_separation, avg_intended_air_yards, percent_share_of_intended_air_yards,
-                avg_yac, avg_expected_yac, avg_yac_above_expectation, catch_percentage,
-                player_gsis_id, player_first_name, player_last_name, player_jersey_number, player_short_name
-            ) VALUES (
-                %(player_gsis_id)s, 
-                (SELECT id FROM players WHERE gsis_id = %(player_gsis_id)s LIMIT 1),
-                %(season)s, %(season_type)s, %(week)s, %(player_display_name)s,
-                %(player_position)s, %(team_abbr)s, %(targets)s, %(receptions)s, %(yards)s, %(rec_touchdowns)s,
-                %(avg_cushion)s, %(avg_separation)s, %(avg_intended_air_yards)s, %(percent_share_of_intended_air_yards)s,
-                %(avg_yac)s, %(avg_expected_yac)s, %(avg_yac_above_expectation)s, %(catch_percentage)s,
-                %(player_gsis_id)s, %(player_first_name)s, %(player_last_name)s, %(player_jersey_number)s, %(player_short_name)s
-            )
-            ON CONFLICT (gsis_id, season, season_type, week) 
-            DO UPDATE SET
-                player_id = (SELECT id FROM players WHERE gsis_id = EXCLUDED.gsis_id LIMIT 1),
-                player_display_name = EXCLUDED.player_display_name,
-                player_position = EXCLUDED.player_position,
-                team_abbr = EXCLUDED.team_abbr,
-                targets = EXCLUDED.targets,
-                receptions = EXCLUDED.receptions,
-                yards = EXCLUDED.yards,
-                rec_touchdowns = EXCLUDED.rec_touchdowns,
-                avg_cushion = EXCLUDED.avg_cushion,
-                avg_separation = EXCLUDED.avg_separation,
-                avg_intended_air_yards = EXCLUDED.avg_intended_air_yards,
-                percent_share_of_intended_air_yards = EXCLUDED.percent_share_of_intended_air_yards,
-                avg_yac = EXCLUDED.avg_yac,
-                avg_expected_yac = EXCLUDED.avg_expected_yac,
-                avg_yac_above_expectation = EXCLUDED.avg_yac_above_expectation,
-                catch_percentage = EXCLUDED.catch_percentage,
-                player_gsis_id = EXCLUDED.player_gsis_id,
-                player_first_name = EXCLUDED.player_first_name,
-                player_last_name = EXCLUDED.player_last_name,
-                player_jersey_number = EXCLUDED.player_jersey_number,
-                player_short_name = EXCLUDED.player_short_name
-            """
-        elif stat_type == 'rushing':
-            table_name = 'player_ngs_rushing'
-            insert_sql = f"""
-            INSERT INTO {table_name} (
-                gsis_id, player_id, season, season_type, week, player_display_name, 
-                player_position, team_abbr, rush_attempts, rush_yards, rush_touchdowns, 
-                avg_rush_yards, expected_rush_yards, rush_yards_over_expected, 
-                avg_time_to_los, percent_attempts_gte_eight_defenders, efficiency,
-                rush_yards_over_expected_per_att, rush_pct_over_expected,
-                player_gsis_id, player_first_name, player_last_name, player_jersey_number, player_short_name
-            ) VALUES (
-                %(player_gsis_id)s, 
-                (SELECT id FROM players WHERE gsis_id = %(player_gsis_id)s LIMIT 1),
-                %(season)s, %(season_type)s, %(week)s, %(player_display_name)s,
-                %(player_position)s, %(team_abbr)s, %(rush_attempts)s, %(rush_yards)s, %(rush_touchdowns)s,
-                %(avg_rush_yards)s, %(expected_rush_yards)s, %(rush_yards_over_expected)s,
-                %(avg_time_to_los)s, %(percent_attempts_gte_eight_defenders)s, %(efficiency)s,
-                %(rush_yards_over_expected_per_att)s, %(rush_pct_over_expected)s,
-                %(player_gsis_id)s, %(player_first_name)s, %(player_last_name)s, %(player_jersey_number)s, %(player_short_name)s
-            )
-            ON CONFLICT (gsis_id, season, season_type, week) 
-            DO UPDATE SET
-                player_id = (SELECT id FROM players WHERE gsis_id = EXCLUDED.gsis_id LIMIT 1),
-                player_display_name = EXCLUDED.player_display_name,
-                player_position = EXCLUDED.player_position,
-                team_abbr = EXCLUDED.team_abbr,
-                rush_attempts = EXCLUDED.rush_attempts,
-                rush_yards = EXCLUDED.rush_yards,
-                rush_touchdowns = EXCLUDED.rush_touchdowns,
-                avg_rush_yards = EXCLUDED.avg_rush_yards,
-                expected_rush_yards = EXCLUDED.expected_rush_yards,
-                rush_yards_over_expected = EXCLUDED.rush_yards_over_expected,
-                avg_time_to_los = EXCLUDED.avg_time_to_los,
-                percent_attempts_gte_eight_defenders = EXCLUDED.percent_attempts_gte_eight_defenders,
-                efficiency = EXCLUDED.efficiency,
-                rush_yards_over_expected_per_att = EXCLUDED.rush_yards_over_expected_per_att,
-                rush_pct_over_expected = EXCLUDED.rush_pct_over_expected,
-                player_gsis_id = EXCLUDED.player_gsis_id,
-                player_first_name = EXCLUDED.player_first_name,
-                player_last_name = EXCLUDED.player_last_name,
-                player_jersey_number = EXCLUDED.player_jersey_number,
-                player_short_name = EXCLUDED.player_short_name
-            """
+        table_name = NGS_TABLES[stat_type]
+        ngs_data = prepare_stat_frame(cursor, ngs_data, table_name)
+        ngs_data = validate_frame(ngs_data, table_name)
         
         inserted_count = 0
+        changes = new_change_set()
         
-        for index, row in ngs_data.iterrows():
-            try:
-                row_data = {col: None if pd.isna(row.get(col)) else row.get(col) for col in ngs_data.columns}
-                cursor.execute(insert_sql, row_data)
-                inserted_count += 1
-                
-            except Exception as e:
-                print(f"    Error inserting NGS {stat_type} row {index}: {e}")
-                continue
+        # Write each season straight into its partition
+        for partition_table, season, season_data in season_targets(cursor, table_name, ngs_data):
+            inserted_count += upsert_stat_frame(
+                cursor, season_data, partition_table, table_name, dry_run, changes
+            )
         
-        conn.commit()
-        print(f"  Imported {inserted_count} NGS {stat_type} records")
+        publish_changes(cursor, f'ngs_{stat_type}', changes)
+        finish_load(conn, dry_run)
+        print(f"  {'Would import' if dry_run else 'Imported'} {inserted_count} NGS {stat_type} records")
         
         cursor.close()
         conn.close()
@@ -847,6 +412,8 @@ def update_fantasy_projections(current_season):
     1. Fetch projections from multiple sources using cross-platform IDs
     2. Store in player_projections table
     3. Update weekly during season
+    
+    Blending the stored sources into the consensus is done (projection_blender).
     """
     print(f"  Updating fantasy projections for {current_season}...")
     print("  TODO: Implement fantasy projections import using cross-platform IDs")
@@ -854,7 +421,9 @@ def update_fantasy_projections(current_season):
     print("  - Yahoo API (yahoo_id)")
     print("  - Sleeper API (sleeper_id)")
     print("  - FantasyPros API (fantasy_data_id)")
-    return True
+    
+    # Combine whatever sources are stored into the consensus projection
+    return blend_projections(current_season)
 
 def update_player_props(current_season):
     """
@@ -887,44 +456,100 @@ def update_injury_reports(current_season):
 
 def main():
     """Main function for nightly update"""
+    parser = argparse.ArgumentParser(description="Nightly FFAngles data update")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Stage incoming data and print what would change without writing")
+    args = parser.parse_args()
+    
     print("FFAngles Nightly Update Script")
     print("=" * 50)
     print(f"Update started at: {datetime.now()}")
+    if args.dry_run:
+        print("DRY RUN: incoming data is diffed against live tables and rolled back")
     
     # Get current season (you can make this configurable)
     current_season = 2025
     
     success_count = 0
-    total_updates = 4  # Will be 7 when TODO items are implemented
+    total_updates = 15  # Will be 18 when TODO items are implemented
     
     print(f"\nUpdating data for {current_season} season...")
     
     print("\n1. Updating teams...")
-    if update_teams():
+    if update_teams(args.dry_run):
         success_count += 1
     
     print("\n2. Updating players...")
-    if update_players():
+    if update_players(args.dry_run):
         success_count += 1
     
     print(f"\n3. Updating games for {current_season}...")
-    if update_games(current_season):
+    if update_games(current_season, args.dry_run):
         success_count += 1
     
     print(f"\n4. Updating player statistics for {current_season}...")
-    if update_player_stats(current_season):
+    if update_player_stats(current_season, args.dry_run):
         success_count += 1
     
+    # Derived stages read the loaded tables, so there is nothing to diff yet
+    if args.dry_run:
+        print("\nDRY RUN: skipping derived stages 5-15 (ranks, defense vs position, play-by-play, EPA, snap counts, Parquet, similar players, prop hit rates, prop consensus, line movement, projection consensus)")
+        total_updates = 4
+    else:
+        print(f"\n5. Updating positional ranks for {current_season}...")
+        if update_positional_ranks([current_season]):
+            success_count += 1
+        
+        print(f"\n6. Updating defense vs position for {current_season}...")
+        if update_defense_vs_position([current_season]):
+            success_count += 1
+        
+        print(f"\n7. Updating play-by-play for {current_season}...")
+        if import_pbp_seasons([current_season]):
+            success_count += 1
+        
+        print(f"\n8. Updating EPA aggregates for {current_season}...")
+        if update_epa_aggregates([current_season]):
+            success_count += 1
+        
+        print(f"\n9. Updating snap counts for {current_season}...")
+        if import_snap_counts([current_season]):
+            success_count += 1
+        
+        print("\n10. Exporting Parquet snapshots...")
+        if export_parquet():
+            success_count += 1
+        
+        print("\n11. Rebuilding similar players index...")
+        if build_similarity_index():
+            success_count += 1
+        
+        print(f"\n12. Updating prop hit rates for {current_season}...")
+        if update_prop_hit_rates([current_season - 1, current_season]):
+            success_count += 1
+        
+        print("\n13. Updating no-vig prop consensus...")
+        if update_prop_consensus():
+            success_count += 1
+        
+        print("\n14. Tracking line movement...")
+        if track_line_movement():
+            success_count += 1
+        
+        print(f"\n15. Blending consensus projections for {current_season}...")
+        if blend_projections(current_season):
+            success_count += 1
+    
     # TODO: Uncomment these when implemented for 2025 season
-    # print(f"\n5. Updating fantasy projections for {current_season}...")
+    # print(f"\n16. Updating fantasy projections for {current_season}...")
     # if update_fantasy_projections(current_season):
     #     success_count += 1
     
-    # print(f"\n6. Updating player props for {current_season}...")
+    # print(f"\n17. Updating player props for {current_season}...")
     # if update_player_props(current_season):
     #     success_count += 1
     
-    # print(f"\n7. Updating injury reports for {current_season}...")
+    # print(f"\n18. Updating injury reports for {current_season}...")
     # if update_injury_reports(current_season):
     #     success_count += 1
     
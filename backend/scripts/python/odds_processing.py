@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+No-vig consensus odds for player props
+
+Bookmaker prices are American odds on both sides of a line. They are
+converted to decimal odds and implied probabilities; the two implied
+probabilities of a line add up to more than 1 by the bookmaker's hold, which
+is removed by scaling them back to 1 (the multiplicative no-vig method).
+Every step is a NumPy operation over all prices at once, so a season of
+polling snapshots is normalized in one pass.
+
+The consensus for a (player, market, event) uses each bookmaker's latest
+snapshot: the line is the median across bookmakers, and the fair over/under
+probability is the mean no-vig probability of the bookmakers offering that
+line (all bookmakers when none does).
+
+Prices come from player_game_props.raw_data (written by
+import-player-props.js) for the prop_consensus table, or straight from the
+odds-api-collector.js snapshot files with --files.
+"""
+
+import sys
+import json
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+from bulk_load import query_dataframe, upsert_dataframe
+from db import get_db_connection
+from prop_hit_rates import PROPS_TABLE, PROP_PLAYER_JOIN, props_table_exists
+
+CONSENSUS_KEYS = ['event_id', 'player_id', 'market']
+
+CONSENSUS_COLUMNS = [
+    'event_id', 'player_id', 'market', 'game_id', 'line', 'books', 'hold',
+    'over_probability', 'under_probability', 'fair_over_odds', 'fair_under_odds', 'last_update'
+]
+
+def american_to_decimal(odds):
+    """Decimal odds for American odds (+150 -> 2.5, -120 -> 1.833); NaN where invalid"""
+    odds = np.asarray(odds, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        decimal = np.where(odds > 0, 1 + odds / 100, 1 + 100 / -odds)
+    return np.where(np.abs(odds) >= 100, decimal, np.nan)
+
+def decimal_to_american(decimal):
+    """American odds for decimal odds, rounded to whole numbers; NaN where invalid"""
+    decimal = np.asarray(decimal, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        american = np.where(decimal >= 2, (decimal - 1) * 100, -100 / (decimal - 1))
+    return np.where(decimal > 1, np.round(american), np.nan)
+
+def implied_probability(decimal):
+    """Implied probability of decimal odds, vig included"""
+    return 1 / np.asarray(decimal, dtype=float)
+
+def remove_vig(over_probability, under_probability):
+    """
+    (fair_over, fair_under, hold) for paired implied probabilities.
+
+    The hold is the overround (sum - 1); the fair probabilities are the
+    implied ones scaled to sum to 1. A line missing either side is NaN.
+    """
+    total = np.asarray(over_probability, dtype=float) + np.asarray(under_probability, dtype=float)
+    return over_probability / total, under_probability / total, total - 1
+
+def normalize_odds(prices):
+    """
+    Add decimal odds, implied and no-vig probabilities and the hold to a price frame.
+
+    prices has over_price and under_price in American odds and over_point /
+    under_point; the line is the over point (the under point when there is
+    no over, as in import-player-props.js).
+    """
+    prices = prices.copy()
+    prices['line'] = prices['over_point'].fillna(prices['under_point'])
+    prices['over_decimal'] = american_to_decimal(prices['over_price'])
+    prices['under_decimal'] = american_to_decimal(prices['under_price'])
+    prices['over_implied'] = implied_probability(prices['over_decimal'])
+    prices['under_implied'] = implied_probability(prices['under_decimal'])
+    prices['over_fair'], prices['under_fair'], prices['hold'] = remove_vig(
+        prices['over_implied'].to_numpy(), prices['under_implied'].to_numpy()
+    )
+    return prices
+
+def latest_per_bookmaker(prices, keys=CONSENSUS_KEYS):
+    """Each bookmaker's most recent price for every key"""
+    return (prices.sort_values('last_update')
+                  .drop_duplicates(subset=list(keys) + ['bookmaker'], keep='last'))
+
+def consensus(normalized, keys=CONSENSUS_KEYS):
+    """
+    No-vig consensus per key across bookmakers.
+
+    normalized is the output of normalize_odds with one row per bookmaker
+    (see latest_per_bookmaker). Only two-sided lines are used.
+    """
+    keys = list(keys)
+    priced = normalized.dropna(subset=['line', 'over_fair'])
+    if len(priced) == 0:
+        return pd.DataFrame(columns=keys + CONSENSUS_COLUMNS[3:])
+
+    group = priced.groupby(keys)
+    line = group['line'].transform('median')
+    # Books offering the consensus line; when the median falls between lines, all books
+    at_line = priced['line'] == line
+    use = at_line | ~at_line.groupby([priced[key] for key in keys]).transform('any')
+
+    chosen = priced[use]
+    summary = chosen.groupby(keys).agg(
+        line=('line', 'median'),
+        books=('bookmaker', 'nunique'),
+        hold=('hold', 'mean'),
+        over_probability=('over_fair', 'mean'),
+        last_update=('last_update', 'max')
+    )
+    summary['under_probability'] = 1 - summary['over_probability']
+    summary['fair_over_odds'] = decimal_to_american(1 / summary['over_probability'])
+    summary['fair_under_odds'] = decimal_to_american(1 / summary['under_probability'])
+    return summary.reset_index()
+
+def load_stored_prices(cursor, game_ids=None, since=None):
+    """
+    Bookmaker prices from player_game_props.raw_data, one row per (player, game, bookmaker, market).
+
+    since limits the rows to props imported after that time.
+    """
+    return query_dataframe(cursor, f"""
+        SELECT p.event_id, pl.id AS player_id, p.game_id, p.bookmaker, p.last_update, p.imported_at,
+               m.key AS market,
+               (m.value->>'over_point')::real AS over_point,
+               (m.value->>'under_point')::real AS under_point,
+               (m.value->>'over_price')::real AS over_price,
+               (m.value->>'under_price')::real AS under_price
+        FROM {PROPS_TABLE} p
+        {PROP_PLAYER_JOIN}
+        CROSS JOIN LATERAL jsonb_each(p.raw_data::jsonb) AS m
+        WHERE (%(games)s::text[] IS NULL OR p.game_id = ANY(%(games)s))
+          AND (%(since)s::timestamp IS NULL OR p.imported_at > %(since)s)
+    """, {'games': list(game_ids) if game_ids else None, 'since': since}, dtype={'game_id': 'string'})
+
+def read_snapshot_files(paths):
+    """
+    Bookmaker prices from odds-api-collector.js player-props-*.json snapshots.
+
+    Players are identified by the bookmaker's name for them (player_id holds
+    the name). The market's last_update is the snapshot time.
+    """
+    rows = []
+    for path in paths:
+        with open(path) as f:
+            snapshot = json.load(f)
+        for event in snapshot.values():
+            if not isinstance(event, dict):
+                continue
+            for bookmaker in event.get('bookmakers', []):
+                for market in bookmaker.get('markets', []):
+                    sides = {}
+                    for outcome in market.get('outcomes', []):
+                        side = sides.setdefault(outcome.get('description'), {})
+                        prefix = 'over' if outcome.get('name') == 'Over' else 'under'
+                        side[f"{prefix}_point"] = outcome.get('point')
+                        side[f"{prefix}_price"] = outcome.get('price')
+                    for player, side in sides.items():
+                        rows.append({
+                            'event_id': event.get('id'), 'player_id': player, 'market': market['key'],
+                            'bookmaker': bookmaker['key'],
+                            'last_update': market.get('last_update') or bookmaker.get('last_update'),
+                            **side
+                        })
+
+    columns = CONSENSUS_KEYS + ['bookmaker', 'last_update', 'over_point', 'under_point',
+                                'over_price', 'under_price']
+    return pd.DataFrame(rows, columns=columns)
+
+def create_consensus_table(cursor):
+    """Create the prop consensus table if it does not exist"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS prop_consensus (
+            event_id VARCHAR(64) NOT NULL,
+            player_id INTEGER NOT NULL,
+            market VARCHAR(40) NOT NULL,
+            game_id VARCHAR(20),
+            line REAL NOT NULL,
+            books SMALLINT NOT NULL,
+            hold REAL,
+            over_probability REAL NOT NULL,
+            under_probability REAL NOT NULL,
+            fair_over_odds SMALLINT,
+            fair_under_odds SMALLINT,
+            last_update TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (event_id, player_id, market)
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_prop_consensus_game
+            ON prop_consensus(game_id, player_id);
+    """)
+
+def update_prop_consensus(game_ids=None):
+    """Recompute the no-vig consensus of the stored props (default: every game)"""
+    print("Updating no-vig prop consensus...")
+
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        if not props_table_exists(cursor):
+            print(f"  {PROPS_TABLE} does not exist yet, nothing to do")
+            cursor.close()
+            conn.close()
+            return True
+
+        create_consensus_table(cursor)
+
+        prices = load_stored_prices(cursor, game_ids)
+        games = prices.drop_duplicates(CONSENSUS_KEYS)[CONSENSUS_KEYS + ['game_id']]
+        result = consensus(normalize_odds(latest_per_bookmaker(prices)))
+        result = result.merge(games, on=CONSENSUS_KEYS, how='left')
+
+        count = upsert_dataframe(cursor, result, 'prop_consensus', CONSENSUS_KEYS, CONSENSUS_COLUMNS)
+        conn.commit()
+        print(f"  {len(prices)} prices -> {len(result)} consensus lines ({count} changed)")
+
+        cursor.close()
+        conn.close()
+        return True
+
+    except Exception as e:
+        print(f"  Error updating prop consensus: {e}")
+        return False
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="No-vig consensus odds for player props")
+    parser.add_argument('--games', nargs='+', help="game_ids to recompute (default: all stored props)")
+    parser.add_argument('--files', nargs='+',
+                        help="Summarize odds-api-collector.js snapshot files instead of the database")
+    args = parser.parse_args()
+
+    print("FFAngles Odds Processing")
+    print("=" * 40)
+    print(f"Started at: {datetime.now()}")
+
+    if args.files:
+        started = datetime.now()
+        prices = read_snapshot_files(args.files)
+        result = consensus(normalize_odds(latest_per_bookmaker(prices)))
+        elapsed = (datetime.now() - started).total_seconds()
+        print(f"\n{len(prices)} prices from {len(args.files)} files -> "
+              f"{len(result)} consensus lines in {elapsed:.2f}s\n")
+        print(result[['player_id', 'market', 'line', 'books', 'hold', 'over_probability',
+                      'fair_over_odds', 'fair_under_odds']].round(3).to_string(index=False))
+        return
+
+    if update_prop_consensus(args.games):
+        print("\nProp consensus updated successfully!")
+    else:
+        print("\nProp consensus update failed!")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
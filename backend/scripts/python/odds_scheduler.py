@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Kickoff-prioritized, quota-aware player props collection from The Odds API
+
+Meant to run every few minutes (cron). Each run:
+
+1. reads upcoming games from games.gameday/gametime, skipping games that are
+   completed or already kicked off, and matches them to Odds API events
+   (the events endpoint costs no quota);
+2. marks an event due when its last poll is older than the interval for its
+   time to kickoff (POLL_SCHEDULE: every 15 minutes in the last 3 hours, daily
+   a week out);
+3. paces the remaining quota of each API key evenly until the monthly reset:
+   every run adds remaining / runs-left to the key's credit, and due events,
+   closest kickoff first, are fetched while a key has credit for them;
+4. fetches the planned events concurrently, never starting more than
+   HOST_RATE_LIMITS requests per second per host.
+
+Snapshots are written in the odds-api-collector.js layout
+(player-props-<event>.json plus nfl-events.json), so import-player-props.js
+and odds_processing.py --files read them unchanged; --import runs the
+importer and streams the new lines into line_movement.py afterwards.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import calendar
+import argparse
+import subprocess
+import threading
+import numpy as np
+import pandas as pd
+import requests
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+from bulk_load import query_dataframe, upsert_dataframe
+from db import get_db_connection
+from line_movement import KICKOFF_SQL, track_line_movement
+
+ODDS_API_HOST = 'api.the-odds-api.com'
+SPORT = 'americanfootball_nfl'
+REGIONS = 'us'
+MARKETS = ['player_pass_yds', 'player_reception_yds', 'player_rush_yds']
+
+# Quota cost of one event request: markets x regions
+REQUEST_COST = len(MARKETS) * len(REGIONS.split(','))
+
+API_KEYS = [key for key in (os.getenv('ODDS_API_KEY'), os.getenv('ODDS_API_KEY_2')) if key]
+
+# Assumed remaining requests of a key that has not answered yet (free tier)
+MONTHLY_QUOTA = int(os.getenv('ODDS_API_MONTHLY_QUOTA', '500'))
+
+# Day of the month the quota resets
+QUOTA_RESET_DAY = int(os.getenv('ODDS_API_RESET_DAY', '1'))
+
+# Share of the remaining quota never planned, for manual runs and retries
+QUOTA_RESERVE = 0.05
+
+# Credit a key may bank, in event requests (a full Sunday slate)
+MAX_CREDIT_EVENTS = 16
+
+# (time to kickoff under, poll every), checked in order; games further out poll daily
+POLL_SCHEDULE = [
+    (timedelta(hours=3), timedelta(minutes=15)),
+    (timedelta(hours=24), timedelta(hours=1)),
+    (timedelta(days=3), timedelta(hours=6))
+]
+DEFAULT_POLL_INTERVAL = timedelta(days=1)
+
+# Games further out are not polled at all
+HORIZON = timedelta(days=7)
+
+MAX_CONCURRENCY = 4
+
+# Requests started per second, per host
+HOST_RATE_LIMITS = {ODDS_API_HOST: 2.0}
+
+DATA_DIR = os.getenv('ODDS_DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                   '..', 'nodejs', 'data'))
+
+_host_slots = {}
+_host_slots_lock = threading.Lock()
+
+def throttle(host):
+    """Block until the host's rate limit allows another request to start"""
+    interval = 1 / HOST_RATE_LIMITS.get(host, 1.0)
+    with _host_slots_lock:
+        slot = _host_slots.setdefault(host, {'lock': threading.Lock(), 'next': 0.0})
+
+    with slot['lock']:
+        now = time.monotonic()
+        start = max(now, slot['next'])
+        slot['next'] = start + interval
+    time.sleep(max(0.0, start - now))
+
+def create_scheduler_tables(cursor):
+    """Create the poll state and quota tables if they do not exist"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS odds_poll_state (
+            event_id VARCHAR(64) PRIMARY KEY,
+            game_id VARCHAR(50) NOT NULL,
+            last_polled_at TIMESTAMPTZ NOT NULL,
+            polls INTEGER NOT NULL DEFAULT 0,
+            last_status VARCHAR(40)
+        );
+
+        CREATE TABLE IF NOT EXISTS odds_api_quota (
+            key_index SMALLINT PRIMARY KEY,
+            remaining INTEGER,
+            credit REAL NOT NULL DEFAULT 0,
+            checked_at TIMESTAMPTZ
+        );
+    """)
+
+def poll_interval(time_to_kickoff):
+    """Poll interval for each time to kickoff (Series of Timedelta)"""
+    conditions = [time_to_kickoff < limit for limit, _ in POLL_SCHEDULE]
+    intervals = [interval for _, interval in POLL_SCHEDULE]
+    return pd.to_timedelta(np.select(conditions, intervals, DEFAULT_POLL_INTERVAL))
+
+def load_upcoming_games(cursor, now):
+    """Games kicking off within HORIZON that are not completed, with full team names"""
+    games = query_dataframe(cursor, f"""
+        SELECT g.game_id, ht.team_name AS home_name, at.team_name AS away_name,
+               {KICKOFF_SQL} AS kickoff
+        FROM games g
+        JOIN teams ht ON ht.team_abbr = g.home_team
+        JOIN teams at ON at.team_abbr = g.away_team
+        WHERE g.home_score IS NULL
+          AND {KICKOFF_SQL} > %(now)s
+          AND {KICKOFF_SQL} < %(until)s
+    """, {'now': now, 'until': now + HORIZON}, dtype={'game_id': str})
+    games['kickoff'] = pd.to_datetime(games['kickoff'], utc=True)
+    return games
+
+def match_events(games, events):
+    """Games joined to Odds API events by team names and a commence time within a day of kickoff"""
+    events = pd.DataFrame(events, columns=['id', 'home_team', 'away_team', 'commence_time'])
+    events['commence_time'] = pd.to_datetime(events['commence_time'], utc=True)
+    matched = games.merge(events, left_on=['home_name', 'away_name'], right_on=['home_team', 'away_team'])
+    close = (matched['commence_time'] - matched['kickoff']).abs() < timedelta(days=1)
+    return matched[close].rename(columns={'id': 'event_id'})[['event_id', 'game_id', 'kickoff']]
+
+def load_poll_state(cursor):
+    """Last poll of every event"""
+    state = query_dataframe(cursor, "SELECT event_id, last_polled_at, polls FROM odds_poll_state")
+    state['last_polled_at'] = pd.to_datetime(state['last_polled_at'], utc=True)
+    return state
+
+def due_events(events, state, now):
+    """Events whose poll interval has passed, closest kickoff first"""
+    events = events.merge(state, on='event_id', how='left')
+    events['interval'] = poll_interval(events['kickoff'] - now)
+    due = events['last_polled_at'].isna() | (now - events['last_polled_at'] >= events['interval'])
+    return events[due].sort_values('kickoff')
+
+def quota_reset_date(year, month):
+    """Midnight of the reset day in a month, on its last day when the month is shorter"""
+    day = min(QUOTA_RESET_DAY, calendar.monthrange(year, month)[1])
+    return datetime(year, month, day)
+
+def runs_until_reset(now, run_interval):
+    """Scheduled runs left before the quota resets"""
+    reset = quota_reset_date(now.year, now.month).replace(tzinfo=now.tzinfo)
+    if reset <= now:
+        month = now.month % 12 + 1
+        reset = quota_reset_date(now.year + (month == 1), month).replace(tzinfo=now.tzinfo)
+    return max(1.0, (reset - now) / run_interval)
+
+def load_quota(cursor):
+    """{key_index: {'remaining', 'credit'}} for every configured API key"""
+    cursor.execute("SELECT key_index, remaining, credit FROM odds_api_quota")
+    stored = {row[0]: {'remaining': row[1], 'credit': row[2]} for row in cursor.fetchall()}
+    return {
+        index: stored.get(index, {'remaining': None, 'credit': 0.0})
+        for index in range(len(API_KEYS))
+    }
+
+def accrue_credit(quota, runs_left):
+    """Add each key's share of its remaining quota for this run, capped at MAX_CREDIT_EVENTS"""
+    for key in quota.values():
+        remaining = MONTHLY_QUOTA if key['remaining'] is None else key['remaining']
+        allowance = remaining * (1 - QUOTA_RESERVE) / runs_left
+        key['credit'] = min(key['credit'] + allowance, MAX_CREDIT_EVENTS * REQUEST_COST, remaining)
+    return quota
+
+def plan_requests(due, quota):
+    """Assign due events to API keys with enough credit, in priority order; returns [(event_id, key_index)]"""
+    plan = []
+    for event_id in due['event_id']:
+        key_index = next((i for i, key in quota.items() if key['credit'] >= REQUEST_COST), None)
+        if key_index is None:
+            break
+        quota[key_index]['credit'] -= REQUEST_COST
+        plan.append((event_id, key_index))
+    return plan
+
+def fetch_event_odds(event_id, key_index):
+    """Fetch one event's player props (all markets in one request); returns a result dict"""
+    throttle(ODDS_API_HOST)
+    try:
+        response = requests.get(
+            f"https://{ODDS_API_HOST}/v4/sports/{SPORT}/events/{event_id}/odds",
+            params={'apiKey': API_KEYS[key_index], 'regions': REGIONS,
+                    'markets': ','.join(MARKETS), 'oddsFormat': 'american'},
+            timeout=30
+        )
+        remaining = response.headers.get('x-requests-remaining')
+        result = {
+            'event_id': event_id, 'key_index': key_index, 'status': str(response.status_code),
+            'remaining': int(float(remaining)) if remaining is not None else None, 'data': None
+        }
+        if response.status_code == 200:
+            result['data'] = response.json()
+        return result
+    except Exception as e:
+        return {'event_id': event_id, 'key_index': key_index, 'status': f"error: {e}"[:40],
+                'remaining': None, 'data': None}
+
+def fetch_events(key_index=0):
+    """Upcoming NFL events (does not count against the quota)"""
+    throttle(ODDS_API_HOST)
+    response = requests.get(f"https://{ODDS_API_HOST}/v4/sports/{SPORT}/events",
+                            params={'apiKey': API_KEYS[key_index]}, timeout=30)
+    response.raise_for_status()
+    return response.json()
+
+def save_json(data, filename, data_dir=DATA_DIR):
+    """Write data as the collector does, with an imported_at timestamp"""
+    os.makedirs(data_dir, exist_ok=True)
+    if isinstance(data, list):
+        data = dict(enumerate(data))
+    with open(os.path.join(data_dir, f"{filename}.json"), 'w') as f:
+        json.dump({**data, 'imported_at': datetime.now(timezone.utc).isoformat()}, f, indent=2)
+
+def save_event_snapshot(event_id, data, data_dir=DATA_DIR):
+    """Split a multi-market response into the collector's per-market file layout"""
+    by_market = {}
+    for market in MARKETS:
+        bookmakers = [
+            {**bookmaker, 'markets': [m for m in bookmaker.get('markets', []) if m['key'] == market]}
+            for bookmaker in data.get('bookmakers', [])
+        ]
+        bookmakers = [bookmaker for bookmaker in bookmakers if bookmaker['markets']]
+        if bookmakers:
+            by_market[market] = {**data, 'bookmakers': bookmakers}
+
+    if by_market:
+        save_json(by_market, f"player-props-{re.sub(r'[^a-zA-Z0-9]', '-', event_id)}", data_dir)
+    return len(by_market)
+
+def store_results(cursor, results, events, quota, now):
+    """Record poll times and each key's quota and leftover credit (credit is banked even without polls)"""
+    polled = pd.DataFrame([
+        {'event_id': r['event_id'], 'last_status': r['status']} for r in results
+    ], columns=['event_id', 'last_status'])
+    polled = polled.merge(events[['event_id', 'game_id', 'polls']], on='event_id', how='left')
+    polled['last_polled_at'] = now
+    polled['polls'] = polled['polls'].fillna(0).astype(int) + 1
+    upsert_dataframe(cursor, polled, 'odds_poll_state', ['event_id'],
+                     ['event_id', 'game_id', 'last_polled_at', 'polls', 'last_status'])
+
+    for r in results:
+        if r['remaining'] is not None:
+            quota[r['key_index']]['remaining'] = r['remaining']
+    for key_index, key in quota.items():
+        cursor.execute("""
+            INSERT INTO odds_api_quota (key_index, remaining, credit, checked_at)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (key_index) DO UPDATE SET
+                remaining = EXCLUDED.remaining,
+                credit = EXCLUDED.credit,
+                checked_at = EXCLUDED.checked_at
+        """, (key_index, key['remaining'], key['credit'], now))
+
+def run_schedule(run_interval=timedelta(minutes=10), dry_run=False, import_props=False, data_dir=DATA_DIR):
+    """Poll the due events this run's share of the quota allows"""
+    print("Scheduling odds collection...")
+
+    if not API_KEYS:
+        print("  No API keys, set ODDS_API_KEY in .env")
+        return False
+
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        create_scheduler_tables(cursor)
+        now = datetime.now(timezone.utc)
+
+        games = load_upcoming_games(cursor, now)
+        events = fetch_events()
+        save_json(events, 'nfl-events', data_dir)
+        matched = match_events(games, events)
+        due = due_events(matched, load_poll_state(cursor), now)
+
+        quota = accrue_credit(load_quota(cursor), runs_until_reset(now, run_interval))
+        plan = plan_requests(due, quota)
+        print(f"  {len(games)} upcoming games, {len(matched)} with events, {len(due)} due, "
+              f"{len(plan)} planned ({len(plan) * REQUEST_COST} requests)")
+        for key_index, key in quota.items():
+            print(f"  Key #{key_index + 1}: {key['remaining'] if key['remaining'] is not None else 'unknown'} "
+                  f"remaining, {key['credit']:.1f} credit left")
+
+        if dry_run:
+            print(due.head(len(plan) or 10)[['event_id', 'game_id', 'kickoff', 'interval']].to_string(index=False))
+            conn.rollback()
+            cursor.close()
+            conn.close()
+            return True
+
+        results = []
+        if plan:
+            with ThreadPoolExecutor(max_workers=MAX_CONCURRENCY) as executor:
+                results = list(executor.map(lambda item: fetch_event_odds(*item), plan))
+
+        saved = sum(1 for r in results if r['data'] and save_event_snapshot(r['event_id'], r['data'], data_dir))
+        failed = [r for r in results if r['status'] != '200']
+        for r in failed:
+            print(f"  {r['event_id']}: {r['status']}")
+
+        store_results(cursor, results, due, quota, now)
+        conn.commit()
+        print(f"  Fetched {len(results) - len(failed)} events, saved {saved} snapshots to {data_dir}")
+
+        cursor.close()
+        conn.close()
+
+        if import_props and saved:
+            nodejs_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'nodejs')
+            subprocess.run(['node', 'import-player-props.js'], cwd=nodejs_dir, check=True)
+            return track_line_movement()
+        return True
+
+    except Exception as e:
+        print(f"  Error scheduling odds collection: {e}")
+        return False
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Poll The Odds API for player props, closest kickoffs first")
+    parser.add_argument('--interval', type=int, default=10,
+                        help="Minutes between scheduled runs, used to pace the quota (default: 10)")
+    parser.add_argument('--dry-run', action='store_true', help="Print the plan without fetching props")
+    parser.add_argument('--import', dest='import_props', action='store_true',
+                        help="Import the snapshots and track line movement afterwards")
+    args = parser.parse_args()
+
+    print("FFAngles Odds Scheduler")
+    print("=" * 40)
+    print(f"Started at: {datetime.now()}")
+
+    if run_schedule(timedelta(minutes=args.interval), args.dry_run, args.import_props):
+        print("\nOdds collection completed successfully!")
+    else:
+        print("\nOdds collection failed!")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -3,43 +3,21 @@
 Populate gsis_id column in players table using Sleeper API mapping
 """
 
-import os
 import sys
-import psycopg2
-import requests
-import json
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
-
-# Database connection configuration
-DB_CONFIG = {
-    'host': os.getenv('DB_HOST', 'localhost'),
-    'database': os.getenv('DB_NAME', 'ff_angles'),
-    'user': os.getenv('DB_USER', 'postgres'),
-    'password': os.getenv('DB_PASSWORD', 'password'),
-    'port': os.getenv('DB_PORT', '5432')
-}
-
-def get_db_connection():
-    """Create database connection"""
-    try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        return conn
-    except Exception as e:
-        print(f"Error connecting to database: {e}")
-        sys.exit(1)
+import sleeper_sync
+from bulk_load import update_from_values
+from db import get_db_connection
+from schema_catalog import load_schema_catalog, table_columns
 
 def fetch_sleeper_players():
-    """Fetch all players from Sleeper API"""
+    """Fetch all players from Sleeper API (the sync snapshot when unchanged)"""
     print("Fetching players from Sleeper API...")
     
     try:
-        response = requests.get('https://api.sleeper.app/v1/players/nfl', timeout=30)
-        response.raise_for_status()
-        
-        players_data = response.json()
+        # Conditional on the sleeper_sync snapshot, which is left for that sync to replace
+        snapshot, _ = sleeper_sync.fetch_sleeper_players(sleeper_sync.load_snapshot())
+        players_data = snapshot['players']
         print(f"Fetched {len(players_data)} players from Sleeper API")
         
         return players_data
@@ -57,42 +35,50 @@ def populate_gsis_ids():
     if not sleeper_players:
         return False
     
-    # Connect to database
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
     # Create mapping of sleeper_bot_id -> gsis_id for active NFL players
     sleeper_gsis_map = {}
     for sleeper_id, player_data in sleeper_players.items():
         if (player_data.get('sport') == 'nfl' and 
             player_data.get('gsis_id') and 
             player_data.get('active')):
-            sleeper_gsis_map[sleeper_id] = player_data.get('gsis_id')
+            sleeper_gsis_map[sleeper_id] = str(player_data.get('gsis_id')).strip()
     
-    print(f"Found {len(sleeper_gsis_map)} active NFL players with GSIS IDs")
+    # players.gsis_id is UNIQUE, so a gsis_id shared by several Sleeper entries is skipped
+    gsis_counts = {}
+    for gsis_id in sleeper_gsis_map.values():
+        gsis_counts[gsis_id] = gsis_counts.get(gsis_id, 0) + 1
+    duplicates = {gsis_id for gsis_id, count in gsis_counts.items() if count > 1}
+    rows = [(sleeper_id, gsis_id) for sleeper_id, gsis_id in sleeper_gsis_map.items()
+            if gsis_id not in duplicates]
     
-    # Update players table with GSIS IDs
-    update_sql = """
-    UPDATE players 
-    SET gsis_id = %s 
-    WHERE sleeper_bot_id = %s 
-    AND gsis_id IS NULL
-    """
+    print(f"Found {len(sleeper_gsis_map)} active NFL players with GSIS IDs")
+    if duplicates:
+        print(f"  [SKIP] {len(duplicates)} GSIS IDs listed for more than one Sleeper player")
     
-    updated_count = 0
+    conn = get_db_connection()
+    cursor = conn.cursor()
     
-    for sleeper_id, gsis_id in sleeper_gsis_map.items():
-        try:
-            cursor.execute(update_sql, (gsis_id, sleeper_id))
-            if cursor.rowcount > 0:
-                updated_count += 1
-        except Exception as e:
-            print(f"Error updating player {sleeper_id}: {e}")
-            continue
+    try:
+        # One set-based UPDATE for every mapped player, skipping GSIS ids already on another player
+        updated_count, errors = update_from_values(cursor, """
+            UPDATE players p
+            SET gsis_id = v.gsis_id
+            FROM (VALUES %s) AS v(sleeper_id, gsis_id)
+            WHERE p.sleeper_bot_id::text = v.sleeper_id
+            AND p.gsis_id IS NULL
+            AND NOT EXISTS (SELECT 1 FROM players q WHERE q.gsis_id = v.gsis_id)
+        """, rows)
+        conn.commit()
+        print(f"Updated {updated_count} players with GSIS IDs")
+        for (sleeper_id, gsis_id), message in errors:
+            print(f"  [ERROR] Sleeper {sleeper_id} -> {gsis_id}: {message}")
     
-    # Commit transaction
-    conn.commit()
-    print(f"Updated {updated_count} players with GSIS IDs")
+    except Exception as e:
+        print(f"Error updating GSIS IDs: {e}")
+        conn.rollback()
+        cursor.close()
+        conn.close()
+        return False
     
     # Show mapping results
     cursor.execute("""
@@ -108,14 +94,7 @@ def populate_gsis_ids():
         print(f"Players table mapping: {result[1]}/{result[0]} players have GSIS IDs ({result[2]}%)")
     
     # Show sample of updated players - first check what columns exist
-    cursor.execute("""
-        SELECT column_name 
-        FROM information_schema.columns 
-        WHERE table_name = 'players' 
-        ORDER BY ordinal_position
-    """)
-    
-    columns = [row[0] for row in cursor.fetchall()]
+    columns = [col for col, _ in table_columns(load_schema_catalog(cursor), 'players')]
     print(f"\nAvailable columns in players table: {columns}")
     
     # Try to show sample with common column patterns
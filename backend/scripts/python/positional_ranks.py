@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Compute positional ranks and percentiles for every weekly stat
+
+For each (season, week, position) every numeric stat in player_weekly_stats is
+ranked three ways: that week's value, the average over the player's last five
+games (L5) and the season-to-date average (STD). All windows and stats are
+ranked in a single groupby-rank over one long DataFrame and stored in
+player_stat_ranks, so "WR12" or "85th pct" on a player card is a lookup.
+"""
+
+import sys
+import argparse
+import pandas as pd
+from datetime import datetime
+
+from bulk_load import copy_dataframe, query_dataframe
+from db import get_db_connection
+
+# Numeric columns of player_weekly_stats that get ranked
+RANK_STATS = [
+    'completions', 'attempts', 'passing_yards', 'passing_tds', 'interceptions',
+    'sacks', 'sack_yards', 'carries', 'rushing_yards', 'rushing_tds',
+    'rushing_fumbles', 'rushing_fumbles_lost', 'receptions', 'targets',
+    'receiving_yards', 'receiving_tds', 'receiving_fumbles', 'receiving_fumbles_lost',
+    'passing_epa', 'rushing_epa', 'receiving_epa', 'racr', 'target_share',
+    'air_yards_share', 'wopr', 'fantasy_points', 'fantasy_points_ppr'
+]
+
+# Stats where a smaller value is the better one (rank 1 = fewest)
+LOWER_IS_BETTER = {
+    'interceptions', 'sacks', 'sack_yards', 'rushing_fumbles', 'rushing_fumbles_lost',
+    'receiving_fumbles', 'receiving_fumbles_lost'
+}
+
+FANTASY_POSITIONS = ['QB', 'RB', 'WR', 'TE', 'K']
+
+RANK_WINDOW = 5  # games in the L5 window
+
+def create_rank_table(cursor):
+    """Create the compact rank table if it does not exist"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS player_stat_ranks (
+            player_id INTEGER NOT NULL,
+            season SMALLINT NOT NULL,
+            week SMALLINT NOT NULL,
+            position VARCHAR(5) NOT NULL,
+            time_window VARCHAR(4) NOT NULL,
+            stat VARCHAR(40) NOT NULL,
+            value REAL,
+            pos_rank SMALLINT NOT NULL,
+            percentile REAL NOT NULL,
+            PRIMARY KEY (season, week, position, time_window, stat, player_id)
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_player_stat_ranks_player
+            ON player_stat_ranks(player_id, season, week);
+    """)
+
+def load_weekly_stats(cursor, seasons):
+    """Load regular season weekly stats with each player's position"""
+    stat_columns = ', '.join(f"w.{stat}" for stat in RANK_STATS)
+    return query_dataframe(cursor, f"""
+        SELECT w.player_id, p.position, w.season, w.week, {stat_columns}
+        FROM player_weekly_stats w
+        JOIN players p ON p.id = w.player_id
+        WHERE w.season = ANY(%s)
+          AND w.season_type = 'REG'
+          AND p.position = ANY(%s)
+    """, (list(seasons), FANTASY_POSITIONS))
+
+def build_windows(weekly):
+    """
+    Build the week, L5 and season-to-date values for every player-week.
+
+    Returns one long frame with columns
+    (player_id, position, season, week, time_window, stat, value).
+    """
+    weekly = weekly.sort_values(['player_id', 'season', 'week']).reset_index(drop=True)
+    keys = weekly[['player_id', 'position', 'season', 'week']]
+    stats = weekly[RANK_STATS].astype('float64')
+    by_player_season = stats.groupby([weekly['player_id'], weekly['season']])
+
+    # Rolling and expanding means over games played, aligned back to each row
+    l5 = by_player_season.rolling(RANK_WINDOW, min_periods=1).mean().reset_index(level=[0, 1], drop=True)
+    season_to_date = by_player_season.expanding().mean().reset_index(level=[0, 1], drop=True)
+
+    windows = []
+    for window_name, values in (('week', stats), ('l5', l5.sort_index()), ('std', season_to_date.sort_index())):
+        frame = pd.concat([keys, values], axis=1)
+        frame['time_window'] = window_name
+        windows.append(frame)
+
+    long = pd.concat(windows, ignore_index=True).melt(
+        id_vars=['player_id', 'position', 'season', 'week', 'time_window'],
+        value_vars=RANK_STATS,
+        var_name='stat',
+        value_name='value'
+    )
+    return long.dropna(subset=['value'])
+
+def compute_ranks(long):
+    """Rank every (season, week, position, window, stat) group in one pass"""
+    # Flip lower-is-better stats so a descending rank always puts the best first
+    sort_value = long['value'].where(~long['stat'].isin(LOWER_IS_BETTER), -long['value'])
+    groups = sort_value.groupby([long['season'], long['week'], long['position'],
+                                 long['time_window'], long['stat']])
+
+    ranked = long.copy()
+    ranked['pos_rank'] = groups.rank(method='min', ascending=False).astype('int16')
+    ranked['percentile'] = (groups.rank(method='max', pct=True) * 100).round(1).astype('float32')
+    ranked['value'] = ranked['value'].astype('float32')
+    ranked['season'] = ranked['season'].astype('int16')
+    ranked['week'] = ranked['week'].astype('int16')
+    return ranked
+
+def update_positional_ranks(seasons):
+    """Recompute and store positional ranks for the given seasons"""
+    print(f"Computing positional ranks for seasons: {seasons}")
+
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        create_rank_table(cursor)
+
+        weekly = load_weekly_stats(cursor, seasons)
+        print(f"  Loaded {len(weekly)} player-weeks")
+
+        if len(weekly) == 0:
+            conn.commit()
+            cursor.close()
+            conn.close()
+            return True
+
+        ranked = compute_ranks(build_windows(weekly))
+        print(f"  Computed {len(ranked)} ranks across {len(RANK_STATS)} stats")
+
+        # Replace whole seasons so stale rows never linger
+        cursor.execute("DELETE FROM player_stat_ranks WHERE season = ANY(%s)", (list(seasons),))
+        copy_dataframe(cursor, ranked, 'player_stat_ranks', [
+            'player_id', 'season', 'week', 'position', 'time_window',
+            'stat', 'value', 'pos_rank', 'percentile'
+        ])
+
+        conn.commit()
+        print(f"  Stored {len(ranked)} positional ranks")
+
+        cursor.close()
+        conn.close()
+        return True
+
+    except Exception as e:
+        print(f"  Error computing positional ranks: {e}")
+        return False
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Compute positional ranks and percentiles")
+    parser.add_argument('--seasons', type=int, nargs='+', default=[2025],
+                        help="Seasons to recompute (default: 2025)")
+    args = parser.parse_args()
+
+    print("FFAngles Positional Rank Engine")
+    print("=" * 40)
+    print(f"Started at: {datetime.now()}")
+
+    if update_positional_ranks(args.seasons):
+        print("\nPositional ranks updated successfully!")
+    else:
+        print("\nPositional rank update failed!")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Backtest stored projections against actual weekly stats
+
+Every source in player_projections (including the blended 'consensus') is
+joined with player_weekly_stats by player_id, season and week. Errors are
+reduced per (season, week, source, position, stat) to sufficient statistics
+(count, sum of errors, absolute errors and squared errors) in
+projection_backtest, so MAE, RMSE and bias for any grouping are a small SQL
+aggregate and never touch the raw rows again.
+
+Each week's inputs are keyed by a hash of its projections joined with their
+actuals; a rerun only recomputes weeks whose key changed, so after a new
+week lands (or a week is re-blended or corrected) only that week is
+backtested. Seasons are
+computed in parallel, one process and connection each.
+"""
+
+import sys
+import argparse
+import pandas as pd
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+from bulk_load import copy_dataframe, query_dataframe
+from db import get_db_connection
+from projections import PROJECTION_STATS, create_projections_table
+
+MAX_WORKERS = 4
+
+# Dimensions a summary can be grouped by
+SUMMARY_GROUPS = ['source', 'position', 'week', 'season', 'stat']
+
+def create_backtest_tables(cursor):
+    """Create the backtest result and state tables if they do not exist"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS projection_backtest (
+            season SMALLINT NOT NULL,
+            week SMALLINT NOT NULL,
+            source VARCHAR(20) NOT NULL,
+            position VARCHAR(5) NOT NULL,
+            stat VARCHAR(40) NOT NULL,
+            samples INTEGER NOT NULL,
+            sum_error DOUBLE PRECISION NOT NULL,
+            sum_abs_error DOUBLE PRECISION NOT NULL,
+            sum_sq_error DOUBLE PRECISION NOT NULL,
+            PRIMARY KEY (season, week, source, position, stat)
+        );
+
+        CREATE TABLE IF NOT EXISTS projection_backtest_state (
+            season SMALLINT NOT NULL,
+            week SMALLINT NOT NULL,
+            input_key VARCHAR(100) NOT NULL,
+            computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (season, week)
+        );
+    """)
+
+def find_stale_weeks(cursor, seasons=None):
+    """
+    (season, week, input_key) for projected weeks whose inputs changed since the last run.
+
+    The key is an md5 over the week's projections joined with their actuals
+    in a fixed order, computed in the database so only one row per week
+    comes back; re-blended or revised projections and stat corrections all
+    change it.
+    """
+    row_columns = ', '.join(['p.source', 'p.player_id', 'pl.position'] +
+                            [f"p.{stat}, w.{stat}" for stat in PROJECTION_STATS])
+    cursor.execute(f"""
+        WITH keyed AS (
+            SELECT p.season, p.week,
+                   md5(string_agg(ROW({row_columns})::text, ',' ORDER BY p.source, p.player_id)) AS input_key
+            FROM player_projections p
+            JOIN player_weekly_stats w
+              ON w.player_id = p.player_id AND w.season = p.season AND w.week = p.week
+             AND w.season_type = 'REG'
+            JOIN players pl ON pl.id = p.player_id
+            WHERE %(seasons)s::int[] IS NULL OR p.season = ANY(%(seasons)s)
+            GROUP BY p.season, p.week
+        )
+        SELECT k.season, k.week, k.input_key
+        FROM keyed k
+        LEFT JOIN projection_backtest_state s ON s.season = k.season AND s.week = k.week
+        WHERE s.input_key IS DISTINCT FROM k.input_key
+        ORDER BY k.season, k.week
+    """, {'seasons': list(seasons) if seasons else None})
+    return cursor.fetchall()
+
+def load_errors(cursor, season, weeks):
+    """Projections joined with actuals for some weeks of a season, one row per projection"""
+    columns = ', '.join(f"p.{stat}, w.{stat} AS actual_{stat}" for stat in PROJECTION_STATS)
+    return query_dataframe(cursor, f"""
+        SELECT p.season, p.week, p.source, pl.position, {columns}
+        FROM player_projections p
+        JOIN player_weekly_stats w
+          ON w.player_id = p.player_id AND w.season = p.season AND w.week = p.week
+         AND w.season_type = 'REG'
+        JOIN players pl ON pl.id = p.player_id
+        WHERE p.season = %s AND p.week = ANY(%s)
+    """, (season, list(weeks)))
+
+def reduce_errors(joined):
+    """Sufficient statistics per (season, week, source, position, stat), vectorized over all rows"""
+    keys = ['season', 'week', 'source', 'position']
+    errors = joined[PROJECTION_STATS] - joined[[f"actual_{stat}" for stat in PROJECTION_STATS]].to_numpy()
+    by = [joined[key] for key in keys]
+
+    # One wide groupby per statistic, then one row per stat
+    sums = {
+        'samples': errors.notna().groupby(by).sum(),
+        'sum_error': errors.groupby(by).sum(),
+        'sum_abs_error': errors.abs().groupby(by).sum(),
+        'sum_sq_error': (errors ** 2).groupby(by).sum()
+    }
+    reduced = pd.concat([
+        pd.DataFrame({name: values[stat] for name, values in sums.items()}).assign(stat=stat)
+        for stat in PROJECTION_STATS
+    ]).rename_axis(keys).reset_index()
+    return reduced[reduced['samples'] > 0]
+
+def backtest_season(season, weeks):
+    """Reduce one season's stale weeks on its own connection (runs in a worker process)"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        return reduce_errors(load_errors(cursor, season, weeks))
+    finally:
+        cursor.close()
+        conn.close()
+
+def run_backtest(seasons=None, workers=MAX_WORKERS):
+    """Backtest every stale week, in parallel across seasons"""
+    print("Backtesting projections against weekly actuals...")
+
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        create_projections_table(cursor)
+        create_backtest_tables(cursor)
+        conn.commit()
+
+        stale = find_stale_weeks(cursor, seasons)
+        print(f"  Found {len(stale)} weeks with new or changed inputs")
+        if not stale:
+            cursor.close()
+            conn.close()
+            return True
+
+        weeks_by_season = {}
+        for season, week, _ in stale:
+            weeks_by_season.setdefault(season, []).append(week)
+
+        season_list = list(weeks_by_season)
+        with ProcessPoolExecutor(max_workers=min(workers, len(season_list))) as executor:
+            results = executor.map(backtest_season, season_list, [weeks_by_season[s] for s in season_list])
+
+            rows = 0
+            for season, reduced in zip(season_list, results):
+                cursor.execute(
+                    "DELETE FROM projection_backtest WHERE season = %s AND week = ANY(%s)",
+                    (season, weeks_by_season[season])
+                )
+                copy_dataframe(cursor, reduced, 'projection_backtest', [
+                    'season', 'week', 'source', 'position', 'stat',
+                    'samples', 'sum_error', 'sum_abs_error', 'sum_sq_error'
+                ])
+                rows += len(reduced)
+                print(f"  {season}: weeks {weeks_by_season[season]} -> {len(reduced)} error rows")
+
+        cursor.executemany("""
+            INSERT INTO projection_backtest_state (season, week, input_key, computed_at)
+            VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
+            ON CONFLICT (season, week) DO UPDATE SET
+                input_key = EXCLUDED.input_key,
+                computed_at = EXCLUDED.computed_at
+        """, stale)
+
+        conn.commit()
+        print(f"  Stored {rows} backtest rows")
+
+        cursor.close()
+        conn.close()
+        return True
+
+    except Exception as e:
+        print(f"  Error backtesting projections: {e}")
+        return False
+
+def summarize_backtest(cursor, group_by=('source', 'position'), stat='fantasy_points_ppr', seasons=None):
+    """MAE, RMSE and bias grouped by any of SUMMARY_GROUPS, from the stored sums"""
+    group_by = list(group_by)
+    unknown = [col for col in group_by if col not in SUMMARY_GROUPS]
+    if unknown:
+        raise ValueError(f"Cannot group by {unknown}, expected any of {SUMMARY_GROUPS}")
+
+    group_list = ', '.join(group_by)
+    return query_dataframe(cursor, f"""
+        SELECT {group_list},
+               SUM(samples) AS samples,
+               SUM(sum_abs_error) / SUM(samples) AS mae,
+               sqrt(SUM(sum_sq_error) / SUM(samples)) AS rmse,
+               SUM(sum_error) / SUM(samples) AS bias
+        FROM projection_backtest
+        WHERE stat = %(stat)s
+          AND (%(seasons)s::int[] IS NULL OR season = ANY(%(seasons)s))
+        GROUP BY {group_list}
+        ORDER BY {group_list}
+    """, {'stat': stat, 'seasons': list(seasons) if seasons else None})
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Backtest projection sources against weekly actuals")
+    parser.add_argument('--seasons', type=int, nargs='+', help="Seasons to backtest (default: all)")
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS,
+                        help=f"Seasons computed in parallel (default: {MAX_WORKERS})")
+    parser.add_argument('--group-by', nargs='+', default=['source', 'position'], choices=SUMMARY_GROUPS,
+                        help="Summary dimensions (default: source position)")
+    parser.add_argument('--stat', default='fantasy_points_ppr', choices=PROJECTION_STATS,
+                        help="Stat to summarize (default: fantasy_points_ppr)")
+    args = parser.parse_args()
+
+    print("FFAngles Projection Backtest")
+    print("=" * 40)
+    print(f"Started at: {datetime.now()}")
+
+    if not run_backtest(args.seasons, args.workers):
+        print("\nProjection backtest failed!")
+        sys.exit(1)
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    summary = summarize_backtest(cursor, args.group_by, args.stat, args.seasons)
+    cursor.close()
+    conn.close()
+
+    print(f"\n{args.stat} by {', '.join(args.group_by)}:")
+    if len(summary) == 0:
+        print("  No projections with actuals yet")
+    else:
+        print(summary.round(3).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Blend the per-source weekly projections into one consensus projection
+
+Every source in player_projections is weighted per (position, stat) by the
+inverse of its mean squared error against player_weekly_stats actuals, so a
+source that projects WR receptions well but QB passing yards poorly counts
+for more on one than the other. Errors are aggregated in a single SQL pass
+and the resulting weights are cached in projection_source_weights together
+with a hash of the projections and actuals they were computed from; they
+are only recomputed when that data changes (new weeks, stat corrections or
+revised projections).
+
+Blending a week is one melt, one merge with the weights and one groupby over
+every player, source and stat, written back as source 'consensus'.
+"""
+
+import sys
+import argparse
+from datetime import datetime
+
+from bulk_load import query_dataframe, upsert_dataframe
+from db import get_db_connection
+from projections import CONSENSUS_SOURCE, PROJECTION_STATS, create_projections_table
+
+# Player-weeks of history that weigh as much as the position's average error;
+# sources with little history are pulled toward it
+PRIOR_SAMPLES = 50
+
+def create_weights_table(cursor):
+    """Create the cached source weights table if it does not exist"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS projection_source_weights (
+            source VARCHAR(20) NOT NULL,
+            position VARCHAR(5) NOT NULL,
+            stat VARCHAR(40) NOT NULL,
+            samples INTEGER NOT NULL,
+            mse REAL,
+            weight REAL NOT NULL,
+            actuals_key VARCHAR(64) NOT NULL,
+            computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (source, position, stat)
+        );
+    """)
+
+def actuals_key(cursor):
+    """
+    Key of the data the weights depend on.
+
+    An md5 over every source projection joined with its actuals, in a fixed
+    order, so new weeks, stat corrections and revised projections all change
+    it; computed in the database so only the hash comes back.
+    """
+    row_columns = ', '.join(['p.source', 'p.player_id', 'p.season', 'p.week', 'pl.position'] +
+                            [f"p.{stat}, w.{stat}" for stat in PROJECTION_STATS])
+    cursor.execute(f"""
+        SELECT md5(COALESCE(string_agg(ROW({row_columns})::text, ','
+                                       ORDER BY p.source, p.season, p.week, p.player_id), ''))
+        FROM player_projections p
+        JOIN player_weekly_stats w
+          ON w.player_id = p.player_id AND w.season = p.season AND w.week = p.week
+         AND w.season_type = 'REG'
+        JOIN players pl ON pl.id = p.player_id
+        WHERE p.source <> %s
+    """, (CONSENSUS_SOURCE,))
+    return cursor.fetchone()[0]
+
+def compute_source_errors(cursor):
+    """Squared error and sample count per (source, position, stat), one aggregate query"""
+    error_columns = ',\n               '.join(
+        f"AVG((p.{stat} - w.{stat}) ^ 2) AS {stat}_mse, COUNT(p.{stat} - w.{stat}) AS {stat}_n"
+        for stat in PROJECTION_STATS
+    )
+    errors = query_dataframe(cursor, f"""
+        SELECT p.source, pl.position,
+               {error_columns}
+        FROM player_projections p
+        JOIN player_weekly_stats w
+          ON w.player_id = p.player_id AND w.season = p.season AND w.week = p.week
+         AND w.season_type = 'REG'
+        JOIN players pl ON pl.id = p.player_id
+        WHERE p.source <> %s
+        GROUP BY p.source, pl.position
+    """, (CONSENSUS_SOURCE,))
+
+    mse = errors.melt(id_vars=['source', 'position'], value_vars=[f"{s}_mse" for s in PROJECTION_STATS],
+                      var_name='stat', value_name='mse')
+    samples = errors.melt(id_vars=['source', 'position'], value_vars=[f"{s}_n" for s in PROJECTION_STATS],
+                          var_name='stat', value_name='samples')
+    mse['stat'] = mse['stat'].str.removesuffix('_mse')
+    samples['stat'] = samples['stat'].str.removesuffix('_n')
+    return mse.merge(samples, on=['source', 'position', 'stat'])
+
+def weights_from_errors(errors):
+    """
+    Inverse-MSE weights, normalized per (position, stat).
+
+    Each source's error is shrunk toward the (position, stat) average by
+    PRIOR_SAMPLES, so a source with a few lucky weeks does not dominate.
+    """
+    errors = errors.copy()
+    errors['samples'] = errors['samples'].fillna(0).astype(int)
+    group = errors.groupby(['position', 'stat'])
+    pooled = (errors['mse'] * errors['samples']).groupby([errors['position'], errors['stat']]).transform('sum')
+    pooled = pooled / group['samples'].transform('sum').where(lambda n: n > 0)
+
+    shrunk = ((errors['mse'].fillna(0) * errors['samples'] + pooled * PRIOR_SAMPLES)
+              / (errors['samples'] + PRIOR_SAMPLES))
+    # No history at all for the position and stat: every source counts the same
+    raw = (1 / shrunk.where(shrunk > 0)).fillna(1.0)
+    errors['weight'] = raw / raw.groupby([errors['position'], errors['stat']]).transform('sum')
+    return errors
+
+def load_source_weights(cursor, refresh=False):
+    """Cached weights, recomputed first when the actuals or source projections changed"""
+    key = actuals_key(cursor)
+    cursor.execute("SELECT DISTINCT actuals_key FROM projection_source_weights")
+    cached_keys = [row[0] for row in cursor.fetchall()]
+
+    if refresh or cached_keys != [key]:
+        weights = weights_from_errors(compute_source_errors(cursor))
+        weights['actuals_key'] = key
+        cursor.execute("DELETE FROM projection_source_weights")
+        upsert_dataframe(cursor, weights, 'projection_source_weights', ['source', 'position', 'stat'],
+                         ['source', 'position', 'stat', 'samples', 'mse', 'weight', 'actuals_key'])
+        print(f"  Recomputed {len(weights)} source weights")
+        return weights[['source', 'position', 'stat', 'weight']]
+
+    return query_dataframe(cursor, "SELECT source, position, stat, weight FROM projection_source_weights")
+
+def load_source_projections(cursor, season, week):
+    """Every source's projections for a week, with the player's position"""
+    return query_dataframe(cursor, f"""
+        SELECT p.player_id, pl.position, p.source, {', '.join(f"p.{stat}" for stat in PROJECTION_STATS)}
+        FROM player_projections p
+        JOIN players pl ON pl.id = p.player_id
+        WHERE p.season = %s AND p.week = %s AND p.source <> %s
+    """, (season, week, CONSENSUS_SOURCE))
+
+def blend(projections, weights):
+    """
+    Weighted consensus per player and stat across sources.
+
+    A source without a weight for the position and stat (no history yet)
+    gets the average weight of the others; a stat only some sources project
+    is blended from those.
+    """
+    long = projections.melt(id_vars=['player_id', 'position', 'source'], value_vars=PROJECTION_STATS,
+                            var_name='stat', value_name='value').dropna(subset=['value'])
+    long = long.merge(weights, on=['source', 'position', 'stat'], how='left')
+    average = weights.groupby(['position', 'stat'])['weight'].mean().rename('average_weight')
+    long = long.merge(average, on=['position', 'stat'], how='left')
+    long['weight'] = long['weight'].fillna(long['average_weight']).fillna(1.0)
+    long['weighted'] = long['value'] * long['weight']
+
+    sums = long.groupby(['player_id', 'stat'])[['weighted', 'weight']].sum()
+    consensus = (sums['weighted'] / sums['weight']).unstack('stat')
+    return consensus.reindex(columns=PROJECTION_STATS).rename_axis(columns=None).reset_index()
+
+def latest_projection_week(cursor, season):
+    """Latest week with source projections in a season, or None"""
+    cursor.execute("""
+        SELECT MAX(week) FROM player_projections WHERE season = %s AND source <> %s
+    """, (season, CONSENSUS_SOURCE))
+    return cursor.fetchone()[0]
+
+def blend_projections(season, week=None, refresh_weights=False):
+    """Write the consensus projections for a week (default: latest projected week)"""
+    print(f"Blending projections for {season}...")
+
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        create_projections_table(cursor)
+        create_weights_table(cursor)
+
+        week = week or latest_projection_week(cursor, season)
+        if week is None:
+            print("  No source projections to blend")
+            conn.commit()
+            cursor.close()
+            conn.close()
+            return True
+
+        weights = load_source_weights(cursor, refresh_weights)
+        projections = load_source_projections(cursor, season, week)
+        consensus = blend(projections, weights)
+        consensus['season'] = season
+        consensus['week'] = week
+        consensus['source'] = CONSENSUS_SOURCE
+
+        count = upsert_dataframe(
+            cursor, consensus, 'player_projections', ['season', 'week', 'source', 'player_id'],
+            ['season', 'week', 'source', 'player_id'] + PROJECTION_STATS
+        )
+        conn.commit()
+        print(f"  Blended {projections['source'].nunique()} sources into {len(consensus)} "
+              f"consensus projections for week {week} ({count} changed)")
+
+        cursor.close()
+        conn.close()
+        return True
+
+    except Exception as e:
+        print(f"  Error blending projections: {e}")
+        return False
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Blend source projections into a consensus")
+    parser.add_argument('--season', type=int, default=2025, help="Season to blend (default: 2025)")
+    parser.add_argument('--week', type=int, help="Week to blend (default: latest projected week)")
+    parser.add_argument('--refresh-weights', action='store_true',
+                        help="Recompute source weights even if their inputs did not change")
+    args = parser.parse_args()
+
+    print("FFAngles Projection Blender")
+    print("=" * 40)
+    print(f"Started at: {datetime.now()}")
+
+    if blend_projections(args.season, args.week, args.refresh_weights):
+        print("\nConsensus projections updated successfully!")
+    else:
+        print("\nProjection blending failed!")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Weekly fantasy projections storage shared by the projection consumers
+
+player_projections holds one row per (season, week, source, player): the
+per-source projections fetched for the update_fantasy_projections TODO
+(espn, yahoo, sleeper, fantasypros) and derived rows such as the blended
+'consensus'. Stat columns mirror player_weekly_stats so projections can be
+compared with actuals column for column.
+"""
+
+from bulk_load import query_dataframe
+
+# Stats projected per player-week (same names as player_weekly_stats)
+PROJECTION_STATS = [
+    'passing_yards', 'passing_tds', 'interceptions', 'rushing_yards', 'rushing_tds',
+    'receptions', 'receiving_yards', 'receiving_tds', 'fantasy_points', 'fantasy_points_ppr'
+]
+
+CONSENSUS_SOURCE = 'consensus'
+
+def create_projections_table(cursor):
+    """Create the projections table if it does not exist"""
+    stat_columns = ',\n            '.join(f"{stat} REAL" for stat in PROJECTION_STATS)
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS player_projections (
+            season SMALLINT NOT NULL,
+            week SMALLINT NOT NULL,
+            source VARCHAR(20) NOT NULL,
+            player_id INTEGER NOT NULL,
+            {stat_columns},
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (season, week, source, player_id)
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_player_projections_player
+            ON player_projections(player_id, season, week);
+    """)
+
+def load_projected_points(cursor, season, week, player_ids, stat='fantasy_points_ppr'):
+    """
+    One projected value per player for a week.
+
+    The consensus row is used where it exists, otherwise the mean of the
+    sources that project the player. Players without projections are absent.
+    """
+    return query_dataframe(cursor, f"""
+        SELECT player_id,
+               COALESCE(
+                   MAX({stat}) FILTER (WHERE source = %(consensus)s),
+                   AVG({stat}) FILTER (WHERE source <> %(consensus)s)
+               ) AS projected
+        FROM player_projections
+        WHERE season = %(season)s AND week = %(week)s AND player_id = ANY(%(ids)s)
+        GROUP BY player_id
+    """, {'consensus': CONSENSUS_SOURCE, 'season': season, 'week': week, 'ids': list(player_ids)})
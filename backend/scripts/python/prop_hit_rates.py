@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Over/under hit rates for every player prop market
+
+For each player and market in player_game_props (imported by
+import-player-props.js) prop_hit_rates stores two sets of counts:
+
+- how often the player went over the line posted for each game, over the
+  last 5 and 10 graded games and the season ("over in 7 of the last 10");
+- how often their actual results clear the current line, over the last 5
+  and 10 games and the season before the current game.
+
+The line of a game is the median across bookmakers. Counts are computed for
+every player in one vectorized pass over the long (player, market, game)
+frame. A per-player key of their props and weekly stats is stored with the
+rows, so each run only recomputes players with new props or new games.
+"""
+
+import sys
+import argparse
+import pandas as pd
+from datetime import datetime
+
+from bulk_load import copy_dataframe, query_dataframe
+from db import get_db_connection
+
+PROPS_TABLE = 'player_game_props'
+
+# import-player-props.js keys props by Tank01 player id; this maps them to players.id
+PROP_PLAYER_JOIN = "JOIN players pl ON pl.tank01_player_id::text = p.player_id::text"
+
+# player_game_props market column -> player_weekly_stats column it settles on
+MARKET_STATS = {
+    'player_pass_yds': 'passing_yards',
+    'player_reception_yds': 'receiving_yards',
+    'player_rush_yds': 'rushing_yards'
+}
+
+# Window name -> number of most recent games (None = the whole season)
+WINDOWS = {'l5': 5, 'l10': 10, 'season': None}
+
+COUNT_COLUMNS = (
+    [f"{window}_{count}" for window in WINDOWS for count in ('games', 'overs')] +
+    [f"at_line_{window}_{count}" for window in WINDOWS for count in ('games', 'overs')]
+)
+
+HIT_RATE_COLUMNS = ['player_id', 'market', 'game_id', 'season', 'week', 'line'] + COUNT_COLUMNS + ['input_key']
+
+def create_hit_rate_table(cursor):
+    """Create the hit rate table if it does not exist"""
+    count_columns = ',\n            '.join(
+        f"{col} SMALLINT NOT NULL" for col in COUNT_COLUMNS
+    )
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS prop_hit_rates (
+            player_id INTEGER NOT NULL,
+            market VARCHAR(40) NOT NULL,
+            game_id VARCHAR(20) NOT NULL,
+            season SMALLINT NOT NULL,
+            week SMALLINT NOT NULL,
+            line REAL NOT NULL,
+            {count_columns},
+            input_key CHAR(32) NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (player_id, market)
+        );
+    """)
+
+def props_table_exists(cursor):
+    """Check whether the props importer has created its table yet"""
+    cursor.execute("SELECT to_regclass(%s)", (PROPS_TABLE,))
+    return cursor.fetchone()[0] is not None
+
+def find_changed_players(cursor, seasons):
+    """
+    (player_id, input_key) for prop players whose props or weekly stats changed.
+
+    The key covers the player's prop rows and their weekly stats in the given
+    seasons, so a new prop, a re-priced line or a new game all change it.
+    """
+    stat_list = ', '.join(f"w.{stat}" for stat in sorted(set(MARKET_STATS.values())))
+    cursor.execute(f"""
+        WITH prop_players AS (
+            SELECT pl.id AS player_id, COUNT(*) AS props, MAX(p.imported_at) AS imported
+            FROM {PROPS_TABLE} p
+            {PROP_PLAYER_JOIN}
+            GROUP BY pl.id
+        ),
+        keys AS (
+            SELECT pp.player_id,
+                   md5(concat_ws(':', pp.props, pp.imported, (
+                       SELECT string_agg(ROW(w.season, w.week, {stat_list})::text, ',' ORDER BY w.season, w.week)
+                       FROM player_weekly_stats w
+                       WHERE w.player_id = pp.player_id AND w.season = ANY(%s)
+                   ))) AS input_key
+            FROM prop_players pp
+        )
+        SELECT k.player_id, k.input_key
+        FROM keys k
+        WHERE NOT EXISTS (
+            SELECT 1 FROM prop_hit_rates h
+            WHERE h.player_id = k.player_id AND h.input_key = k.input_key
+        )
+    """, (list(seasons),))
+    return cursor.fetchall()
+
+def load_prop_lines(cursor, player_ids):
+    """Median line across bookmakers per (player, game, market), with the game's season and week"""
+    markets = ', '.join(f"('{market}', p.{market})" for market in MARKET_STATS)
+    return query_dataframe(cursor, f"""
+        SELECT pl.id AS player_id, p.game_id, g.season, g.week, m.market,
+               percentile_cont(0.5) WITHIN GROUP (ORDER BY m.line) AS line
+        FROM {PROPS_TABLE} p
+        {PROP_PLAYER_JOIN}
+        JOIN games g ON g.game_id = p.game_id
+        CROSS JOIN LATERAL (VALUES {markets}) AS m(market, line)
+        WHERE pl.id = ANY(%s) AND m.line IS NOT NULL
+        GROUP BY pl.id, p.game_id, g.season, g.week, m.market
+    """, (list(player_ids),))
+
+def load_actuals(cursor, player_ids, seasons):
+    """Weekly results of the players in long form (player, season, week, market, actual)"""
+    stats = sorted(set(MARKET_STATS.values()))
+    weekly = query_dataframe(cursor, f"""
+        SELECT player_id, season, week, {', '.join(stats)}
+        FROM player_weekly_stats
+        WHERE player_id = ANY(%s) AND season = ANY(%s)
+    """, (list(player_ids), list(seasons)))
+
+    markets = [pd.DataFrame({
+        'player_id': weekly['player_id'], 'season': weekly['season'], 'week': weekly['week'],
+        'market': market, 'actual': weekly[stat]
+    }) for market, stat in MARKET_STATS.items()]
+    return pd.concat(markets, ignore_index=True).dropna(subset=['actual'])
+
+def window_counts(frame, prefix, season):
+    """
+    Games and overs in each window, per (player_id, market).
+
+    frame has player_id, market, season, actual, line and a recency rank
+    (0 = most recent game); season is the current season of each row.
+    """
+    counts = {}
+    over = frame['actual'] > frame['line']
+    for window, size in WINDOWS.items():
+        in_window = frame['season'] == season if size is None else frame['recency'] < size
+        by = [frame['player_id'], frame['market']]
+        counts[f"{prefix}{window}_games"] = in_window.groupby(by).sum()
+        counts[f"{prefix}{window}_overs"] = (in_window & over).groupby(by).sum()
+    return pd.DataFrame(counts)
+
+def compute_hit_rates(lines, actuals):
+    """Hit rate counts for every (player, market), as of each player's latest prop game"""
+    keys = ['player_id', 'market']
+    lines = lines.sort_values(keys + ['season', 'week'])
+    current = lines.groupby(keys).tail(1).set_index(keys)
+
+    # Posted lines: every prop game with a result, most recent first
+    graded = lines.merge(actuals, on=keys + ['season', 'week'])
+    graded = graded.sort_values(keys + ['season', 'week'], ascending=[True, True, False, False])
+    graded['recency'] = graded.groupby(keys).cumcount()
+    graded_season = graded.set_index(keys).index.map(current['season'])
+    posted = window_counts(graded, '', graded_season.to_numpy())
+
+    # Current line: every earlier game of the player, scored against today's line
+    history = actuals.merge(current[['season', 'week', 'line']].rename(
+        columns={'season': 'current_season', 'week': 'current_week'}
+    ).reset_index(), on=keys)
+    earlier = (history['season'] < history['current_season']) | (
+        (history['season'] == history['current_season']) & (history['week'] < history['current_week']))
+    history = history[earlier].sort_values(keys + ['season', 'week'], ascending=[True, True, False, False])
+    history['recency'] = history.groupby(keys).cumcount()
+    at_line = window_counts(history, 'at_line_', history['current_season'].to_numpy())
+
+    result = current[['game_id', 'season', 'week', 'line']].join(posted).join(at_line)
+    result[COUNT_COLUMNS] = result[COUNT_COLUMNS].fillna(0).astype('int16')
+    return result.reset_index()
+
+def update_prop_hit_rates(seasons):
+    """Recompute hit rates for players whose props or games changed"""
+    print(f"Updating prop hit rates (history seasons: {seasons})")
+
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        if not props_table_exists(cursor):
+            print(f"  {PROPS_TABLE} does not exist yet, nothing to do")
+            cursor.close()
+            conn.close()
+            return True
+
+        create_hit_rate_table(cursor)
+
+        changed = find_changed_players(cursor, seasons)
+        print(f"  Found {len(changed)} players with new props or games")
+        if not changed:
+            conn.commit()
+            cursor.close()
+            conn.close()
+            return True
+
+        player_ids = [player_id for player_id, _ in changed]
+        lines = load_prop_lines(cursor, player_ids)
+        actuals = load_actuals(cursor, player_ids, seasons)
+        hit_rates = compute_hit_rates(lines, actuals)
+        hit_rates['input_key'] = hit_rates['player_id'].map(dict(changed))
+
+        cursor.execute("DELETE FROM prop_hit_rates WHERE player_id = ANY(%s)", (player_ids,))
+        copy_dataframe(cursor, hit_rates, 'prop_hit_rates', HIT_RATE_COLUMNS)
+
+        conn.commit()
+        print(f"  Stored hit rates for {len(hit_rates)} player markets")
+
+        cursor.close()
+        conn.close()
+        return True
+
+    except Exception as e:
+        print(f"  Error updating prop hit rates: {e}")
+        return False
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Compute over/under hit rates for player props")
+    parser.add_argument('--seasons', type=int, nargs='+', default=[2024, 2025],
+                        help="Seasons of weekly stats used as history (default: 2024 2025)")
+    args = parser.parse_args()
+
+    print("FFAngles Prop Hit Rates")
+    print("=" * 40)
+    print(f"Started at: {datetime.now()}")
+
+    if update_prop_hit_rates(args.seasons):
+        print("\nProp hit rates updated successfully!")
+    else:
+        print("\nProp hit rate update failed!")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
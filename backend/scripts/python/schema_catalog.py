@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Cached schema introspection for the maintenance and debug scripts
+
+Every table, column, index and constraint in the public schema is read from
+pg_catalog in a single query and cached per database, so scripts that check
+many tables no longer hit information_schema once per table. Row counts come
+from pg_class.reltuples (summed over season partitions) and per-column null
+fractions from pg_stats, which keeps diagnostics instant on the large stats
+tables. Both are planner estimates as of the last ANALYZE; use COUNT(*) where
+an exact number matters.
+"""
+
+# Partition children are folded into their parent table (PostgreSQL 12+)
+CATALOG_QUERY = """
+    SELECT
+        c.relname,
+        c.relkind,
+        (SELECT COUNT(*) FROM pg_inherits i WHERE i.inhparent = c.oid) AS partitions,
+        (SELECT COALESCE(SUM(GREATEST(l.reltuples, 0)), 0)::bigint
+         FROM pg_partition_tree(c.oid) pt
+         JOIN pg_class l ON l.oid = pt.relid
+         WHERE pt.isleaf) AS estimated_rows,
+        (SELECT json_agg(json_build_array(
+                    a.attname,
+                    format_type(a.atttypid, a.atttypmod),
+                    a.attnotnull,
+                    (SELECT CASE WHEN COUNT(s.null_frac) = COUNT(*) THEN
+                                SUM(GREATEST(l.reltuples, 0) * s.null_frac)
+                                / NULLIF(SUM(GREATEST(l.reltuples, 0)), 0)
+                            END
+                     FROM pg_partition_tree(c.oid) pt
+                     JOIN pg_class l ON l.oid = pt.relid
+                     LEFT JOIN pg_stats s
+                        ON s.schemaname = n.nspname AND s.tablename = l.relname
+                       AND s.attname = a.attname AND NOT s.inherited
+                     WHERE pt.isleaf)
+                ) ORDER BY a.attnum)
+         FROM pg_attribute a
+         WHERE a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped) AS columns,
+        (SELECT json_agg(json_build_array(ic.relname, pg_get_indexdef(x.indexrelid))
+                         ORDER BY ic.relname)
+         FROM pg_index x
+         JOIN pg_class ic ON ic.oid = x.indexrelid
+         WHERE x.indrelid = c.oid) AS indexes,
+        (SELECT json_agg(json_build_array(k.conname, k.contype, pg_get_constraintdef(k.oid))
+                         ORDER BY k.conname)
+         FROM pg_constraint k
+         WHERE k.conrelid = c.oid) AS constraints
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = 'public'
+      AND c.relkind IN ('r', 'p')
+      AND NOT c.relispartition
+    ORDER BY c.relname
+"""
+
+CONSTRAINT_TYPES = {
+    'p': 'primary key',
+    'f': 'foreign key',
+    'u': 'unique',
+    'c': 'check',
+    'x': 'exclusion'
+}
+
+# Loaded catalogs, keyed by connection DSN
+_catalogs = {}
+
+def load_schema_catalog(cursor, refresh=False):
+    """
+    Return the catalog for the cursor's database, loading it on first use.
+
+    The catalog maps table name -> {kind, partitions, estimated_rows, columns,
+    indexes, constraints}. Pass refresh=True after DDL to reload it.
+    """
+    conn = cursor.connection
+    # The psycopg2 connection's DSN (host, port, dbname, user) identifies the database
+    key = conn.dsn
+    if key in _catalogs and not refresh:
+        return _catalogs[key]
+
+    cursor.execute(CATALOG_QUERY)
+    catalog = {}
+    for name, kind, partitions, rows, columns, indexes, constraints in cursor.fetchall():
+        catalog[name] = {
+            'kind': 'partitioned' if kind == 'p' else 'table',
+            'partitions': partitions,
+            'estimated_rows': rows,
+            'columns': {
+                col: {'type': col_type, 'not_null': not_null, 'null_frac': null_frac}
+                for col, col_type, not_null, null_frac in (columns or [])
+            },
+            'indexes': dict(indexes or []),
+            'constraints': {
+                con: {'type': CONSTRAINT_TYPES.get(con_type, con_type), 'definition': definition}
+                for con, con_type, definition in (constraints or [])
+            }
+        }
+
+    _catalogs[key] = catalog
+    return catalog
+
+def tables_like(catalog, prefix):
+    """Names of the tables starting with a prefix"""
+    return [name for name in catalog if name.startswith(prefix)]
+
+def table_columns(catalog, table_name):
+    """[(column, type)] of a table in column order; empty when the table is missing"""
+    columns = catalog.get(table_name, {}).get('columns', {})
+    return [(col, info['type']) for col, info in columns.items()]
+
+def has_column(catalog, table_name, column):
+    """Check whether a table exists and has a column"""
+    return column in catalog.get(table_name, {}).get('columns', {})
+
+def estimated_rows(catalog, table_name):
+    """Planner estimate of a table's rows (0 when missing or never analyzed)"""
+    return catalog.get(table_name, {}).get('estimated_rows', 0)
+
+def estimated_non_null(catalog, table_name, column):
+    """
+    Planner estimate of the rows with a non-null value in a column.
+
+    Returns None when the column has no statistics yet (run ANALYZE).
+    """
+    info = catalog.get(table_name, {}).get('columns', {}).get(column)
+    if info is None:
+        return None
+    if info['not_null']:
+        return estimated_rows(catalog, table_name)
+    if info['null_frac'] is None:
+        return None
+    return round(estimated_rows(catalog, table_name) * (1 - info['null_frac']))
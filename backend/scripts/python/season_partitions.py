@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Season partitioning helpers for the weekly and NGS stats tables
+
+player_weekly_stats and the player_ngs_* tables are declaratively partitioned
+by LIST (season) with one partition per season named {table}_{season}.
+Loaders use these helpers to write straight into the season partition, and
+full reloads build a staging table and swap it in with ATTACH PARTITION.
+"""
+
+# Tables partitioned by season (see migrate-to-nfl-data-py.py --partition-stats)
+PARTITIONED_TABLES = [
+    'player_weekly_stats',
+    'player_ngs_passing',
+    'player_ngs_receiving',
+    'player_ngs_rushing'
+]
+
+# Natural key every partitioned stats table is upserted on
+STATS_CONFLICT_KEY = ['gsis_id', 'season', 'season_type', 'week']
+
+def partition_name(table_name, season):
+    """Name of the partition holding a single season"""
+    return f"{table_name}_{int(season)}"
+
+def is_partitioned(cursor, table_name):
+    """Check whether a table is a declaratively partitioned parent"""
+    cursor.execute("""
+        SELECT 1
+        FROM pg_partitioned_table pt
+        JOIN pg_class c ON c.oid = pt.partrelid
+        WHERE c.relname = %s
+    """, (table_name,))
+    return cursor.fetchone() is not None
+
+def list_partitions(cursor, table_name):
+    """Names of a partitioned table's partitions, in name order"""
+    cursor.execute("""
+        SELECT child.relname
+        FROM pg_inherits i
+        JOIN pg_class parent ON parent.oid = i.inhparent
+        JOIN pg_class child ON child.oid = i.inhrelid
+        WHERE parent.relname = %s
+        ORDER BY child.relname
+    """, (table_name,))
+    return [row[0] for row in cursor.fetchall()]
+
+def ensure_season_partition(cursor, table_name, season):
+    """Create the partition for a season if it does not exist yet"""
+    partition = partition_name(table_name, season)
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {partition}
+        PARTITION OF {table_name} FOR VALUES IN ({int(season)})
+    """)
+    return partition
+
+def season_targets(cursor, table_name, data, season_column='season'):
+    """
+    Split a DataFrame by season and pair each chunk with the table to write to.
+
+    Yields (target_table, season, frame). When the table is partitioned the
+    target is the season partition (created on demand); otherwise every chunk
+    goes to the table itself so the loaders keep working before migration.
+    """
+    partitioned = is_partitioned(cursor, table_name)
+
+    for season, frame in data.groupby(season_column, sort=True):
+        if partitioned:
+            target = ensure_season_partition(cursor, table_name, season)
+        else:
+            target = table_name
+        yield target, int(season), frame
+
+def create_staging_partition(cursor, table_name, season):
+    """
+    Create an empty staging table shaped like a season partition.
+
+    The CHECK constraint matches the partition bound so ATTACH PARTITION can
+    skip the validation scan when the staging table is swapped in.
+    """
+    staging = f"{partition_name(table_name, season)}_staging"
+    cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+    cursor.execute(f"""
+        CREATE TABLE {staging} (
+            LIKE {table_name} INCLUDING DEFAULTS INCLUDING INDEXES,
+            CONSTRAINT {staging}_season_check CHECK (season = {int(season)})
+        )
+    """)
+    return staging
+
+def swap_season_partition(cursor, table_name, season):
+    """
+    Replace a season partition with its fully loaded staging table.
+
+    Runs inside the caller's transaction: the old partition is detached and
+    dropped, the staging table renamed and attached in its place.
+    """
+    partition = partition_name(table_name, season)
+    staging = f"{partition}_staging"
+
+    cursor.execute("SELECT to_regclass(%s)", (partition,))
+    if cursor.fetchone()[0] is not None:
+        cursor.execute(f"ALTER TABLE {table_name} DETACH PARTITION {partition}")
+        cursor.execute(f"DROP TABLE {partition}")
+
+    cursor.execute(f"ALTER TABLE {staging} RENAME TO {partition}")
+    cursor.execute(f"""
+        ALTER TABLE {table_name}
+        ATTACH PARTITION {partition} FOR VALUES IN ({int(season)})
+    """)
+    cursor.execute(f"ALTER TABLE {partition} DROP CONSTRAINT {staging}_season_check")
+    return partition
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Nearest-neighbour index of player-seasons for "similar players" comparisons
+
+Every regular season since 2016 (the first NGS season) is turned into a
+per-position feature vector: per-game volume and share stats from
+player_seasonal_stats plus the season-level (week 0) Next Gen Stats. Features
+are standardized within the position, missing NGS values (players under the
+NGS thresholds) sit at the position mean, and the vectors are stored as one
+float32 matrix per position in a single .npz file.
+
+A query is one matrix-vector product over the position's matrix plus an
+argpartition, so top-k lookups across all player-seasons take well under a
+millisecond once the index is loaded:
+
+    index = load_index()
+    similar_players(index, player_id=1234, season=2024, k=10)
+"""
+
+import os
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+from bulk_load import query_dataframe
+from db import get_db_connection
+
+INDEX_PATH = os.getenv(
+    'SIMILAR_PLAYERS_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'data', 'similar_players.npz')
+)
+
+FIRST_SEASON = 2016
+
+MIN_GAMES = 4  # shorter seasons are too noisy to compare
+
+# player_seasonal_stats columns divided by games played
+PER_GAME_STATS = {
+    'QB': ['attempts', 'passing_yards', 'passing_tds', 'interceptions', 'sacks',
+           'passing_epa', 'carries', 'rushing_yards', 'fantasy_points_ppr'],
+    'RB': ['carries', 'rushing_yards', 'rushing_tds', 'rushing_epa', 'targets',
+           'receptions', 'receiving_yards', 'fantasy_points_ppr'],
+    'WR': ['targets', 'receptions', 'receiving_yards', 'receiving_tds',
+           'receiving_air_yards', 'receiving_yards_after_catch', 'fantasy_points_ppr'],
+    'TE': ['targets', 'receptions', 'receiving_yards', 'receiving_tds',
+           'receiving_air_yards', 'receiving_yards_after_catch', 'fantasy_points_ppr']
+}
+
+# player_seasonal_stats rate and share columns used as is
+RATE_STATS = {
+    'QB': ['pacr', 'dakota'],
+    'RB': ['tgt_sh', 'ry_sh', 'dom'],
+    'WR': ['target_share', 'air_yards_share', 'wopr_x', 'racr', 'yac_sh', 'dom'],
+    'TE': ['target_share', 'air_yards_share', 'wopr_x', 'racr', 'yac_sh', 'dom']
+}
+
+# Next Gen Stats table and columns per position (week 0 = full season)
+NGS_FEATURES = {
+    'QB': ('player_ngs_passing', [
+        'avg_time_to_throw', 'avg_intended_air_yards', 'aggressiveness',
+        'completion_percentage_above_expectation'
+    ]),
+    'RB': ('player_ngs_rushing', [
+        'efficiency', 'avg_time_to_los', 'percent_attempts_gte_eight_defenders',
+        'rush_yards_over_expected_per_att'
+    ]),
+    'WR': ('player_ngs_receiving', [
+        'avg_separation', 'avg_cushion', 'avg_intended_air_yards',
+        'avg_yac_above_expectation', 'catch_percentage'
+    ]),
+    'TE': ('player_ngs_receiving', [
+        'avg_separation', 'avg_cushion', 'avg_intended_air_yards',
+        'avg_yac_above_expectation', 'catch_percentage'
+    ])
+}
+
+METRICS = ['cosine', 'euclidean']
+
+def position_features(position):
+    """Feature names of a position, in vector order"""
+    ngs_columns = NGS_FEATURES[position][1]
+    return ([f"{stat}_per_game" for stat in PER_GAME_STATS[position]] +
+            RATE_STATS[position] + [f"ngs_{col}" for col in ngs_columns])
+
+def load_position_seasons(cursor, position, seasons):
+    """Regular season rows of one position with their NGS season columns"""
+    ngs_table, ngs_columns = NGS_FEATURES[position]
+    stat_columns = sorted(set(PER_GAME_STATS[position] + RATE_STATS[position]))
+    return query_dataframe(cursor, f"""
+        SELECT s.player_id, p.player_name, s.season, s.games,
+               {', '.join(f"s.{col}" for col in stat_columns)},
+               {', '.join(f"n.{col} AS ngs_{col}" for col in ngs_columns)}
+        FROM player_seasonal_stats s
+        JOIN players p ON p.id = s.player_id
+        LEFT JOIN {ngs_table} n
+          ON n.player_id = s.player_id AND n.season = s.season
+         AND n.season_type = 'REG' AND n.week = 0
+        WHERE s.season = ANY(%s)
+          AND s.season_type = 'REG'
+          AND s.games >= %s
+          AND p.position = %s
+    """, (list(seasons), MIN_GAMES, position))
+
+def build_position_matrix(rows, position):
+    """
+    Standardize one position's rows into a float32 feature matrix.
+
+    Returns (matrix, mean, std) with NaN features set to the mean (0 after
+    standardizing) and constant features left at 0.
+    """
+    per_game = rows[PER_GAME_STATS[position]].div(rows['games'], axis=0).add_suffix('_per_game')
+    features = pd.concat([per_game, rows], axis=1)[position_features(position)]
+
+    values = features.to_numpy(dtype='float64')
+    mean = np.nanmean(values, axis=0)
+    std = np.nanstd(values, axis=0)
+    std[~(std > 0)] = 1.0
+    mean = np.nan_to_num(mean)
+
+    matrix = np.nan_to_num((values - mean) / std)
+    return matrix.astype('float32'), mean.astype('float32'), std.astype('float32')
+
+def build_similarity_index(seasons=None, path=INDEX_PATH):
+    """Build the index from the database and write it to path"""
+    print("Building similar players index...")
+
+    try:
+        if seasons is None:
+            seasons = range(FIRST_SEASON, datetime.now().year + 1)
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        arrays = {}
+        for position in PER_GAME_STATS:
+            rows = load_position_seasons(cursor, position, seasons)
+            matrix, mean, std = build_position_matrix(rows, position)
+            arrays[f"{position}_vectors"] = matrix
+            arrays[f"{position}_mean"] = mean
+            arrays[f"{position}_std"] = std
+            arrays[f"{position}_features"] = np.array(position_features(position))
+            arrays[f"{position}_player_id"] = rows['player_id'].to_numpy(dtype='int32')
+            arrays[f"{position}_season"] = rows['season'].to_numpy(dtype='int16')
+            arrays[f"{position}_name"] = rows['player_name'].fillna('').to_numpy(dtype=str)
+            print(f"  {position}: {len(rows)} player-seasons x {matrix.shape[1]} features")
+
+        cursor.close()
+        conn.close()
+
+        # Written next to the old index and swapped in, so readers never see half a file
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(temp_path, path)
+        print(f"  Wrote {path}")
+        return True
+
+    except Exception as e:
+        print(f"  Error building similar players index: {e}")
+        return False
+
+def load_index(path=INDEX_PATH):
+    """
+    Load the index into per-position dicts ready for queries.
+
+    Unit vectors (for cosine) and squared norms (for euclidean) are computed
+    once here rather than on every query.
+    """
+    index = {}
+    with np.load(path) as data:
+        for position in PER_GAME_STATS:
+            vectors = data[f"{position}_vectors"]
+            norms = np.linalg.norm(vectors, axis=1)
+            index[position] = {
+                'vectors': vectors,
+                'unit': vectors / np.where(norms > 0, norms, 1)[:, None],
+                'squared_norms': norms ** 2,
+                'features': list(data[f"{position}_features"]),
+                'player_id': data[f"{position}_player_id"],
+                'season': data[f"{position}_season"],
+                'name': data[f"{position}_name"]
+            }
+    return index
+
+def find_player_season(index, player_id, season):
+    """(position, row) of a player-season in the index, or (None, None)"""
+    for position, entry in index.items():
+        rows = np.flatnonzero((entry['player_id'] == player_id) & (entry['season'] == season))
+        if len(rows):
+            return position, rows[0]
+    return None, None
+
+def similar_players(index, player_id, season, k=10, metric='cosine', include_same_player=False):
+    """
+    The k player-seasons of the same position closest to a player's season.
+
+    metric is 'cosine' (profile shape) or 'euclidean' (profile and volume).
+    The player's other seasons are skipped unless include_same_player is set.
+    Returns a list of {player_id, player_name, season, score} dicts, best
+    first; score is the cosine similarity or the euclidean distance.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric {metric!r}, expected one of {METRICS}")
+
+    position, row = find_player_season(index, player_id, season)
+    if position is None:
+        return []
+    entry = index[position]
+
+    if metric == 'cosine':
+        scores = entry['unit'] @ entry['unit'][row]
+        order_scores = -scores
+    else:
+        # |a - b|^2 = |a|^2 + |b|^2 - 2ab, one matrix-vector product for all rows
+        squared = entry['squared_norms'] + entry['squared_norms'][row] - 2 * (entry['vectors'] @ entry['vectors'][row])
+        scores = np.sqrt(np.maximum(squared, 0))
+        order_scores = scores.copy()
+
+    if include_same_player:
+        order_scores[row] = np.inf
+    else:
+        order_scores[entry['player_id'] == player_id] = np.inf
+
+    k = min(k, int(np.isfinite(order_scores).sum()))
+    if k <= 0:
+        return []
+    top = np.argpartition(order_scores, k - 1)[:k]
+    top = top[np.argsort(order_scores[top])]
+
+    return [
+        {
+            'player_id': int(entry['player_id'][i]),
+            'player_name': str(entry['name'][i]),
+            'season': int(entry['season'][i]),
+            'score': round(float(scores[i]), 4)
+        }
+        for i in top
+    ]
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Build or query the similar players index")
+    parser.add_argument('--player-id', type=int,
+                        help="Query players similar to this players.id instead of rebuilding")
+    parser.add_argument('--season', type=int, help="Season of the player to compare")
+    parser.add_argument('--k', type=int, default=10, help="Number of similar player-seasons (default: 10)")
+    parser.add_argument('--metric', choices=METRICS, default='cosine')
+    args = parser.parse_args()
+
+    print("FFAngles Similar Players")
+    print("=" * 40)
+
+    if args.player_id is None:
+        print(f"Started at: {datetime.now()}")
+        if not build_similarity_index():
+            print("\nSimilar players index build failed!")
+            sys.exit(1)
+        print("\nSimilar players index built successfully!")
+        return
+
+    if args.season is None:
+        parser.error("--season is required with --player-id")
+
+    index = load_index()
+    started = datetime.now()
+    matches = similar_players(index, args.player_id, args.season, args.k, args.metric)
+    elapsed_ms = (datetime.now() - started).total_seconds() * 1000
+
+    if not matches:
+        print(f"Player {args.player_id} has no indexed {args.season} season")
+        sys.exit(1)
+
+    print(f"Most similar to player {args.player_id} ({args.season}), {args.metric}, {elapsed_ms:.2f} ms:")
+    for match in matches:
+        print(f"  {match['player_name']} ({match['season']}): {match['score']}")
+
+if __name__ == "__main__":
+    main()
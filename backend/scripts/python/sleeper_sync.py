@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Incremental sync of Sleeper's NFL player universe into players
+
+/v1/players/nfl is a multi-megabyte dump of every player, but only a few
+dozen change on a normal day. The fields the scripts use are kept in a local
+gzipped snapshot together with the response's SHA-256, ETag and
+Last-Modified:
+
+- the download is conditional (If-None-Match / If-Modified-Since), so an
+  unchanged dump is a 304 with no body;
+- a body whose hash matches the snapshot is not parsed;
+- the snapshot's ids are diffed against the ids stored in players and only
+  the differing ones are written, in one UPDATE ... FROM (VALUES ...).
+
+Diffing against players rather than the previous snapshot means Sleeper
+players without a players row yet, and ids later overwritten by the nightly
+nflverse load, stay pending and are written by the next run that can. The
+snapshot is only replaced after the update commits. --full ignores it.
+"""
+
+import os
+import sys
+import gzip
+import json
+import hashlib
+import argparse
+import requests
+from datetime import datetime
+
+from bulk_load import update_from_values
+from db import get_db_connection
+
+SLEEPER_PLAYERS_URL = 'https://api.sleeper.app/v1/players/nfl'
+
+SNAPSHOT_PATH = os.getenv(
+    'SLEEPER_SNAPSHOT_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'data', 'sleeper_players.json.gz')
+)
+
+# Fields of each Sleeper player kept in the snapshot
+SLEEPER_FIELDS = ['gsis_id', 'espn_id', 'yahoo_id', 'fantasy_data_id', 'rotowire_id', 'sport', 'active']
+
+# Cross-platform id columns of players written from Sleeper, in VALUES order after gsis_id
+ID_COLUMNS = ['sleeper_id', 'espn_id', 'yahoo_id', 'fantasy_data_id', 'rotowire_id']
+
+def load_snapshot(path=SNAPSHOT_PATH):
+    """Previous snapshot ({'sha256', 'etag', 'last_modified', 'players'}), or None"""
+    if not os.path.exists(path):
+        return None
+    with gzip.open(path, 'rt') as f:
+        return json.load(f)
+
+def save_snapshot(snapshot, path=SNAPSHOT_PATH):
+    """Write the snapshot atomically"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with gzip.open(temp_path, 'wt') as f:
+        json.dump(snapshot, f, separators=(',', ':'))
+    os.replace(temp_path, path)
+
+def project_players(raw):
+    """Keep only SLEEPER_FIELDS of every player"""
+    return {
+        sleeper_id: {field: player.get(field) for field in SLEEPER_FIELDS}
+        for sleeper_id, player in raw.items()
+    }
+
+def fetch_sleeper_players(snapshot=None):
+    """
+    Download the player dump, conditionally on the snapshot.
+
+    Returns (snapshot, changed): the current snapshot (the previous one with
+    refreshed validators when nothing changed) and whether its players
+    differ from the previous snapshot's.
+    """
+    headers = {}
+    if snapshot:
+        if snapshot.get('etag'):
+            headers['If-None-Match'] = snapshot['etag']
+        if snapshot.get('last_modified'):
+            headers['If-Modified-Since'] = snapshot['last_modified']
+
+    response = requests.get(SLEEPER_PLAYERS_URL, headers=headers, timeout=60)
+    if response.status_code == 304 and snapshot:
+        print("Sleeper players not modified since the last sync")
+        return snapshot, False
+    response.raise_for_status()
+
+    sha256 = hashlib.sha256(response.content).hexdigest()
+    validators = {
+        'sha256': sha256,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'fetched_at': datetime.now().isoformat()
+    }
+    if snapshot and snapshot.get('sha256') == sha256:
+        print(f"Sleeper players unchanged ({len(response.content) / 1e6:.1f} MB, same SHA-256)")
+        return {**snapshot, **validators}, False
+
+    players = project_players(response.json())
+    print(f"Fetched {len(players)} players from Sleeper API ({len(response.content) / 1e6:.1f} MB)")
+    return {**validators, 'players': players}, True
+
+def _id(value):
+    """Sleeper ids as text, None when missing"""
+    return str(value) if value not in (None, '') else None
+
+def id_mapping_rows(players):
+    """{gsis_id: (gsis_id, *ID_COLUMNS)} for active NFL players with a GSIS id"""
+    return {
+        str(player['gsis_id']).strip(): (str(player['gsis_id']).strip(), sleeper_id) + tuple(
+            _id(player.get(column)) for column in ID_COLUMNS[1:]
+        )
+        for sleeper_id, player in players.items()
+        if player.get('sport') == 'nfl' and player.get('gsis_id') and player.get('active')
+    }
+
+def load_player_ids(cursor):
+    """{gsis_id: (gsis_id, *ID_COLUMNS)} as currently stored in players"""
+    cursor.execute(f"SELECT gsis_id, {', '.join(ID_COLUMNS)} FROM players WHERE gsis_id IS NOT NULL")
+    return {row[0]: tuple(_id(value) for value in row) for row in cursor.fetchall()}
+
+def diff_rows(stored, rows):
+    """
+    (changed, missing): rows whose ids differ from the stored ones, and the
+    number of rows without a players row yet
+    """
+    changed = [row for gsis_id, row in rows.items() if gsis_id in stored and stored[gsis_id] != row]
+    missing = sum(1 for gsis_id in rows if gsis_id not in stored)
+    return changed, missing
+
+def update_player_ids(cursor, rows):
+    """
+    Write the cross-platform ids of the given (gsis_id, *ID_COLUMNS) rows to
+    players; returns the updated gsis_ids and the (row, message) of failed rows
+    """
+    assignments = ', '.join(f"{column} = v.{column}" for column in ID_COLUMNS)
+    distinct = ' OR '.join(f"p.{column} IS DISTINCT FROM v.{column}" for column in ID_COLUMNS)
+    updated, errors = update_from_values(cursor, f"""
+        UPDATE players p
+        SET {assignments}
+        FROM (VALUES %s) AS v(gsis_id, {', '.join(ID_COLUMNS)})
+        WHERE p.gsis_id = v.gsis_id
+          AND ({distinct})
+        RETURNING v.gsis_id
+    """, rows, fetch=True)
+    return [row[0] for row in updated], errors
+
+def sync_sleeper_players(full=False, path=SNAPSHOT_PATH):
+    """Write the Sleeper ids that differ from players (downloading the full dump with full)"""
+    print("Syncing Sleeper players...")
+
+    try:
+        previous = None if full else load_snapshot(path)
+        snapshot, _ = fetch_sleeper_players(previous)
+        rows = id_mapping_rows(snapshot['players'])
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        changed, missing = diff_rows(load_player_ids(cursor), rows)
+        print(f"  {len(rows)} active NFL players with GSIS ids: {len(changed)} differ from players, "
+              f"{missing} not in players yet")
+
+        updated, errors = update_player_ids(cursor, changed)
+        conn.commit()
+        cursor.close()
+        conn.close()
+        print(f"  Updated {len(updated)} players")
+        for row, message in errors:
+            print(f"  [ERROR] {row[0]} (Sleeper {row[1]}): {message}")
+
+        save_snapshot(snapshot, path)
+        return True
+
+    except Exception as e:
+        print(f"  Error syncing Sleeper players: {e}")
+        return False
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Sync changed Sleeper player ids into players")
+    parser.add_argument('--full', action='store_true', help="Ignore the snapshot and download the full dump")
+    args = parser.parse_args()
+
+    print("FFAngles Sleeper Sync")
+    print("=" * 40)
+    print(f"Started at: {datetime.now()}")
+
+    if sync_sleeper_players(args.full):
+        print("\nSleeper sync completed successfully!")
+    else:
+        print("\nSleeper sync failed!")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
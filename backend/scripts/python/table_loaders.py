@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Column specs and frame preparation for the nfl_data_py tables
+
+Shared by nightly_update_all and import_historical_nfl_data. A frame is
+renamed to its table's columns and given players.id here, then validated
+(see validation.py) and upserted with one COPY per target table.
+"""
+
+import pandas as pd
+
+from bulk_load import query_dataframe, upsert_dataframe
+from season_partitions import STATS_CONFLICT_KEY
+
+GAME_COLUMNS = [
+    'game_id', 'season', 'game_type', 'week', 'gameday', 'weekday', 'gametime',
+    'away_team', 'home_team', 'away_score', 'home_score', 'location', 'result',
+    'total', 'overtime', 'old_game_id', 'gsis', 'nfl_detail_id', 'pfr', 'pff',
+    'espn', 'ftn', 'away_rest', 'home_rest', 'away_moneyline', 'home_moneyline',
+    'spread_line', 'away_spread_odds', 'home_spread_odds', 'total_line',
+    'under_odds', 'over_odds', 'div_game', 'roof', 'surface', 'temp', 'wind',
+    'away_qb_id', 'home_qb_id', 'away_qb_name', 'home_qb_name', 'away_coach',
+    'home_coach', 'referee', 'stadium_id', 'stadium'
+]
+
+GAME_SCORE_COLUMNS = ['away_score', 'home_score', 'result', 'total', 'overtime']
+
+GAME_LINE_COLUMNS = [
+    'away_moneyline', 'home_moneyline', 'spread_line', 'away_spread_odds',
+    'home_spread_odds', 'total_line', 'under_odds', 'over_odds'
+]
+
+# BIGINT external ids in games; non-numeric values are stored as NULL
+GAME_ID_COLUMNS = ['gsis', 'nfl_detail_id', 'pff', 'espn', 'ftn', 'old_game_id']
+
+NGS_TABLES = {
+    'passing': 'player_ngs_passing',
+    'receiving': 'player_ngs_receiving',
+    'rushing': 'player_ngs_rushing'
+}
+
+NGS_PLAYER_COLUMNS = [
+    'player_gsis_id', 'player_first_name', 'player_last_name',
+    'player_jersey_number', 'player_short_name'
+]
+
+# source_gsis: column of the nfl_data_py frame holding the GSIS id
+STAT_TABLES = {
+    'player_seasonal_stats': {
+        'source_gsis': 'player_id',
+        'conflict': ['gsis_id', 'season', 'season_type'],
+        'columns': [
+            'gsis_id', 'player_id', 'season', 'season_type', 'games', 'completions', 'attempts',
+            'passing_yards', 'passing_tds', 'interceptions', 'sacks', 'sack_yards',
+            'sack_fumbles', 'sack_fumbles_lost', 'passing_air_yards', 'passing_yards_after_catch',
+            'passing_first_downs', 'passing_epa', 'passing_2pt_conversions', 'pacr', 'dakota',
+            'carries', 'rushing_yards', 'rushing_tds', 'rushing_fumbles', 'rushing_fumbles_lost',
+            'rushing_first_downs', 'rushing_epa', 'rushing_2pt_conversions',
+            'receptions', 'targets', 'receiving_yards', 'receiving_tds', 'receiving_fumbles',
+            'receiving_fumbles_lost', 'receiving_air_yards', 'receiving_yards_after_catch',
+            'receiving_first_downs', 'receiving_epa', 'receiving_2pt_conversions',
+            'racr', 'target_share', 'air_yards_share', 'wopr_x', 'wopr_y',
+            'tgt_sh', 'ay_sh', 'yac_sh', 'ry_sh', 'rtd_sh', 'rfd_sh', 'rtdfd_sh',
+            'dom', 'w8dom', 'yptmpa', 'ppr_sh', 'special_teams_tds', 'fantasy_points', 'fantasy_points_ppr'
+        ]
+    },
+    'player_weekly_stats': {
+        'source_gsis': 'player_id',
+        'conflict': STATS_CONFLICT_KEY,
+        'columns': [
+            'gsis_id', 'player_id', 'season', 'season_type', 'week', 'opponent_team', 'recent_team',
+            'completions', 'attempts', 'passing_yards', 'passing_tds', 'interceptions',
+            'sacks', 'sack_yards', 'carries', 'rushing_yards', 'rushing_tds',
+            'rushing_fumbles', 'rushing_fumbles_lost', 'receptions', 'targets',
+            'receiving_yards', 'receiving_tds', 'receiving_fumbles', 'receiving_fumbles_lost',
+            'passing_epa', 'rushing_epa', 'receiving_epa', 'racr', 'target_share',
+            'air_yards_share', 'wopr', 'fantasy_points', 'fantasy_points_ppr'
+        ]
+    },
+    'player_ngs_passing': {
+        'source_gsis': 'player_gsis_id',
+        'conflict': STATS_CONFLICT_KEY,
+        'columns': [
+            'gsis_id', 'player_id', 'season', 'season_type', 'week', 'player_display_name',
+            'player_position', 'team_abbr', 'attempts', 'pass_yards', 'pass_touchdowns',
+            'interceptions', 'passer_rating', 'completions', 'completion_percentage',
+            'expected_completion_percentage', 'completion_percentage_above_expectation',
+            'avg_time_to_throw', 'avg_completed_air_yards', 'avg_intended_air_yards',
+            'avg_air_yards_differential', 'aggressiveness', 'max_completed_air_distance',
+            'avg_air_yards_to_sticks', 'avg_air_distance', 'max_air_distance'
+        ] + NGS_PLAYER_COLUMNS
+    },
+    'player_ngs_receiving': {
+        'source_gsis': 'player_gsis_id',
+        'conflict': STATS_CONFLICT_KEY,
+        'columns': [
+            'gsis_id', 'player_id', 'season', 'season_type', 'week', 'player_display_name',
+            'player_position', 'team_abbr', 'targets', 'receptions', 'yards', 'rec_touchdowns',
+            'avg_cushion', 'avg_separation', 'avg_intended_air_yards', 'percent_share_of_intended_air_yards',
+            'avg_yac', 'avg_expected_yac', 'avg_yac_above_expectation', 'catch_percentage'
+        ] + NGS_PLAYER_COLUMNS
+    },
+    'player_ngs_rushing': {
+        'source_gsis': 'player_gsis_id',
+        'conflict': STATS_CONFLICT_KEY,
+        'columns': [
+            'gsis_id', 'player_id', 'season', 'season_type', 'week', 'player_display_name',
+            'player_position', 'team_abbr', 'rush_attempts', 'rush_yards', 'rush_touchdowns',
+            'avg_rush_yards', 'expected_rush_yards', 'rush_yards_over_expected',
+            'avg_time_to_los', 'percent_attempts_gte_eight_defenders', 'efficiency',
+            'rush_yards_over_expected_per_att', 'rush_pct_over_expected'
+        ] + NGS_PLAYER_COLUMNS
+    }
+}
+
+def attach_player_ids(cursor, data, gsis_column='gsis_id'):
+    """Add players.id as player_id by GSIS id (NULL when the player is unknown)"""
+    players = query_dataframe(cursor, "SELECT gsis_id, id AS player_id FROM players")
+    players = players.drop_duplicates('gsis_id').rename(columns={'gsis_id': gsis_column})
+    return data.merge(players, on=gsis_column, how='left')
+
+def select_columns(data, columns, table_name):
+    """Reorder a frame to the table's columns, adding missing ones as NULL"""
+    missing = [col for col in columns if col not in data.columns]
+    if missing:
+        print(f"  {table_name}: source has no {', '.join(missing)}, loading as NULL")
+    return data.reindex(columns=columns)
+
+def prepare_stat_frame(cursor, data, table_name):
+    """Rename an nfl_data_py stats frame to its table's columns and attach player ids"""
+    spec = STAT_TABLES[table_name]
+    data = data.copy()
+
+    data['gsis_id'] = data[spec['source_gsis']]
+    data = data.drop(columns=['player_id'], errors='ignore')
+    if 'season_type' not in data.columns:
+        data['season_type'] = 'REG'
+    elif isinstance(data['season_type'].dtype, pd.CategoricalDtype):
+        # Categorical (memory-budget mode) columns only accept known categories
+        if 'REG' not in data['season_type'].cat.categories:
+            data['season_type'] = data['season_type'].cat.add_categories('REG')
+    data['season_type'] = data['season_type'].fillna('REG')
+
+    data = attach_player_ids(cursor, data)
+    return select_columns(data, spec['columns'], table_name)
+
+def source_columns(table_name):
+    """nfl_data_py columns a stats table is built from; the rest can be dropped on fetch"""
+    spec = STAT_TABLES[table_name]
+    derived = ['gsis_id', 'player_id', spec['source_gsis']]
+    return [spec['source_gsis']] + [col for col in spec['columns'] if col not in derived]
+
+def upsert_stat_frame(cursor, data, target_table, table_name, dry_run=False, changes=None):
+    """Upsert a prepared stats frame into the table (or one of its partitions)"""
+    spec = STAT_TABLES[table_name]
+    return upsert_dataframe(
+        cursor, data, target_table, spec['conflict'], spec['columns'], dry_run=dry_run,
+        changes=changes
+    )
+
+def prepare_games_frame(schedules):
+    """Select the games columns and null out non-numeric external ids"""
+    games = select_columns(schedules, GAME_COLUMNS, 'games')
+
+    for col in GAME_ID_COLUMNS:
+        text = games[col].astype('string').str.replace(r'\.0$', '', regex=True)
+        numeric = text.str.fullmatch(r'\d+').fillna(False).astype(bool)
+        games[col] = pd.to_numeric(text.where(numeric), errors='coerce')
+
+    return games
@@ -3,31 +3,30 @@
 Update all foreign key relationships to reference new players table
 """
 
-import os
-import sys
+import time
+import argparse
 import psycopg2
-from dotenv import load_dotenv
+import psycopg2.errors
+from concurrent.futures import ThreadPoolExecutor
 
-# Load environment variables
-load_dotenv()
+from db import get_db_connection
+from schema_catalog import (
+    load_schema_catalog, tables_like, table_columns, has_column,
+    estimated_rows, estimated_non_null
+)
+from season_partitions import list_partitions
 
-# Database connection configuration
-DB_CONFIG = {
-    'host': os.getenv('DB_HOST', 'localhost'),
-    'database': os.getenv('DB_NAME', 'ff_angles'),
-    'user': os.getenv('DB_USER', 'postgres'),
-    'password': os.getenv('DB_PASSWORD', 'password'),
-    'port': os.getenv('DB_PORT', '5432')
-}
+# ids per UPDATE transaction when remapping player_id
+BATCH_SIZE = 20000
 
-def get_db_connection():
-    """Create database connection"""
-    try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        return conn
-    except Exception as e:
-        print(f"Error connecting to database: {e}")
-        sys.exit(1)
+# Tables remapped at once, each on its own connection
+MAX_WORKERS = 3
+
+# DDL and batches give up after this instead of queueing ahead of API reads
+LOCK_TIMEOUT = '5s'
+LOCK_RETRIES = 5
+
+FK_DEFINITION = "FOREIGN KEY (player_id) REFERENCES players(id) ON DELETE SET NULL"
 
 def check_existing_tables():
     """Check which statistical tables exist and their structure"""
@@ -36,16 +35,9 @@ def check_existing_tables():
     conn = get_db_connection()
     cursor = conn.cursor()
     
-    # Check which tables exist
-    cursor.execute("""
-        SELECT table_name 
-        FROM information_schema.tables 
-        WHERE table_schema = 'public' 
-        AND table_name LIKE 'player_%'
-        ORDER BY table_name
-    """)
-    
-    tables = [row[0] for row in cursor.fetchall()]
+    # Table, column and row-count metadata all come from one catalog query
+    catalog = load_schema_catalog(cursor)
+    tables = tables_like(catalog, 'player')
     
     print(f"Found {len(tables)} player tables:")
     for table in tables:
@@ -53,30 +45,26 @@ def check_existing_tables():
     
     # Check column structure for each table
     for table in tables:
-        cursor.execute(f"""
-            SELECT column_name, data_type 
-            FROM information_schema.columns 
-            WHERE table_name = '{table}' 
-            AND column_name IN ('player_id', 'gsis_id', 'tank01_player_id')
-            ORDER BY column_name
-        """)
-        
-        columns = cursor.fetchall()
+        columns = [
+            (col_name, col_type) for col_name, col_type in table_columns(catalog, table)
+            if col_name in ('player_id', 'gsis_id', 'tank01_player_id')
+        ]
         if columns:
             print(f"\n{table} relevant columns:")
-            for col_name, col_type in columns:
+            for col_name, col_type in sorted(columns):
                 print(f"    {col_name}: {col_type}")
                 
-            # Show sample data to understand current state
-            cursor.execute(f"SELECT COUNT(*) FROM {table}")
-            count = cursor.fetchone()[0]
-            print(f"    Records: {count}")
+            # Planner estimates keep this instant on the multi-million row stats tables
+            count = estimated_rows(catalog, table)
+            print(f"    Records: ~{count:,}")
             
             # Check current player_id population (skip for players table itself)
             if table != 'players':
-                cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE player_id IS NOT NULL")
-                populated = cursor.fetchone()[0]
-                print(f"    With player_id: {populated} ({populated/count*100:.1f}%)")
+                populated = estimated_non_null(catalog, table, 'player_id')
+                if populated is None:
+                    print(f"    With player_id: unknown (no statistics yet, run ANALYZE {table})")
+                elif count:
+                    print(f"    With player_id: ~{populated:,} ({populated/count*100:.1f}%)")
             else:
                 print(f"    Primary table (has 'id' as primary key)")
     
@@ -84,73 +72,136 @@ def check_existing_tables():
     conn.close()
     return tables
 
-def update_table_foreign_keys(table_name):
-    """Update foreign keys for a specific table"""
-    print(f"\nUpdating foreign keys for {table_name}...")
-    
+def connect_with_lock_timeout():
+    """Connection whose statements give up instead of queueing behind other locks"""
     conn = get_db_connection()
     cursor = conn.cursor()
+    cursor.execute(f"SET lock_timeout = '{LOCK_TIMEOUT}'")
+    conn.commit()
+    return conn, cursor
+
+def remap_batch(conn, cursor, table_name, low, high):
+    """Map player_id for one id range in its own short transaction, retrying on lock timeouts"""
+    for attempt in range(1, LOCK_RETRIES + 1):
+        try:
+            cursor.execute(f"""
+                UPDATE {table_name} t
+                SET player_id = p.id
+                FROM players p
+                WHERE t.id >= %s AND t.id < %s
+                AND t.player_id IS NULL
+                AND t.gsis_id = p.gsis_id
+            """, (low, high))
+            updated = cursor.rowcount
+            conn.commit()
+            return updated
+        except psycopg2.errors.LockNotAvailable:
+            conn.rollback()
+            if attempt == LOCK_RETRIES:
+                raise
+            time.sleep(attempt)
+
+def update_table_foreign_keys(table_name, batch_size=BATCH_SIZE):
+    """
+    Map player_id by GSIS id for a specific table in id-range batches.
+
+    Each batch is its own transaction, so row locks are held briefly, dead
+    tuples can be vacuumed as the remap runs and readers are never blocked.
+    """
+    print(f"\n[{table_name}] Updating foreign keys...")
     
-    # Check if table has gsis_id column
-    cursor.execute(f"""
-        SELECT column_name 
-        FROM information_schema.columns 
-        WHERE table_name = '{table_name}' 
-        AND column_name = 'gsis_id'
-    """)
-    
-    has_gsis = cursor.fetchone() is not None
+    conn, cursor = connect_with_lock_timeout()
+    catalog = load_schema_catalog(cursor)
     
-    if not has_gsis:
+    # Check if table has gsis_id column
+    if not has_column(catalog, table_name, 'gsis_id'):
         print(f"  [SKIP] {table_name} - no gsis_id column")
         cursor.close()
         conn.close()
         return 0
-    
-    # Update player_id using gsis_id matching
-    update_sql = f"""
-    UPDATE {table_name} 
-    SET player_id = p.id 
-    FROM players p 
-    WHERE {table_name}.gsis_id = p.gsis_id 
-    AND {table_name}.player_id IS NULL
-    """
-    
+
+    # Derived tables such as player_epa_weekly carry gsis_id but no player_id
+    if not has_column(catalog, table_name, 'player_id'):
+        print(f"  [SKIP] {table_name} - no player_id column")
+        cursor.close()
+        conn.close()
+        return 0
+
     try:
-        cursor.execute(update_sql)
-        updated_count = cursor.rowcount
-        conn.commit()
+        if not has_column(catalog, table_name, 'id'):
+            # No surrogate key to range over; small tables are updated in one statement
+            cursor.execute(f"""
+                UPDATE {table_name} t
+                SET player_id = p.id
+                FROM players p
+                WHERE t.gsis_id = p.gsis_id
+                AND t.player_id IS NULL
+            """)
+            updated_count = cursor.rowcount
+            conn.commit()
+            print(f"  [SUCCESS] [{table_name}] Updated {updated_count} records")
+            return updated_count
         
-        print(f"  [SUCCESS] Updated {updated_count} records in {table_name}")
+        cursor.execute(f"SELECT MIN(id), MAX(id) FROM {table_name}")
+        min_id, max_id = cursor.fetchone()
+        conn.commit()
+        if min_id is None:
+            print(f"  [SKIP] {table_name} - table is empty")
+            return 0
         
-        # Show final mapping stats
-        cursor.execute(f"""
-            SELECT 
-                COUNT(*) as total,
-                COUNT(player_id) as mapped,
-                ROUND(COUNT(player_id) * 100.0 / COUNT(*), 1) as percentage
-            FROM {table_name}
-        """)
+        batches = (max_id - min_id) // batch_size + 1
+        updated_count = 0
+        next_report = 10
         
-        total, mapped, percentage = cursor.fetchone()
-        print(f"  [STATS] {mapped}/{total} records mapped ({percentage}%)")
+        for batch, low in enumerate(range(min_id, max_id + 1, batch_size), 1):
+            updated_count += remap_batch(conn, cursor, table_name, low, low + batch_size)
+            
+            percent = batch * 100 // batches
+            if percent >= next_report or batch == batches:
+                print(f"  [{table_name}] {percent}% ({batch}/{batches} batches, {updated_count} updated)")
+                next_report = percent - percent % 10 + 10
         
-        cursor.close()
-        conn.close()
+        print(f"  [SUCCESS] [{table_name}] Updated {updated_count} records")
         return updated_count
         
     except Exception as e:
         print(f"  [ERROR] Failed to update {table_name}: {e}")
+        conn.rollback()
+        return 0
+    
+    finally:
         cursor.close()
         conn.close()
-        return 0
+
+def update_all_foreign_keys(tables, workers=MAX_WORKERS, batch_size=BATCH_SIZE):
+    """Remap several tables in parallel, one connection per worker"""
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        counts = executor.map(lambda table: update_table_foreign_keys(table, batch_size), tables)
+        return dict(zip(tables, counts))
+
+def add_table_constraint(cursor, table, constraint, not_valid=True):
+    """(Re)create a player_id foreign key; NOT VALID skips the full-table check"""
+    cursor.execute(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {constraint}")
+    cursor.execute(f"""
+        ALTER TABLE {table} 
+        ADD CONSTRAINT {constraint} 
+        {FK_DEFINITION}{' NOT VALID' if not_valid else ''}
+    """)
 
 def add_foreign_key_constraints():
-    """Add proper foreign key constraints to all tables"""
+    """
+    Add the player_id foreign key constraints without long-held locks.
+
+    Constraints are added NOT VALID (a brief lock, no scan) and checked later
+    by validate_foreign_key_constraints. PostgreSQL cannot add a NOT VALID
+    foreign key to a partitioned table, so each season partition gets its own
+    constraint instead and the parent's is added once they are validated.
+    Returns the (table, constraint, partitioned parent) entries to validate.
+    """
     print("\nAdding foreign key constraints...")
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    conn, cursor = connect_with_lock_timeout()
+    catalog = load_schema_catalog(cursor, refresh=True)
     
     # Tables that should have foreign key constraints
     tables_with_fk = [
@@ -162,42 +213,94 @@ def add_foreign_key_constraints():
         'player_game_logs'
     ]
     
+    to_validate = []
+    
     for table in tables_with_fk:
         try:
             # Check if table exists
-            cursor.execute(f"""
-                SELECT 1 FROM information_schema.tables 
-                WHERE table_name = '{table}'
-            """)
-            
-            if not cursor.fetchone():
+            if table not in catalog:
                 print(f"  [SKIP] {table} - table doesn't exist")
                 continue
             
-            # Drop existing foreign key constraint if it exists
-            cursor.execute(f"""
-                ALTER TABLE {table} 
-                DROP CONSTRAINT IF EXISTS fk_{table}_player_id
-            """)
-            
-            # Add new foreign key constraint
-            cursor.execute(f"""
-                ALTER TABLE {table} 
-                ADD CONSTRAINT fk_{table}_player_id 
-                FOREIGN KEY (player_id) 
-                REFERENCES players(id) 
-                ON DELETE SET NULL
-            """)
+            constraint = f"fk_{table}_player_id"
+            existing = catalog[table]['constraints'].get(constraint, {}).get('definition')
+            if existing == FK_DEFINITION:
+                print(f"  [SKIP] {table} - constraint already present and validated")
+                continue
+            if existing == f"{FK_DEFINITION} NOT VALID":
+                print(f"  [SKIP] {table} - constraint already present, pending validation")
+                to_validate.append((table, constraint, None))
+                continue
             
-            print(f"  [SUCCESS] Added foreign key constraint to {table}")
+            if catalog[table]['kind'] == 'partitioned':
+                cursor.execute(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {constraint}")
+                partitions = list_partitions(cursor, table)
+                for partition in partitions:
+                    add_table_constraint(cursor, partition, f"fk_{partition}_player_id")
+                    to_validate.append((partition, f"fk_{partition}_player_id", table))
+                conn.commit()
+                print(f"  [SUCCESS] Added NOT VALID constraints to {len(partitions)} {table} partitions")
+            else:
+                add_table_constraint(cursor, table, constraint)
+                conn.commit()
+                to_validate.append((table, constraint, None))
+                print(f"  [SUCCESS] Added NOT VALID constraint to {table}")
             
         except Exception as e:
             print(f"  [ERROR] Failed to add constraint to {table}: {e}")
+            conn.rollback()
             continue
     
-    conn.commit()
     cursor.close()
     conn.close()
+    return to_validate
+
+def validate_foreign_key_constraints(to_validate):
+    """
+    Check existing rows against the NOT VALID constraints.
+
+    VALIDATE CONSTRAINT only takes a SHARE UPDATE EXCLUSIVE lock, so reads and
+    writes continue while each table is scanned. Partitioned parents then get
+    their own constraint, which adopts the validated partition constraints
+    instead of scanning again.
+    """
+    print("\nValidating foreign key constraints...")
+    
+    conn, cursor = connect_with_lock_timeout()
+    failures = 0
+    failed_parents = set()
+    parents = []
+    
+    for position, (table, constraint, parent) in enumerate(to_validate, 1):
+        if parent and parent not in parents:
+            parents.append(parent)
+        try:
+            started = time.time()
+            cursor.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {constraint}")
+            conn.commit()
+            print(f"  [{position}/{len(to_validate)}] {table} validated in {time.time() - started:.1f}s")
+        except Exception as e:
+            print(f"  [ERROR] Failed to validate {constraint} on {table}: {e}")
+            conn.rollback()
+            failures += 1
+            failed_parents.add(parent)
+    
+    for parent in parents:
+        if parent in failed_parents:
+            print(f"  [SKIP] {parent} - a partition failed validation")
+            continue
+        try:
+            add_table_constraint(cursor, parent, f"fk_{parent}_player_id", not_valid=False)
+            conn.commit()
+            print(f"  [SUCCESS] Added foreign key constraint to {parent}")
+        except Exception as e:
+            print(f"  [ERROR] Failed to add constraint to {parent}: {e}")
+            conn.rollback()
+            failures += 1
+    
+    cursor.close()
+    conn.close()
+    return failures == 0
 
 def verify_mapping_success():
     """Verify the mapping was successful"""
@@ -264,6 +367,13 @@ def verify_mapping_success():
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="Remap player_id foreign keys to the players table")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help=f"ids per UPDATE transaction (default: {BATCH_SIZE})")
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS,
+                        help=f"Tables remapped in parallel (default: {MAX_WORKERS})")
+    args = parser.parse_args()
+    
     print("Foreign Key Migration to New Players Table")
     print("=" * 45)
     
@@ -275,17 +385,19 @@ def main():
     print("UPDATING FOREIGN KEY RELATIONSHIPS")
     print(f"{'='*45}")
     
-    total_updated = 0
+    # Skip the players table itself
+    updated = update_all_foreign_keys(
+        [table for table in tables if table != 'players'], args.workers, args.batch_size
+    )
+    total_updated = sum(updated.values())
     
-    for table in tables:
-        if table != 'players':  # Skip the players table itself
-            updated = update_table_foreign_keys(table)
-            total_updated += updated
+    # Step 3: Add foreign key constraints without validating them
+    to_validate = add_foreign_key_constraints()
     
-    # Step 3: Add proper foreign key constraints
-    add_foreign_key_constraints()
+    # Step 4: Validate them with a lock that does not block reads or writes
+    validate_foreign_key_constraints(to_validate)
     
-    # Step 4: Verify success
+    # Step 5: Verify success
     verify_mapping_success()
     
     print(f"\n[SUCCESS] Foreign key migration completed!")
@@ -293,4 +405,4 @@ def main():
     print("\nYour nfl_data_py import scripts should now work correctly!")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Vectorized pre-load validation for the nfl_data_py loaders
+
+Every frame is checked in a handful of column-wise passes before any DB work:
+null keys, duplicate conflict keys, out-of-range values, bigint overflow and
+unknown team abbreviations. Rejected rows are written to a quarantine CSV with
+the reason(s) they failed, so the bulk load only ever sees clean rows.
+"""
+
+import os
+import pandas as pd
+from datetime import datetime
+
+# Where rejected rows are written, one CSV per table per run
+QUARANTINE_DIR = os.getenv(
+    'QUARANTINE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'data', 'quarantine')
+)
+
+# Current nflverse abbreviations, the teams table's LAR, and relocated franchises
+# that still appear in historical seasons
+KNOWN_TEAMS = frozenset([
+    'ARI', 'ATL', 'BAL', 'BUF', 'CAR', 'CHI', 'CIN', 'CLE', 'DAL', 'DEN', 'DET',
+    'GB', 'HOU', 'IND', 'JAX', 'KC', 'LA', 'LAC', 'LV', 'MIA', 'MIN', 'NE', 'NO',
+    'NYG', 'NYJ', 'PHI', 'PIT', 'SEA', 'SF', 'TB', 'TEN', 'WAS',
+    'LAR', 'OAK', 'SD', 'STL'
+])
+
+BIGINT_LIMIT = 2 ** 63
+
+SEASON_RANGE = (1999, 2100)
+STATS_KEY = ['gsis_id', 'season', 'season_type', 'week']
+GAME_EXTERNAL_IDS = ['old_game_id', 'gsis', 'nfl_detail_id', 'pff', 'espn', 'ftn']
+
+# Per-table checks: keys (non-null and unique), required (non-null),
+# ranges (inclusive bounds), teams (must be known), bigint (must fit BIGINT)
+VALIDATION_RULES = {
+    'teams': {
+        'keys': ['team_abbr']
+    },
+    'players': {
+        'keys': ['gsis_id'],
+        'required': ['player_name', 'position'],
+        'ranges': {'jersey_number': (0, 99)}
+    },
+    'games': {
+        'keys': ['game_id'],
+        'required': ['season'],
+        'ranges': {'season': SEASON_RANGE, 'week': (1, 22)},
+        'teams': ['away_team', 'home_team'],
+        'bigint': GAME_EXTERNAL_IDS
+    },
+    'player_seasonal_stats': {
+        'keys': ['gsis_id', 'season', 'season_type'],
+        'ranges': {'season': SEASON_RANGE, 'games': (0, 22)}
+    },
+    'player_weekly_stats': {
+        'keys': STATS_KEY,
+        'ranges': {
+            'season': SEASON_RANGE, 'week': (1, 22),
+            'attempts': (0, 100), 'completions': (0, 100), 'carries': (0, 100),
+            'targets': (0, 50), 'receptions': (0, 50)
+        },
+        'teams': ['recent_team', 'opponent_team']
+    },
+    # NGS week 0 holds the season-long aggregate
+    'player_ngs_passing': {
+        'keys': STATS_KEY,
+        'ranges': {'season': SEASON_RANGE, 'week': (0, 22)},
+        'teams': ['team_abbr']
+    },
+    'player_ngs_receiving': {
+        'keys': STATS_KEY,
+        'ranges': {'season': SEASON_RANGE, 'week': (0, 22)},
+        'teams': ['team_abbr']
+    },
+    'player_ngs_rushing': {
+        'keys': STATS_KEY,
+        'ranges': {'season': SEASON_RANGE, 'week': (0, 22)},
+        'teams': ['team_abbr']
+    }
+}
+
+def reject_reasons(data, keys=(), required=(), ranges=None, teams=(), bigint=()):
+    """
+    Return a Series with the reasons each row fails validation.
+
+    Rows that pass get an empty string. Each check is a single vectorized
+    mask over the whole frame.
+    """
+    reasons = pd.Series('', index=data.index)
+
+    def flag(mask, reason):
+        nonlocal reasons
+        reasons = reasons.mask(mask, reasons + reason + '; ')
+
+    for col in list(keys) + list(required):
+        flag(data[col].isna(), f"null {col}")
+
+    if keys:
+        keys = list(keys)
+        complete = data[keys].notna().all(axis=1)
+        flag(complete & data.duplicated(subset=keys, keep=False), f"duplicate ({', '.join(keys)})")
+
+    for col, (low, high) in (ranges or {}).items():
+        if col in data.columns:
+            values = pd.to_numeric(data[col], errors='coerce')
+            flag(values.notna() & ~values.between(low, high), f"{col} out of range")
+
+    for col in bigint:
+        if col in data.columns:
+            values = pd.to_numeric(data[col], errors='coerce')
+            invalid = values.isna() | (values.abs() >= BIGINT_LIMIT) | (values % 1 != 0)
+            flag(data[col].notna() & invalid, f"{col} does not fit BIGINT")
+
+    for col in teams:
+        if col in data.columns:
+            flag(data[col].notna() & ~data[col].isin(KNOWN_TEAMS), f"unknown team in {col}")
+
+    return reasons.str.rstrip('; ')
+
+def split_rejects(data, rules):
+    """Split a frame into (clean, rejects) using one table's rules"""
+    reasons = reject_reasons(data, **rules)
+    rejected = reasons != ''
+
+    rejects = data[rejected].copy()
+    rejects.insert(0, 'reject_reason', reasons[rejected])
+    return data[~rejected], rejects
+
+def quarantine_rejects(rejects, table_name, quarantine_dir=QUARANTINE_DIR):
+    """Write rejected rows to a timestamped CSV and return its path"""
+    os.makedirs(quarantine_dir, exist_ok=True)
+    timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    path = os.path.join(quarantine_dir, f"{table_name}-{timestamp}.csv")
+    rejects.to_csv(path, index=False)
+    return path
+
+def validate_frame(data, table_name):
+    """
+    Validate a frame against its table's rules and quarantine the rejects.
+
+    Returns only the clean rows.
+    """
+    clean, rejects = split_rejects(data, VALIDATION_RULES[table_name])
+
+    if len(rejects) > 0:
+        path = quarantine_rejects(rejects, table_name)
+        print(f"  Quarantined {len(rejects)}/{len(data)} {table_name} rows to {path}")
+        reason_counts = rejects['reject_reason'].str.split('; ').explode().value_counts()
+        for reason, count in reason_counts.items():
+            print(f"    {reason}: {count}")
+
+    return clean